@@ -0,0 +1,142 @@
+import os
+
+# pyarrow is optional and imported inside the functions: only Parquet and Arrow files
+# need it. Products are stored as four typed columns; Parquet files are compressed
+# with zstd, Arrow IPC (.arrow/.feather) files are left uncompressed so they can be
+# memory-mapped and read without copying.
+
+PARQUET_EXTENSIONS = (".parquet",)
+ARROW_EXTENSIONS = (".arrow", ".feather")
+COLUMNAR_FILE_TYPES = PARQUET_EXTENSIONS + ARROW_EXTENSIONS
+BATCH_ROWS = 128_000   # Rows per Parquet row group / Arrow record batch
+
+
+def is_columnar_path(path):
+    return os.path.splitext(path)[1].lower() in COLUMNAR_FILE_TYPES
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        from json_stream import InventoryFormatError
+        raise InventoryFormatError("Los archivos Parquet/Arrow necesitan pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def product_schema():
+    pa = _pyarrow()
+    return pa.schema([("ID", pa.string()), ("Nombre", pa.string()), ("Cantidad", pa.int64()), ("Precio", pa.float64())])
+
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+_CASTS = (_as_text, _as_text, _as_int, _as_float)
+
+
+def _column(pa, values, field, cast):
+    try:
+        return pa.array(values, type=field.type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        # Odd values (text quantities, lists, huge ints) are converted one by one; what
+        # can't be converted is written as null and skipped when the file is imported
+        values = [cast(value) for value in values]
+        if field.type == pa.int64():
+            values = [value if value is None or -2 ** 63 <= value < 2 ** 63 else None for value in values]
+        return pa.array(values, type=field.type)
+
+
+def rows_to_batch(rows):
+    # A RecordBatch from (ID, Nombre, Cantidad, Precio) tuples
+    pa = _pyarrow()
+    schema = product_schema()
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = [_column(pa, list(values), field, cast) for values, field, cast in zip(columns, schema, _CASTS)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_columnar_rows(path, batches, parquet, on_batch=None):
+    """Writes batches of (ID, Nombre, Cantidad, Precio) rows as Parquet or Arrow IPC.
+
+    Each batch becomes one row group / record batch, so callers pass about
+    BATCH_ROWS rows at a time. Returns {"rows"}.
+    """
+    pa = _pyarrow()
+    schema = product_schema()
+    rows = 0
+    if parquet:
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        sink = pa.OSFile(path, "wb")
+        writer = pa.ipc.new_file(sink, schema)
+    try:
+        for batch in batches:
+            writer.write_batch(rows_to_batch(batch))
+            rows += len(batch)
+            if on_batch is not None:
+                on_batch(rows)
+    finally:
+        writer.close()
+        if not parquet:
+            sink.close()
+    return {"rows": rows}
+
+
+def _expression(clauses):
+    # [(column, op, value)] -> pyarrow.dataset expression, all clauses must hold
+    import pyarrow.dataset as ds
+    expression = None
+    for column, op, value in clauses:
+        field = ds.field(column)
+        clause = {">": field > value, ">=": field >= value, "<": field < value, "<=": field <= value,
+                  "==": field == value, "!=": field != value}[op]
+        expression = clause if expression is None else expression & clause
+    return expression
+
+
+def open_columnar(path):
+    # A pyarrow dataset over one file; Arrow files are memory-mapped
+    _pyarrow()
+    import pyarrow.dataset as ds
+    from pyarrow import fs
+    if os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS:
+        return ds.dataset(path, format="parquet")
+    return ds.dataset(path, format="ipc", filesystem=fs.LocalFileSystem(use_mmap=True))
+
+
+def iter_columnar_batches(path, columns, clauses=(), batch_size=BATCH_ROWS):
+    """RecordBatches of only the given columns and the rows matching clauses.
+
+    Columns not asked for are never read, and the filter runs inside
+    pyarrow: Parquet row groups whose statistics rule them out are skipped
+    without being decoded. Yields (batch, rows in file) with the file's row
+    count first so callers can report progress.
+    """
+    dataset = open_columnar(path)
+    missing = [column for column in columns if column not in dataset.schema.names]
+    if missing:
+        from json_stream import InventoryFormatError
+        raise InventoryFormatError(f"Al archivo le faltan las columnas: {', '.join(missing)}")
+    total = dataset.count_rows()   # From the file's metadata
+    scanner = dataset.scanner(columns=list(columns), filter=_expression(clauses) if clauses else None,
+                              batch_size=batch_size)
+    for batch in scanner.to_batches():
+        if batch.num_rows:
+            yield batch, total
@@ -0,0 +1,95 @@
+import asyncio
+import socket
+import threading
+
+
+class BackgroundServer:
+    """TCP server on its own asyncio event loop, running in a daemon thread.
+
+    Subclasses implement the coroutine _handle(reader, writer) for each
+    connection. start() returns once the port is bound (port 0 picks a free
+    one, see .port) and raises the bind error otherwise; stop() closes the
+    listener and waits for the loop to finish.
+    """
+
+    NAME = "servidor"
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+        self._connections = {}   # handler task -> writer
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name=self.NAME, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            raise self._error
+        return self
+
+    def stop(self, timeout=5):
+        if self.running:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+            self._thread.join(timeout)
+
+    def call_soon(self, fn, *args):
+        # Thread-safe: runs fn(*args) on the server's loop
+        if self.running:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            if not self._ready.is_set():
+                self._error = e
+                self._ready.set()
+            else:
+                print(f"{self.NAME} detenido por un error: {e}")
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._server = await asyncio.start_server(self._accept, self.host, self.port, backlog=512)
+        self.port = self._server.sockets[0].getsockname()[1]  # Resolves port 0 in tests
+        print(f"{self.NAME} escuchando en el puerto {self.port}")
+        self._ready.set()
+        async with self._server:
+            await self._stop_event.wait()
+            # Close every connection and let the handlers finish before the loop ends
+            for writer in list(self._connections.values()):
+                writer.close()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=2)
+
+    async def _accept(self, reader, writer):
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            # Small request/reply messages: send each one right away
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            await self._handle(reader, writer)
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _handle(self, reader, writer):
+        raise NotImplementedError
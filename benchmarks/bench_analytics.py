@@ -0,0 +1,56 @@
+# Incremental analytics vs. recomputing from scratch: times the listener's cost per
+# added product and a panel refresh vs. a full recompute. The randomized checks that
+# both give the same figures are in tests/test_analytics.py.
+# Run from the repo root: python benchmarks/bench_analytics.py [--size 1000000]
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_analytics import InventoryAnalytics, compute_full
+from inventory_store import InventoryStore
+
+
+def products(n, start=0):
+    for i in range(start, start + n):
+        yield {"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 50, "Precio": float(i % 997) + 0.99}
+
+
+def bench(size, batch=100_000):
+    store = InventoryStore(products(size))
+    start = time.perf_counter()
+    analytics = InventoryAnalytics(store)
+    build = time.perf_counter() - start
+
+    plain = InventoryStore()
+    start = time.perf_counter()
+    plain.extend(products(batch, size))
+    without = time.perf_counter() - start
+    start = time.perf_counter()
+    store.extend(products(batch, size))
+    with_analytics = time.perf_counter() - start
+
+    start = time.perf_counter()
+    snapshot = analytics.snapshot()
+    refresh = time.perf_counter() - start
+    start = time.perf_counter()
+    full = compute_full(store)
+    recompute = time.perf_counter() - start
+    assert snapshot == full
+    print(f"{size + batch} productos: construcción inicial {build:.2f}s; alta de {batch} productos "
+          f"{without:.2f}s sin estadísticas, {with_analytics:.2f}s con ellas "
+          f"(+{(with_analytics - without) / batch * 1e6:.1f} µs/producto)")
+    print(f"  refresco del panel {refresh * 1000:.2f} ms vs. recálculo completo {recompute * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+    bench(args.size)
+
+
+if __name__ == "__main__":
+    main()
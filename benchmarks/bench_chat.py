@@ -0,0 +1,135 @@
+# Loopback benchmark for the chat hub: N clients each send M messages, every
+# message is fanned out to the other N-1 clients. Reports delivered messages/s
+# (flat out) and delivery latency (paced), and checks framing: back-to-back messages stay separate,
+# a 500 KB message and multi-byte UTF-8 arrive intact, and a client that stops
+# reading is disconnected without holding up the others.
+# Run from the repo root: python benchmarks/bench_chat.py [--clients 50] [--messages 200] [--rate 5]
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_hub import ChatClient, ChatHub, encode_chat
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+class Receiver:
+    def __init__(self, expected):
+        self.expected = expected
+        self.latencies = []
+        self.texts = []
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+    def on_message(self, user, text):
+        now = time.perf_counter()
+        with self.lock:
+            if text.startswith("t="):
+                self.latencies.append(now - float(text.split(" ", 1)[0][2:]))
+            else:
+                self.texts.append((user, text))
+            if len(self.latencies) + len(self.texts) >= self.expected:
+                self.done.set()
+
+
+def wait_for_clients(hub, count, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while len(hub.clients) < count:
+        assert time.perf_counter() < deadline, f"solo {len(hub.clients)} de {count} clientes conectados"
+        time.sleep(0.01)
+
+
+def check_framing():
+    hub_texts = []
+    hub = ChatHub(host="127.0.0.1", port=0, on_message=lambda user, text: hub_texts.append(text)).start()
+    try:
+        samples = ["hola", "ñandú 🌸 (ﾉ´ヮ`)ﾉ*:･ﾟ✧", "x" * 500_000, ""] + [f"seguido {i}" for i in range(100)]
+        receiver = Receiver(len(samples))
+        listener = ChatClient("127.0.0.1", hub.port, on_message=receiver.on_message)
+        sender = ChatClient("127.0.0.1", hub.port)
+        wait_for_clients(hub, 2)
+        for text in samples:
+            sender.send("ana", text)
+        assert receiver.done.wait(10), f"{len(receiver.texts)} de {len(samples)} mensajes"
+        assert [t for _, t in receiver.texts] == samples, "mensajes partidos, unidos o alterados"
+        assert hub_texts == samples
+
+        # A connected client that never reads: its queue fills and the hub drops it
+        stalled = socket.create_connection(("127.0.0.1", hub.port))
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled.sendall(encode_chat("lento", "hola"))
+        wait_for_clients(hub, 3)
+        receiver.expected += 3000
+        receiver.done.clear()
+        for i in range(3000):
+            sender.send("ana", f"relleno {i} " + "y" * 5000)
+        assert receiver.done.wait(20), "el cliente lento bloqueó a los demás"
+        assert hub.dropped_clients == 1, hub.dropped_clients
+        stalled.close()
+        listener.close()
+        sender.close()
+    finally:
+        hub.stop()
+
+
+def run(clients_count, messages, rate):
+    # rate = messages per second per client, 0 = as fast as possible
+    hub = ChatHub(host="127.0.0.1", port=0, queue_size=100_000).start()
+    expected = (clients_count - 1) * messages
+    receivers = [Receiver(expected) for _ in range(clients_count)]
+    clients = [ChatClient("127.0.0.1", hub.port, on_message=r.on_message) for r in receivers]
+    wait_for_clients(hub, clients_count)
+
+    def send_all(client, n):
+        next_send = time.perf_counter() + n / (clients_count * rate) if rate else 0
+        for i in range(messages):
+            if rate:
+                time.sleep(max(0.0, next_send - time.perf_counter()))
+                next_send += 1 / rate
+            client.send(f"user{n}", f"t={time.perf_counter()!r} mensaje {i}")
+
+    start = time.perf_counter()
+    senders = [threading.Thread(target=send_all, args=(c, n)) for n, c in enumerate(clients)]
+    for thread in senders:
+        thread.start()
+    for thread in senders:
+        thread.join()
+    for receiver in receivers:
+        assert receiver.done.wait(120), f"faltan mensajes: {len(receiver.latencies)} de {expected}"
+    elapsed = time.perf_counter() - start
+    for client in clients:
+        client.close()
+    hub.stop()
+
+    latencies = [v for r in receivers for v in r.latencies]
+    assert len(latencies) == clients_count * expected
+    pace = f"{rate} msg/s por cliente" if rate else "sin pausa"
+    print(f"{clients_count} clientes x {messages} mensajes ({pace}): {len(latencies)} entregas en {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} entregados/s, {clients_count * messages / elapsed:,.0f} enviados/s), "
+          f"latencia p50 {percentile(latencies, 0.5) * 1000:.1f} ms, p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=5, help="messages/s per client in the paced run")
+    args = parser.parse_args()
+
+    check_framing()
+    print("Framing, UTF-8, mensajes grandes y cliente lento: OK")
+    # Throughput with every client sending flat out, then latency at a sustainable pace
+    run(args.clients, args.messages, 0)
+    run(args.clients, max(1, int(args.rate * 10)), args.rate)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# Chat history at 1M messages: append latency and process memory must stay flat
+# as the log grows, and page reads must cost the same at the start and the end.
+# With a display (use xvfb-run on headless machines) the Text widget view is timed
+# too: inserts must stay flat as messages are trimmed from the top. Correctness
+# (paging, crash repair, the widget window) is in tests/test_chat_history.py.
+# Run from the repo root: python benchmarks/bench_chat_history.py [--messages 1000000]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chat_history import ChatHistory, ChatHistoryView
+
+WINDOW = 10_000
+
+
+def rss_mb():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+
+def message(i):
+    return f"user{i % 50}: mensaje número {i} ñandú 🌸"
+
+
+def check_history(path, n):
+    history = ChatHistory(path)
+    windows = []
+    rss_start = None
+    start = time.perf_counter()
+    for i in range(n):
+        history.append(message(i))
+        if (i + 1) % WINDOW == 0:
+            now = time.perf_counter()
+            windows.append((now - start) / WINDOW)
+            start = now
+            if rss_start is None:
+                rss_start = rss_mb()
+    rss_end = rss_mb()
+    first, last = sum(windows[:5]) / 5, sum(windows[-5:]) / 5
+    print(f"{n} mensajes: append {first * 1e6:.1f} µs al principio, {last * 1e6:.1f} µs al final; "
+          f"RSS {rss_start:.1f} MB -> {rss_end:.1f} MB; log {os.path.getsize(path) / 2 ** 20:.0f} MB")
+    assert last < first * 2 + 5e-6, "el append se vuelve más lento con el historial"
+    assert rss_end - rss_start < 10, "la memoria crece con el historial"
+
+    for at in (0, n // 2, n - 200):
+        start = time.perf_counter()
+        page = history.read(at, at + 200)
+        elapsed = time.perf_counter() - start
+        assert len(page) == 200
+        print(f"  página de 200 en {at}: {elapsed * 1000:.2f} ms")
+    history.close()
+
+
+def check_view(path, n):
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"Sin pantalla, se omite la prueba del widget ({e})")
+        return
+    text = tk.Text(root, height=20, width=60)
+    text.pack(side=tk.LEFT)
+    scrollbar = tk.Scrollbar(root, command=text.yview)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    history = ChatHistory(path)
+    view = ChatHistoryView(text, scrollbar, history, max_lines=1000, page=200)
+    root.update()
+    windows = []
+    start = time.perf_counter()
+    for i in range(n):
+        view.append(message(i))
+        if (i + 1) % 1000 == 0:
+            root.update()
+            now = time.perf_counter()
+            windows.append((now - start) / 1000)
+            start = now
+    lines = int(text.index("end-1c").split(".")[0]) - 1
+    first, last = sum(windows[:5]) / 5, sum(windows[-5:]) / 5
+    print(f"Widget: {n} mensajes, {lines} líneas en el widget, inserción {first * 1e6:.0f} µs -> {last * 1e6:.0f} µs")
+    assert last < first * 2 + 50e-6
+    # Scroll to the top a few times: older pages come in, the widget stays bounded
+    for _ in range(10):
+        text.yview_moveto(0)
+        root.update()
+    lines = int(text.index("end-1c").split(".")[0]) - 1
+    print(f"Paginación hacia arriba: mostrando {view.first}..{view.last} con {lines} líneas")
+    history.close()
+    root.destroy()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--view-messages", type=int, default=100_000)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "chat_history.log")
+        check_history(path, args.messages)
+        check_view(path, args.view_messages)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
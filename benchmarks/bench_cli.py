@@ -0,0 +1,147 @@
+# inventory_cli: checks merge, dedupe (first/last), stats, import and export against
+# plain-Python references on a small synthetic catalogue, then runs the streaming
+# commands on N and 4N products, each in a fresh process, and reports throughput and
+# peak RSS. With a small --memory-ids the seen IDs spill to SQLite, so peak memory
+# should stay about the same when the file grows 4x. Unix only (resource.getrusage).
+# Run from the repo root: python benchmarks/bench_cli.py [--size 250000] [--memory-ids 50000]
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_products, write_catalogue
+from inventory_analytics import product_value
+from inventory_cli import main as cli_main
+from inventory_io import REQUIRED_COLUMNS, iter_product_file
+from json_stream import coerce_json_product
+
+STREAMING = ["dedupe", "dedupe-last", "merge", "stats"]
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform != "darwin" else rss / (1024 * 1024)
+
+
+def run_cli(argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+        assert cli_main(argv) == 0, argv
+    return out.getvalue()
+
+
+def valid(products):
+    return [p for p in (coerce_json_product(dict(p)) for p in products) if p is not None]
+
+
+def first_per_id(products):
+    seen = set()
+    return [p for p in products if not (p["ID"] in seen or seen.add(p["ID"]))]
+
+
+def last_per_id(products):
+    last = {p["ID"]: i for i, p in enumerate(products)}
+    return [p for i, p in enumerate(products) if last[p["ID"]] == i]
+
+
+def read(path):
+    return list(iter_product_file(path))
+
+
+def check(tmp, size):
+    a, b = os.path.join(tmp, "a.jsonl"), os.path.join(tmp, "b.json")
+    write_catalogue(a, size, seed=1, duplicates=0.05, odd=0.01)
+    write_catalogue(b, size, seed=2, duplicates=0.05, odd=0.01)
+    products_a = valid(generate_products(size, seed=1, duplicates=0.05, odd=0.01))
+    products_b = valid(generate_products(size, seed=2, duplicates=0.05, odd=0.01))
+
+    for keep, reference in (("first", first_per_id), ("last", last_per_id)):
+        for memory_ids in (10 ** 9, 100):   # In memory, and spilled to SQLite almost at once
+            out = os.path.join(tmp, f"dedupe_{keep}_{memory_ids}.jsonl")
+            run_cli(["dedupe", a, "--out", out, "--keep", keep, "--memory-ids", str(memory_ids)])
+            assert read(out) == reference(products_a), (keep, memory_ids)
+
+    merged = os.path.join(tmp, "merged.xlsx")
+    run_cli(["merge", a, b, "--out", merged, "--memory-ids", "100"])
+    columns = lambda products: [[p[c] for c in REQUIRED_COLUMNS] for p in products]   # Excel keeps only these
+    assert columns(read(merged)) == columns(first_per_id(products_a + products_b))
+
+    text = run_cli(["stats", "--file", a, "--top", "5"])
+    lines = dict(line.split(": ", 1) for line in text.splitlines() if ": " in line and not line.startswith(" "))
+    assert lines["Productos"] == f"{len(products_a)}, {size - len(products_a)} inválidos", lines["Productos"]
+    assert float(lines["Valor total"]) == round(math.fsum(map(product_value, products_a)), 2)
+    assert int(lines["Unidades"]) == sum(p["Cantidad"] for p in products_a)
+
+    inventory, exported = os.path.join(tmp, "inv.json"), os.path.join(tmp, "export.jsonl")
+    for storage in ("journal", "sqlite"):
+        run_cli(["--inventory", inventory, "--storage", storage, "import", a, b])
+        run_cli(["--inventory", inventory, "--storage", storage, "export", exported])
+        assert sorted(p["ID"] for p in read(exported)) == sorted(p["ID"] for p in first_per_id(products_a + products_b))
+    print(f"OK: merge, dedupe first/last, stats, import/export coinciden con la referencia ({size} productos por archivo)")
+
+
+def child(argv):
+    start = time.perf_counter()
+    run_cli(argv)
+    print(json.dumps({"seconds": time.perf_counter() - start, "peak_mb": peak_rss_mb()}))
+
+
+def measure(argv):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", *argv],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def command(name, path, other, out, memory_ids):
+    if name == "stats":
+        return ["stats", "--file", path]
+    if name == "merge":
+        return ["merge", path, other, "--out", out, "--memory-ids", str(memory_ids)]
+    keep = "last" if name == "dedupe-last" else "first"
+    return ["dedupe", path, "--out", out, "--keep", keep, "--memory-ids", str(memory_ids)]
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=250_000)
+    parser.add_argument("--memory-ids", type=int, default=50_000)
+    parser.add_argument("--check-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp, args.check_size)
+        peaks = {}
+        print(f"{'comando':>12} {'productos':>10} {'MB':>7} {'s':>7} {'filas/s':>10} {'MB/s':>7} {'pico MB':>8}")
+        for size in (args.size, 4 * args.size):
+            path, other = os.path.join(tmp, f"cat{size}.jsonl"), os.path.join(tmp, f"other{size}.jsonl")
+            write_catalogue(path, size, seed=3)
+            write_catalogue(other, size // 4, seed=4)
+            for name in STREAMING:
+                result = measure(command(name, path, other, os.path.join(tmp, "out.jsonl"), args.memory_ids))
+                rows = size + (size // 4 if name == "merge" else 0)
+                megabytes = (os.path.getsize(path) + (os.path.getsize(other) if name == "merge" else 0)) / 2 ** 20
+                peaks.setdefault(name, []).append(result["peak_mb"])
+                print(f"{name:>12} {rows:>10} {megabytes:>7.1f} {result['seconds']:>7.2f} "
+                      f"{rows / result['seconds']:>10,.0f} {megabytes / result['seconds']:>7.1f} {result['peak_mb']:>8.1f}")
+            os.remove(path)
+            os.remove(other)
+        for name, (small, large) in peaks.items():
+            # 4x the rows must not mean 4x the memory: allow 25% + a little allocator noise
+            assert large <= small * 1.25 + 10, f"{name}: {small:.1f} MB -> {large:.1f} MB"
+        print("OK: memoria acotada (pico con 4x filas dentro de +25% + 10 MB)")
+
+
+if __name__ == "__main__":
+    main()
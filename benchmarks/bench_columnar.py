@@ -0,0 +1,142 @@
+# Parquet and Arrow IPC next to the existing JSON, JSON Lines and Excel paths, on the
+# same synthetic catalogue: file size, export and import times through the app's job
+# bodies, a filtered import ("Cantidad > 0") with the filter pushed into pyarrow vs.
+# applied per product, and a total-value scan that reads only Cantidad/Precio
+# (memory-mapped for Arrow). Checks round trips and filters first. Needs pyarrow.
+# Run from the repo root: python benchmarks/bench_columnar.py [--size 1000000] [--excel-max 100000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arrow_io import iter_columnar_batches
+from benchmarks.synthetic import generate_products
+from inventory_analytics import product_value
+from inventory_io import (columnar_export_job, columnar_import_job, excel_export_job, excel_import_job,
+                          iter_product_file, json_export_job, json_import_job, parse_where, where_predicate)
+from inventory_store import InventoryStore
+from jobs import JobRunner
+
+FORMATS = [".json", ".jsonl", ".xlsx", ".parquet", ".arrow"]
+WHERE = "Cantidad > 0"
+
+
+def run_job(work, store=None):
+    def commit(job, products):
+        with store.lock:
+            for product in products:
+                store.add_if_new(product)
+    runner = JobRunner()
+    job = runner.start("bench", work, on_chunk=commit if store is not None else None)
+    runner.wait(job)
+    assert job.status == "done", job.error
+    return job.result
+
+
+def export_job(path, store):
+    extension = os.path.splitext(path)[1]
+    if extension == ".xlsx":
+        return excel_export_job(path, store)
+    if extension in (".parquet", ".arrow"):
+        return columnar_export_job(path, store)
+    return json_export_job(path, store.to_list())
+
+
+def import_job(path, store):
+    extension = os.path.splitext(path)[1]
+    if extension == ".xlsx":
+        return excel_import_job(path, store.ids())
+    if extension in (".parquet", ".arrow"):
+        return columnar_import_job(path)
+    return json_import_job(path)
+
+
+def check(tmp):
+    products = list(generate_products(3000, seed=7, duplicates=0, odd=0.02))
+    store = InventoryStore(products)
+    store.add({"ID": "texto", "Nombre": "cantidad rara", "Cantidad": "muchos", "Precio": 1.0})
+    store.add({"ID": "grande", "Nombre": "fuera de int64", "Cantidad": 2 ** 70, "Precio": 2.0})
+    clauses = parse_where("Cantidad > 0 y Precio <= 20")
+    matches = where_predicate(clauses)
+    json_path = os.path.join(tmp, "check.json")
+    run_job(json_export_job(json_path, store.to_list()))
+    reference = list(iter_product_file(json_path))
+    for extension in (".parquet", ".arrow"):
+        path = os.path.join(tmp, "check" + extension)
+        run_job(columnar_export_job(path, store))
+        counts = {}
+        read = list(iter_product_file(path, counts))
+        # Values that don't fit the typed columns come back as nulls and are skipped
+        columns = lambda products: [(p["ID"], p["Nombre"], p["Cantidad"], p["Precio"]) for p in products]
+        assert columns(read) == columns(p for p in reference if p["ID"] != "grande"), extension
+        assert counts["invalid"] == len(store) - len(reference) + 1 and counts["rows"] == len(store), counts
+        counts = {}
+        kept = list(iter_product_file(path, counts, clauses))
+        assert kept == [p for p in read if matches(p)]
+        assert counts["rows"] == len(store) == counts["filtered"] + counts["invalid"] + len(kept), counts
+        imported = InventoryStore()
+        result = run_job(columnar_import_job(path, clauses), imported)
+        assert imported.to_list() == [p for p in read if matches(p)], result
+    print(f"OK: Parquet y Arrow ida y vuelta, filtros y valores raros ({len(store)} productos)")
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--excel-max", type=int, default=100_000, help="Excel is skipped above this size (its reader is slow)")
+    args = parser.parse_args()
+    import pyarrow  # noqa: F401
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp)
+        store = InventoryStore()
+        store.extend(generate_products(args.size, duplicates=0))
+        clauses = parse_where(WHERE)
+        print(f"{args.size} productos")
+        print(f"{'formato':>9} {'MB':>8} {'exportar s':>11} {'importar s':>11} {'filas/s':>10} "
+              f"{WHERE + ' s':>16} {'solo valor s':>13}")
+        for extension in FORMATS:
+            if extension == ".xlsx" and args.size > args.excel_max:
+                continue
+            path = os.path.join(tmp, "catalogo" + extension)
+            export_seconds, _ = timed(lambda: run_job(export_job(path, store)))
+            imported = InventoryStore()
+            import_seconds, _ = timed(lambda: run_job(import_job(path, imported), imported))
+            assert len(imported) == len(store), (extension, len(imported))
+            # Filtered read: pushed into pyarrow for Parquet/Arrow, per product otherwise
+            filter_seconds, kept = timed(lambda: sum(1 for _ in iter_product_file(path, where=clauses)))
+            if extension in (".parquet", ".arrow"):
+                # Only two columns are read; Arrow is memory-mapped
+                import pyarrow.compute as pc
+
+                def scan():
+                    total = 0.0
+                    for batch, _ in iter_columnar_batches(path, ["Cantidad", "Precio"]):
+                        total += pc.sum(pc.multiply(pc.cast(batch.column(0), "float64"), batch.column(1))).as_py() or 0.0
+                    return total
+            else:
+                def scan():
+                    return sum(product_value(p) for p in iter_product_file(path))
+            scan_seconds, total = timed(scan)
+            size_mb = os.path.getsize(path) / 2 ** 20
+            print(f"{extension:>9} {size_mb:>8.1f} {export_seconds:>11.2f} {import_seconds:>11.2f} "
+                  f"{args.size / import_seconds:>10,.0f} {filter_seconds:>16.2f} {scan_seconds:>13.2f}")
+            if extension == ".json":
+                expected_kept, expected_total = kept, total
+            else:
+                assert kept == expected_kept, (extension, kept, expected_kept)
+                assert abs(total - expected_total) <= 1e-6 * expected_total, (extension, total, expected_total)
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
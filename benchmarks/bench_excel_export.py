@@ -0,0 +1,134 @@
+# Streaming Excel export (inventory_io.write_excel_rows / xlsx_stream): checks that
+# sheets roll over, odd values survive and the per-name summary is right, then
+# exports synthetic inventories of 100k, 1M and 3M products, each in a fresh process,
+# and reports rows/s and how much the export adds to the peak RSS of the process
+# holding the store. The old pd.DataFrame(...).to_excel export is timed for
+# comparison up to --pandas-max products. Unix only (resource.getrusage).
+# Run from the repo root: python benchmarks/bench_excel_export.py [--sizes 100000 1000000 3000000]
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_products
+from inventory_analytics import NameTotals
+from inventory_io import (EXCEL_MAX_ROWS, PRODUCT_SHEET, SUMMARY_SHEET, excel_export_job, iter_product_file,
+                          write_excel_rows)
+from inventory_store import InventoryStore
+from jobs import JobRunner
+
+SIZES = [100_000, 1_000_000, 3_000_000]
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform != "darwin" else rss / (1024 * 1024)
+
+
+def check(tmp):
+    from openpyxl import load_workbook
+    store = InventoryStore(list(generate_products(5000, seed=5, duplicates=0.02, odd=0.01)))
+    store.add({"ID": " espacios ", "Nombre": "<a & b> \x01", "Cantidad": True, "Precio": float("nan")})
+    store.add({"ID": "lista", "Nombre": "x", "Cantidad": [1, 2], "Precio": 1e300})
+    removed = store.keys()[::7]
+    store.remove_many(removed)
+    rows = [row for batch in store.row_batches(1000) for row in batch]
+    assert len(rows) == len(store)
+
+    path = os.path.join(tmp, "check.xlsx")
+    result = write_excel_rows(path, store.row_batches(333), summary=True, sheet_rows=1500)
+    assert result["rows"] == len(rows) and result["sheets"] == -(-len(rows) // 1500), result
+
+    workbook = load_workbook(path, read_only=True)
+    names = workbook.sheetnames
+    assert names[:3] == [PRODUCT_SHEET, f"{PRODUCT_SHEET} (2)", f"{PRODUCT_SHEET} (3)"] and names[result["sheets"]] == SUMMARY_SHEET, names
+    # Missing fields are empty cells, which the read-only reader drops from the row end
+    written = [row + (None,) * (4 - len(row)) for name in names[:result["sheets"]]
+               for row in workbook[name].iter_rows(min_row=2, values_only=True)]
+    expected = [(product_id, name.replace("\x01", ""), quantity, price if price == price else "nan")
+                for product_id, name, quantity, price in rows]
+    expected = [tuple(str(v) if type(v) is list else v for v in row) for row in expected]
+    assert written == expected
+
+    totals = NameTotals()
+    for row in rows:
+        totals.add(row[1], row[2], row[3])
+    summary = [row for name in names[result["sheets"]:] for row in workbook[name].iter_rows(min_row=2, values_only=True)]
+    assert summary == [(name.replace("\x01", ""), *rest) for name, *rest in totals.rows()] and len(summary) == result["summary_rows"]
+    workbook.close()
+
+    # The import reads every product sheet and skips the summary
+    counts = {}
+    assert sum(1 for _ in iter_product_file(path, counts)) == counts["rows"] - counts["invalid"] and counts["rows"] == len(rows)
+
+    # A cancelled export job leaves neither the file nor its temp file behind
+    runner = JobRunner()
+    cancelled = os.path.join(tmp, "cancelled.xlsx")
+    job = runner.start("export", excel_export_job(cancelled, store, batch_size=100))
+    job.cancel()
+    runner.wait(job)
+    assert job.status == "cancelled" and not os.path.exists(cancelled) and not os.path.exists(cancelled + ".tmp")
+    print(f"OK: {result['sheets']} hojas + resumen, valores raros, importación y cancelación ({len(rows)} productos)")
+
+
+def child(mode, size, path):
+    store = InventoryStore()
+    store.extend(generate_products(size))
+    store_mb = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "pandas":
+        import pandas as pd
+        pd.DataFrame(store.to_list()).to_excel(path, index=False)
+        result = {"rows": len(store), "sheets": 1}
+    else:
+        result = write_excel_rows(path, store.row_batches(), summary=mode == "summary")
+    elapsed = time.perf_counter() - start
+    print(json.dumps(dict(result, seconds=elapsed, store_mb=store_mb, peak_mb=peak_rss_mb(),
+                          file_mb=os.path.getsize(path) / 2 ** 20)))
+
+
+def measure(mode, size, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, str(size), path],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--pandas-max", type=int, default=100_000)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], int(args.child[1]), args.child[2])
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check(tmp)
+        print(f"{'modo':>8} {'productos':>10} {'hojas':>6} {'s':>7} {'filas/s':>10} {'MB':>7} "
+              f"{'RSS tienda':>11} {'pico':>7} {'+export':>8}")
+        for size in args.sizes:
+            modes = ["stream", "summary"] + (["pandas"] if size <= args.pandas_max else [])
+            for mode in modes:
+                path = os.path.join(tmp, f"{mode}{size}.xlsx")
+                result = measure(mode, size, path)
+                extra = result["peak_mb"] - result["store_mb"]
+                print(f"{mode:>8} {size:>10} {result['sheets']:>6} {result['seconds']:>7.2f} "
+                      f"{size / result['seconds']:>10,.0f} {result['file_mb']:>7.1f} {result['store_mb']:>11.1f} "
+                      f"{result['peak_mb']:>7.1f} {extra:>8.1f}")
+                assert result["rows"] == size
+                assert result["sheets"] == -(-size // (EXCEL_MAX_ROWS - 1)), result
+                if mode != "pandas":
+                    # Streaming: the export itself must not grow with the inventory
+                    assert extra < 40, f"{mode} {size}: +{extra:.1f} MB"
+                os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+# Handler instrumentation. First checks that the histograms' percentiles are
+# within one bucket of the exact ones, that bytes/rows of nested handlers add up,
+# that cProfile captures the chosen handler and that the JSON dump reads back.
+# Then measures what the wrapper costs per call while disabled and enabled, on an
+# empty function and on a real handler (add a product + search).
+# Run from the repo root: python benchmarks/bench_instrumentation.py [--calls 1000000]
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from instrumentation import SUB_BUCKETS, Histogram, Instruments
+from inventory_store import InventoryStore
+from search_index import SearchIndex
+
+
+def check_histogram():
+    rng = random.Random(1)
+    for _ in range(50):
+        values = [rng.lognormvariate(0, 3) for _ in range(rng.randrange(1, 5000))] + [0] * rng.randrange(3)
+        histogram = Histogram()
+        for value in values:
+            histogram.add(value)
+        values.sort()
+        for p in (1, 50, 90, 99, 100):
+            exact = values[max(1, math.ceil(len(values) * p / 100)) - 1]
+            got = histogram.percentile(p)
+            assert exact <= got <= max(exact * (1 + 2 / (SUB_BUCKETS + 2)), exact), (p, exact, got)
+        assert histogram.count == len(values) and histogram.max == values[-1]
+    print("Percentiles de los histogramas: dentro de un cubo del valor exacto")
+
+
+def check_instruments():
+    instruments = Instruments(enabled=True)
+
+    @instruments.handler()
+    def save():
+        instruments.count(written=100)
+
+    @instruments.handler("agregar")
+    def add(n):
+        instruments.count(rows=n)
+        save()
+        return n
+
+    @instruments.handler()
+    def broken():
+        raise ValueError("x")
+
+    for n in range(1, 11):
+        assert add(n) == n
+    try:
+        broken()
+    except ValueError:
+        pass
+    instruments.profile_name = "agregar"
+    add(1)
+    snapshot = instruments.snapshot()
+    assert snapshot["agregar"]["latency_ms"]["count"] == 11
+    assert snapshot["agregar"]["rows"]["total"] == 56 and snapshot["agregar"]["bytes"]["total"] == 1100
+    assert snapshot["save"]["bytes"]["total"] == 1100 and snapshot["save"]["rows"]["total"] == 0
+    assert snapshot["broken"]["errors"] == 1
+    assert "save" in instruments.profile_text("agregar")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "informe.json")
+        instruments.dump(path)
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+    assert report["handlers"]["agregar"]["rows"]["total"] == 56 and "agregar" in report["profiles"]
+    instruments.enabled = False
+    add(1)
+    assert instruments.snapshot()["agregar"]["latency_ms"]["count"] == 11   # Not counted while disabled
+    print("Bytes y filas de manejadores anidados, errores, cProfile y volcado JSON: OK")
+
+
+def per_call(fn, calls):
+    return min(timeit.repeat(fn, number=calls, repeat=5)) / calls * 1e9
+
+
+def bench(calls):
+    instruments = Instruments()
+
+    def empty():
+        pass
+    wrapped = instruments.handler("vacio")(empty)
+    bare = per_call(empty, calls)
+    disabled = per_call(wrapped, calls)
+    instruments.enabled = True
+    enabled = per_call(wrapped, calls // 10)
+    print(f"Función vacía: {bare:.0f} ns sin envolver, {disabled:.0f} ns desactivado "
+          f"(+{disabled - bare:.0f} ns), {enabled:.0f} ns activado")
+    assert disabled - bare < 1000, "el envoltorio desactivado cuesta más de 1 µs"
+
+    # A real handler on a 100k inventory: search and read the rows it shows
+    store = InventoryStore({"ID": f"P{i}", "Nombre": f"producto {i}", "Cantidad": i % 50, "Precio": 1.5}
+                           for i in range(100_000))
+    index = SearchIndex(store)
+
+    def search():
+        matches = index.search("producto 4242")
+        instruments.count(rows=len(matches))
+        return [store.row(key) for key in matches[:20]]
+    handler = instruments.handler("buscar")(search)
+    times = {"plain": [], "disabled": [], "enabled": []}
+    for _ in range(5):   # Interleaved, so drift hits all three alike
+        for mode, fn in (("plain", search), ("disabled", handler), ("enabled", handler)):
+            instruments.enabled = mode == "enabled"
+            times[mode].append(timeit.timeit(fn, number=2000) / 2000 * 1e9)
+    plain, disabled, enabled = (min(times[mode]) for mode in ("plain", "disabled", "enabled"))
+    print(f"Búsqueda (100k productos): {plain / 1000:.1f} µs sin envolver, "
+          f"desactivado {(disabled - plain) / plain * 100:+.2f}%, activado {(enabled - plain) / plain * 100:+.2f}%")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args()
+    check_histogram()
+    check_instruments()
+    bench(args.calls)
+
+
+if __name__ == "__main__":
+    main()
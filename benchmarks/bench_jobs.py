@@ -0,0 +1,84 @@
+# Drives the import/export jobs headlessly (no Tk) through JobRunner.poll(),
+# checks cancellation and chunked commits, and reports rows/s.
+# Run from the repo root: python benchmarks/bench_jobs.py [--rows 200000]
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_io import excel_export_job, excel_import_job, json_export_job, json_import_job
+from inventory_store import InventoryStore
+from jobs import JobRunner
+
+
+def make_products(n):
+    return [{"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n)]
+
+
+def run(runner, name, work, store=None):
+    chunks = []
+
+    def on_chunk(job, products):
+        chunks.append(len(products))
+        if store is not None:
+            for product in products:
+                store.add_if_new(product)
+
+    job = runner.start(name, work, on_chunk=on_chunk)
+    runner.wait(job, timeout=600)
+    return job, chunks
+
+
+def report(job, chunks=()):
+    extra = f", {len(chunks)} chunks committed" if chunks else ""
+    print(f"{job.name:>14}: {job.status:<9} {job.done:>9} rows in {job.elapsed:6.2f}s ({job.rows_per_second:>10,.0f} rows/s{extra})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--excel-rows", type=int, default=20_000)
+    args = parser.parse_args()
+    runner = JobRunner()  # No root: events are dispatched by runner.wait()/poll()
+    products = make_products(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "export.json")
+        job, _ = run(runner, "export json", json_export_job(json_path, products))
+        assert job.status == "done" and os.path.exists(json_path), job.error
+        report(job)
+
+        store = InventoryStore()
+        job, chunks = run(runner, "import json", json_import_job(json_path), store)
+        assert job.status == "done" and len(store) == args.rows, job.error
+        report(job, chunks)
+
+        # Cancel right away: no partial file is left behind
+        cancelled_path = os.path.join(tmp, "cancelled.json")
+        job = runner.start("cancel export", json_export_job(cancelled_path, products))
+        job.cancel()
+        runner.wait(job)
+        assert job.status == "cancelled" and not os.path.exists(cancelled_path) and not os.path.exists(cancelled_path + ".tmp")
+        report(job)
+
+        # Errors are delivered to on_error instead of raising in the worker
+        job = runner.start("bad import", json_import_job(os.path.join(tmp, "missing.json")))
+        runner.wait(job)
+        assert job.status == "error" and isinstance(job.error, FileNotFoundError)
+        report(job)
+
+        xlsx_path = os.path.join(tmp, "export.xlsx")
+        job, _ = run(runner, "export excel", excel_export_job(xlsx_path, InventoryStore(products[:args.excel_rows])))
+        assert job.status == "done", job.error
+        report(job)
+        store = InventoryStore(products[:args.excel_rows // 2])
+        job, chunks = run(runner, "import excel", excel_import_job(xlsx_path, store.ids()), store)
+        assert job.status == "done" and job.result["skipped"] == args.excel_rows // 2, job.error
+        report(job, chunks)
+    print("all job checks passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Peak RSS of json.load/json.dump vs. the streaming reader/writer as the file grows.
+# Each measurement runs in a fresh process. Unix only (uses resource.getrusage).
+# Run from the repo root: python benchmarks/bench_json_memory.py
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_products, write_products
+
+SIZES = [10_000, 100_000, 1_000_000]
+
+
+def products(n):
+    for i in range(n):
+        yield {"ID": str(i), "Nombre": f"producto número {i}", "Cantidad": i % 100, "Precio": float(i % 997)}
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform != "darwin" else rss / (1024 * 1024)
+
+
+def child(mode, path, n):
+    jsonl = path.endswith(".jsonl")
+    if mode == "load":
+        with open(path, encoding="utf-8") as f:
+            count = len(json.load(f))
+    elif mode == "stream-read":
+        with open(path, encoding="utf-8") as f:
+            count = sum(1 for _ in iter_products(f, jsonl=jsonl))
+    elif mode == "dump":
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(products(n)), f, ensure_ascii=False, indent=4)
+        count = n
+    else:  # stream-write
+        with open(path, "w", encoding="utf-8") as f:
+            write_products(f, products(n), jsonl=jsonl)
+        count = n
+    print(json.dumps({"count": count, "peak_mb": peak_rss_mb()}))
+
+
+def measure(mode, path, n):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, path, str(n)],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])["peak_mb"]
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+        return
+    print(f"{'products':>10} {'file MB':>8} {'json.load':>10} {'stream .json':>13} {'stream .jsonl':>14} {'json.dump':>10} {'stream write':>13}  (peak RSS MB)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in SIZES:
+            array_path = os.path.join(tmp, f"inv{n}.json")
+            lines_path = os.path.join(tmp, f"inv{n}.jsonl")
+            dump = measure("dump", array_path, n)
+            stream_write = measure("stream-write", lines_path, n)
+            load = measure("load", array_path, n)
+            stream_array = measure("stream-read", array_path, n)
+            stream_lines = measure("stream-read", lines_path, n)
+            size_mb = os.path.getsize(array_path) / 1e6
+            print(f"{n:>10} {size_mb:>8.1f} {load:>10.1f} {stream_array:>13.1f} {stream_lines:>14.1f} {dump:>10.1f} {stream_write:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# Multi-file import (parallel_import): a batch of supplier workbooks whose ID ranges
+# overlap is read by 1, 2, 4 and 8 worker processes and merged. Checks first that the
+# merged products and per-file reports are the same for every worker count and file
+# order, match a sequential first-file-wins merge, and that an unreadable file is
+# reported without stopping the others; then reports rows/s and the speedup over one
+# worker. The speedup is bounded by the CPUs available (printed) and by the merge,
+# which runs in the parent.
+# Run from the repo root: python benchmarks/bench_parallel_import.py [--files 16] [--rows 25000] [--format xlsx]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_products
+from inventory_io import iter_product_file, write_excel_rows
+from inventory_store import InventoryStore
+from jobs import JobRunner
+from json_stream import iter_batches, write_products_file
+from parallel_import import merge_files, merge_order, parallel_import_job
+
+WORKERS = [1, 2, 4, 8]
+OVERLAP = 0.1   # Share of each file's IDs that the next file also has
+
+
+def write_supplier_files(tmp, files, rows, extension, odd=0.0):
+    paths = []
+    for index in range(files):
+        path = os.path.join(tmp, f"proveedor{index:03d}{extension}")
+        products = generate_products(rows, seed=index, odd=odd, first_id=index * int(rows * (1 - OVERLAP)))
+        if extension == ".xlsx":
+            rows_of = ((p.get("ID"), p.get("Nombre"), p.get("Cantidad"), p.get("Precio")) for p in products)
+            write_excel_rows(path, iter_batches(rows_of, 5000))
+        else:
+            write_products_file(path, products)
+        paths.append(path)
+    return paths
+
+
+def sequential_merge(paths, existing_ids):
+    seen = set(existing_ids)
+    merged = []
+    for path in merge_order(paths):
+        for product in iter_product_file(path):
+            if product["ID"] not in seen:
+                seen.add(product["ID"])
+                merged.append(product)
+    return merged
+
+
+def check(tmp, extension):
+    paths = write_supplier_files(tmp, 6, 2000, extension, odd=0.01)
+    broken = os.path.join(tmp, "proveedor002b" + extension)
+    with open(broken, "w") as f:
+        f.write("esto no es un archivo de productos")
+    paths.append(broken)
+    existing = [product["ID"] for product in generate_products(300, seed=99)]
+    expected = sequential_merge([p for p in paths if p != broken], existing)
+
+    results = []
+    for workers in (1, 2, 3):
+        shuffled = paths[:]
+        random.Random(workers).shuffle(shuffled)
+        results.append(merge_files(shuffled, existing, workers))
+    products, reports = results[0]
+    assert all(result == results[0] for result in results[1:]), "el resultado depende de los procesos"
+    assert products == expected
+    assert [r["file"] for r in reports] == merge_order(paths)
+    errors = [r for r in reports if r["error"] is not None]
+    assert [r["file"] for r in errors] == [broken], errors
+    for report in reports:
+        if report["error"] is None:
+            assert report["rows"] == report["invalid"] + report["repeated"] + report["conflicts"] + report["existing"] + report["imported"], report
+    assert sum(r["imported"] for r in reports) == len(products)
+    assert all(r["conflicts"] for r in reports[1:] if r["error"] is None), "los archivos deberían solaparse"
+
+    # Through the app's job: nothing is committed before every file is merged
+    store = InventoryStore(generate_products(300, seed=99))
+    chunks = []
+
+    def commit(job, chunk):
+        chunks.append(len(chunk))
+        with store.lock:
+            for product in chunk:
+                store.add_if_new(product)
+    runner = JobRunner()
+    job = runner.wait(runner.start("import", parallel_import_job(paths, store.ids(), workers=2, chunk_size=1000),
+                                   on_chunk=commit))
+    assert job.status == "done", job.error
+    assert store.to_list()[300:] == expected and sum(chunks) == len(expected), (len(store), len(expected))
+    assert job.result["files"] == reports
+
+    # Cancelling while files are being read adds nothing
+    job = runner.start("import", parallel_import_job(paths, (), workers=2), on_chunk=commit)
+    job.cancel()
+    runner.wait(job)
+    assert job.status == "cancelled"
+    print(f"OK: mismo resultado con 1, 2 y 3 procesos en cualquier orden, {len(paths)} archivos ({len(products)} productos)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=25_000, help="Products per file")
+    parser.add_argument("--format", choices=("xlsx", "jsonl", "json"), default="xlsx")
+    parser.add_argument("--workers", type=int, nargs="+", default=WORKERS)
+    args = parser.parse_args()
+    extension = "." + args.format
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check_dir = os.path.join(tmp, "check")
+        os.mkdir(check_dir)
+        check(check_dir, extension)
+        paths = write_supplier_files(tmp, args.files, args.rows, extension)
+        size_mb = sum(os.path.getsize(path) for path in paths) / 2 ** 20
+        print(f"{args.files} archivos {extension} de {args.rows} filas ({size_mb:.1f} MB), {os.cpu_count()} CPU")
+        print(f"{'procesos':>8} {'s':>7} {'filas/s':>10} {'aceleración':>12} {'importados':>11}")
+        baseline = None
+        reference = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            products, reports = merge_files(paths, (), workers)
+            elapsed = time.perf_counter() - start
+            rows = sum(report["rows"] for report in reports)
+            baseline = baseline or elapsed
+            print(f"{workers:>8} {elapsed:>7.2f} {rows / elapsed:>10,.0f} {baseline / elapsed:>11.2f}x {len(products):>11}")
+            reference = reference or products
+            assert products == reference, workers
+            del products
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Bytes per product: the inventory as a list of dicts (what json.load gives) vs.
+# the columnar InventoryStore with its ID index. Each measurement runs in a fresh
+# process and counts Python allocations with tracemalloc. Also checks that get(),
+# row(), columns() and to_list() give back exactly the products that went in.
+# Run from the repo root: python benchmarks/bench_product_memory.py [--sizes 100000 1000000]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore
+
+
+def products(n):
+    # Built from JSON text like a loaded file, so no string is shared between products
+    for i in range(n):
+        yield json.loads(json.dumps({"ID": f"P{i:07d}", "Nombre": f"Peluche conejito rosa nº {i % 5000}",
+                                     "Cantidad": i % 1000, "Precio": round(1 + (i % 9973) / 100, 2)},
+                                    ensure_ascii=False))
+
+
+def check_round_trip():
+    odd = [{"ID": "x", "Nombre": "sin precio", "Cantidad": 1}, {"Nombre": "sin ID", "Cantidad": 2, "Precio": 1.0},
+           {"ID": 5, "Nombre": None, "Cantidad": "3", "Precio": 2}, {"ID": "y", "Nombre": "extra", "Cantidad": 1,
+                                                                      "Precio": 1.5, "Color": "rosa"},
+           {"ID": "z", "Nombre": "bool", "Cantidad": True, "Precio": 1.0}, {"ID": "P0000001", "Nombre": "repetido",
+                                                                            "Cantidad": 0, "Precio": 0.0}]
+    expected = list(products(1000)) + odd
+    store = InventoryStore(expected)
+    removed = store.keys()[:1000:3]
+    store.remove_many(removed)
+    expected = [p for i, p in enumerate(expected) if i % 3 or i >= 1000]
+    assert store.to_list() == expected
+    for key, product in store.items():
+        assert store.get(key) == product
+        assert store.row(key) == tuple(product.get(f, d) for f, d in (("ID", ""), ("Nombre", ""), ("Cantidad", 0),
+                                                                        ("Precio", 0.0)))
+    assert all(store.get(key) is None and store.row(key) is None for key in removed)
+    keys, columns = store.columns(("ID", "Nombre", "Cantidad", "Color"))
+    assert keys == [key for key, _ in store.items()]
+    assert list(zip(*columns)) == [(p.get("ID"), p.get("Nombre"), p.get("Cantidad"), p.get("Color")) for p in expected]
+    assert [p["Nombre"] for p in store.find_by_id("P0000001")] == ["Peluche conejito rosa nº 1", "repetido"]
+    assert store.find_by_name("  SIN ID ") == [odd[1]]
+    first = store.keys()[0]
+    store.clear()
+    assert store.add({"ID": "nuevo", "Nombre": "n", "Cantidad": 1, "Precio": 1.0}) > first
+    print("Ida y vuelta de productos normales, raros, borrados y repetidos: OK")
+
+
+def child(mode, n):
+    tracemalloc.start()
+    if mode == "dicts":
+        data = list(products(n))
+    else:
+        data = InventoryStore()
+        for product in products(n):
+            data.add(product)
+    current, peak = tracemalloc.get_traced_memory()
+    print(json.dumps({"bytes": current, "count": len(data)}))
+
+
+def measure(mode, n):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, str(n)],
+                            capture_output=True, text=True, check=True)
+    report = json.loads(result.stdout)
+    assert report["count"] == n
+    return report["bytes"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return
+    check_round_trip()
+    for n in args.sizes:
+        dicts = measure("dicts", n)
+        store = measure("store", n)
+        print(f"{n} productos: lista de dicts {dicts / n:.0f} B/producto ({dicts / 2 ** 20:.0f} MB), "
+              f"InventoryStore en columnas con índice de IDs {store / n:.0f} B/producto ({store / 2 ** 20:.0f} MB), "
+              f"{dicts / store:.1f}x menos")
+        assert store < dicts, "las columnas ocupan más que los dicts"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Search latency of the trigram SearchIndex vs. the old lowercase-and-scan search.
+# Run from the repo root: python benchmarks/bench_search.py [--size 1000000]
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore
+from search_index import SearchIndex
+
+WORDS = ["jabón", "champú", "galletas", "jugo", "café", "azúcar", "arroz", "aceite", "leche", "pan",
+         "atún", "sal", "té", "vinagre", "harina", "lentejas", "detergente", "cepillo", "toalla", "vela"]
+BRANDS = ["kawaii", "sol", "luna", "estrella", "nube", "flor", "gatito", "osito", "mango", "fresa"]
+
+
+def make_store(n, seed=7):
+    rnd = random.Random(seed)
+    return InventoryStore({
+        "ID": f"SKU{i:07d}",
+        "Nombre": f"{rnd.choice(WORDS)} {rnd.choice(BRANDS)} {rnd.randint(1, 999)}g",
+        "Cantidad": rnd.randint(0, 500),
+        "Precio": round(rnd.uniform(0.5, 99), 2),
+    } for i in range(n))
+
+
+def linear_search(store, query):
+    query = query.strip().lower()
+    return [key for key, p in store.items() if query in str(p.get("ID", "")).lower() or query in p.get("Nombre", "").lower()]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return (time.perf_counter() - start) * 1e3, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    store = make_store(args.size)
+    build_ms, index = timed(SearchIndex, store)
+    print(f"{args.size} products, index built in {build_ms / 1e3:.1f}s")
+
+    print(f"{'query':>22} {'hits':>8} {'index ms':>9} {'linear ms':>10}")
+    for query in ["SKU0123456", "0424242", "gatito 77", "jabon osito 12", "atún", "xyz-no-match"]:
+        index._last = None  # Cold query, no narrowing
+        ms, hits = timed(index.search, query)
+        linear_ms, _ = timed(linear_search, store, query)
+        print(f"{query:>22} {len(hits):>8} {ms:>9.2f} {linear_ms:>10.1f}")
+
+    # Search-as-you-type: each keystroke narrows the previous result
+    print("typing 'vela flor 50' one key at a time:")
+    index._last = None
+    typed = "vela flor 50"
+    for n in range(SearchIndex.MIN_QUERY, len(typed) + 1):
+        ms, hits = timed(index.search, typed[:n])
+        print(f"{typed[:n]!r:>22} {len(hits):>8} {ms:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
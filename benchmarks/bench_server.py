@@ -0,0 +1,126 @@
+# Load test for the asyncio inventory server: many local clients on persistent
+# connections send a mix of pushes, stats requests and full reads at once.
+# A legacy raw-JSON push and a delta sync run alongside. Reports p50/p99 latency
+# per request type and overall throughput; that pushes are applied exactly once
+# and the other message kinds work is checked in tests/test_server.py.
+# Run from the repo root: python benchmarks/bench_server.py [--clients 120] [--requests 50] [--size 2000] [--processes 4] [--get-share 0.1]
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_server import InventoryClient, InventoryServer
+from inventory_store import InventoryStore
+from inventory_sync import SyncIndex, sync_initiator
+
+
+def make_products(n, prefix=""):
+    return [{"ID": f"{prefix}{i}", "Nombre": f"producto {i}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n)]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def client_worker(port, client_id, requests, get_share, latencies, errors, start_at):
+    rng = random.Random(client_id)
+    try:
+        with InventoryClient("127.0.0.1", port) as client:
+            time.sleep(max(0.0, start_at - time.time()))
+            for n in range(requests):
+                roll = rng.random()
+                start = time.perf_counter()
+                if roll < (1 - get_share) / 2:
+                    # 5 new products plus one ID that already exists on the server
+                    batch = make_products(5, prefix=f"c{client_id}-{n}-") + [{"ID": "0", "Nombre": "repetido", "Cantidad": 1, "Precio": 1.0}]
+                    client.push(batch)
+                    op = "push"
+                elif roll < 1 - get_share:
+                    client.stats()
+                    op = "stats"
+                else:
+                    client.get()
+                    op = "get"
+                latencies[op].append(time.perf_counter() - start)
+    except Exception as e:
+        errors.append(f"cliente {client_id}: {e!r}")
+
+
+def client_process(port, client_ids, requests, get_share, start_at, results):
+    # Clients run in separate processes so their JSON work doesn't share the server's GIL
+    latencies = {"push": [], "stats": [], "get": []}
+    errors = []
+    threads = [threading.Thread(target=client_worker, args=(port, i, requests, get_share, latencies, errors, start_at))
+               for i in client_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=120)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--get-share", type=float, default=0.1, help="share of full inventory reads; the rest is half pushes, half stats")
+    args = parser.parse_args()
+
+    store = InventoryStore(make_products(args.size))
+    changes = Counter()
+    server = InventoryServer(store, host="127.0.0.1", port=0, on_change=lambda: changes.update(["n"])).start()
+
+    results = multiprocessing.Queue()
+    start_at = time.time() + 2 + args.clients / 100  # Let every client connect first
+    processes = [multiprocessing.Process(target=client_process,
+                                         args=(server.port, range(p, args.clients, args.processes), args.requests, args.get_share, start_at, results))
+                 for p in range(args.processes)]
+    for process in processes:
+        process.start()
+    time.sleep(max(0.0, start_at - time.time()))
+    start = time.perf_counter()
+
+    # Meanwhile: an old-style push (raw JSON, then close) and a delta sync from another store
+    with socket.create_connection(("127.0.0.1", server.port)) as s:
+        s.sendall(json.dumps(make_products(10, prefix="legacy-")).encode("utf-8"))
+    peer = InventoryStore(make_products(args.size) + make_products(20, prefix="peer-"))
+    with socket.create_connection(("127.0.0.1", server.port)) as s:
+        sync_initiator(s, SyncIndex(peer))
+
+    latencies = {"push": [], "stats": [], "get": []}
+    errors = []
+    for _ in processes:
+        process_latencies, process_errors = results.get()
+        for op, values in process_latencies.items():
+            latencies[op].extend(values)
+        errors.extend(process_errors)
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    server.stop()
+
+    assert not errors, errors[:5]
+    total = sum(len(v) for v in latencies.values())
+
+    print(f"{args.clients} clientes x {args.requests} peticiones, inventario inicial {args.size}: "
+          f"{total} peticiones en {elapsed:.2f}s ({total / elapsed:,.0f} peticiones/s), "
+          f"{changes['n']} avisos de cambio a la interfaz")
+    for op, values in latencies.items():
+        if values:
+            print(f"  {op:5s} n={len(values):5d}  p50 {percentile(values, 0.5) * 1000:7.2f} ms  "
+                  f"p99 {percentile(values, 0.99) * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
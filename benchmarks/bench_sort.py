@@ -0,0 +1,136 @@
+# Sortable table columns. First checks on random stores (ties, mixed types,
+# missing fields) that SortedView gives exactly the order of a plain stable sort
+# for one and several columns, ascending and descending, also after adds,
+# deletes, imports and clears maintained through the store listener. Then times
+# what a heading click costs with the SortIndex vs. sorting every key again.
+# Run from the repo root: python benchmarks/bench_sort.py [--sizes 100000 1000000] [--sequences 100]
+import argparse
+import functools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore
+from sort_index import SortIndex, SortedView, sort_keys, sort_value
+
+FIELDS = ("ID", "Nombre", "Cantidad", "Precio")
+WINDOW = 20   # Rows the table shows
+
+
+def random_product(rng, i):
+    if rng.random() < 0.05:
+        return rng.choice([{"ID": "sin-precio", "Nombre": "Sin Precio", "Cantidad": 3},
+                           {"Nombre": "sin ID", "Cantidad": "7", "Precio": 1.5},
+                           {"ID": 5, "Nombre": None, "Cantidad": float("nan"), "Precio": 2},
+                           {"ID": "b", "Nombre": "bool", "Cantidad": True, "Precio": float("inf")}])
+    return {"ID": f"P{rng.randrange(50)}", "Nombre": rng.choice(["oso", "Oso", "conejo", "gato", "Ñandú"]),
+            "Cantidad": rng.randrange(-2, 8), "Precio": rng.choice([0.5, 1.0, 2.25, 9.99])}
+
+
+def expected_order(store, spec):
+    # Reference: one comparison function over all keys, ties broken by key (store order)
+    values = {key: [sort_value(store.value(key, field)) for field, _ in spec] for key in store.keys()}
+
+    def compare(a, b):
+        for (_, descending), x, y in zip(spec, values[a], values[b]):
+            if x != y:
+                return (1 if x > y else -1) * (-1 if descending else 1)
+        return -1 if a < b else 1
+    return sorted(values, key=functools.cmp_to_key(compare))
+
+
+def random_spec(rng):
+    fields = rng.sample(FIELDS, rng.randrange(1, 4))
+    return [(field, rng.random() < 0.5) for field in fields]
+
+
+def check_sequences(count, steps):
+    for seed in range(count):
+        rng = random.Random(seed)
+        store = InventoryStore(random_product(rng, i) for i in range(rng.randrange(200)))
+        indexes = {field: SortIndex(store, field) for field in FIELDS}
+        for step in range(steps):
+            op = rng.random()
+            keys = store.keys()
+            if op < 0.4:
+                store.add(random_product(rng, step))
+            elif op < 0.6 and keys:
+                store.remove_many(rng.sample(keys, min(len(keys), rng.randrange(1, 5))))
+            elif op < 0.7:
+                store.extend(random_product(rng, step * 1000 + i) for i in range(rng.randrange(300)))
+            elif op < 0.72:
+                store.clear()
+            spec = random_spec(rng)
+            expected = expected_order(store, spec)
+            view = SortedView(store, indexes, spec)
+            assert len(view) == len(expected), (seed, step)
+            assert view[:] == expected, (seed, step, spec)
+            if expected:
+                i = rng.randrange(len(expected))
+                assert view[i] == expected[i] and view[-1] == expected[-1]
+            subset = sorted(rng.sample(keys, len(keys) // 3))   # Search results come in store order
+            subset = [key for key in subset if store.has_key(key)]
+            assert sort_keys(store, subset, spec) == [key for key in expected if key in set(subset)]
+    print(f"{count} secuencias aleatorias x {steps} pasos: el orden coincide con una ordenación estable completa")
+
+
+def products(n, start=0):
+    for i in range(start, start + n):
+        yield {"ID": f"P{(i * 7919) % n:07d}", "Nombre": f"producto {(i * 104729) % n}",
+               "Cantidad": i % 50, "Precio": float(i % 997) + 0.99}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def click(store, indexes, spec, middle=False):
+    # What the table does after a heading click: a new view, its length and one window
+    view = SortedView(store, indexes, spec)
+    first = len(view) // 2 if middle else 0
+    return view[first:first + WINDOW]
+
+
+def bench(size):
+    store = InventoryStore(products(size))
+    print(f"{size} productos:")
+    indexes = {}
+    for field in FIELDS:
+        indexes[field], ms = timed(lambda: SortIndex(store, field))
+        _, full = timed(lambda: sort_keys(store, store.keys(), [(field, False)]))
+        print(f"  {field}: índice creado en el primer clic {ms:.0f} ms (ordenar todo de nuevo: {full:.0f} ms)")
+    cases = [("Nombre ascendente", [("Nombre", False)]), ("Nombre descendente", [("Nombre", True)]),
+             ("Precio ascendente", [("Precio", False)]), ("Cantidad descendente (50 valores)", [("Cantidad", True)]),
+             ("Cantidad ▲ + Precio ▼ (Mayús+clic)", [("Cantidad", False), ("Precio", True)])]
+    for name, spec in cases:
+        window, ms = timed(lambda: click(store, indexes, spec))
+        assert window == expected_window(store, spec, 0)
+        _, middle = timed(lambda: click(store, indexes, spec, middle=True))
+        print(f"  clic {name}: {ms:.2f} ms hasta la primera ventana, {middle:.2f} ms a mitad de la lista")
+    _, ms = timed(lambda: store.extend(products(1000, size)))
+    _, sync = timed(lambda: [click(store, indexes, [(field, False)]) for field in FIELDS])
+    print(f"  tras añadir 1000 productos ({ms:.0f} ms): los 4 índices se ponen al día en {sync:.0f} ms")
+
+
+def expected_window(store, spec, first):
+    return sort_keys(store, store.keys(), spec)[first:first + WINDOW]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--sequences", type=int, default=60)
+    parser.add_argument("--steps", type=int, default=40)
+    args = parser.parse_args()
+    check_sequences(args.sequences, args.steps)
+    for size in args.sizes:
+        bench(size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Startup cost of the app. Two checks, each in a fresh interpreter:
+#  - python -X importtime on everything inventory_app imports at module level: total
+#    import time must stay under --import-budget ms and pandas, numpy and asyncio
+#    must not be among them (they are imported on first use).
+#  - time from process start to a visible login window with a --products inventory,
+#    and when the background load finishes. Needs ttkbootstrap and a display (use
+#    xvfb-run on headless machines); skipped otherwise.
+# Run from the repo root: python benchmarks/bench_startup.py [--products 200000]
+import argparse
+import ast
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+DEFERRED = ["pandas", "numpy", "asyncio"]
+
+
+def top_level_imports(path):
+    # Modules imported at module level of inventory_app.py (not inside functions)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    names = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            names.append(node.module)
+    return names
+
+
+def check_imports(budget_ms):
+    modules = list(dict.fromkeys(top_level_imports(os.path.join(REPO, "inventory_app.py"))))
+    missing = [m for m in modules if importlib.util.find_spec(m.split(".")[0]) is None]
+    if missing:
+        print(f"No instalados, se omiten en la medición: {', '.join(missing)}")
+    modules = [m for m in modules if m not in missing]
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)],
+                            cwd=REPO, capture_output=True, text=True, check=True)
+    imported = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self [us] | cumulative | imported package"
+        _, cumulative_us, name = line[len("import time:"):].split("|")
+        imported[name.strip()] = int(cumulative_us)
+        if not name[1:].startswith(" "):  # Nested imports are indented and already counted
+            total_us += int(cumulative_us)
+    total_ms = total_us / 1000
+    slowest = sorted(((imported.get(m, 0), m) for m in set(modules)), reverse=True)[:5]
+    print(f"Imports de inventory_app: {len(imported)} módulos en {total_ms:.0f} ms "
+          f"(más lentos: {', '.join(f'{m} {us / 1000:.0f} ms' for us, m in slowest)})")
+    loaded = [m for m in DEFERRED if m in imported]
+    assert not loaded, f"se importan al arrancar: {', '.join(loaded)}"
+    assert total_ms < budget_ms, f"los imports tardan {total_ms:.0f} ms (límite {budget_ms} ms)"
+
+
+def child():
+    # Runs in the temporary directory holding the inventory
+    import ttkbootstrap as ttk
+    from inventory_app import InventoryApp
+    root = ttk.Window(themename="minty")
+    app = InventoryApp(root)
+    root.update()
+    login = time.time()
+    loaded_at_login = app.inventory_ready.is_set()
+    app.inventory_ready.wait()
+    loaded = time.time()
+    print(json.dumps({"login": login, "loaded": loaded, "loaded_at_login": loaded_at_login,
+                      "products": len(app.store), "deferred": [m for m in DEFERRED if m in sys.modules]}))
+    app.close_storage()
+    root.destroy()
+
+
+def check_login_window(n, budget_ms):
+    if importlib.util.find_spec("ttkbootstrap") is None:
+        print("ttkbootstrap no está instalado, se omite el tiempo hasta la ventana de login")
+        return
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+        print("Sin pantalla (DISPLAY), se omite el tiempo hasta la ventana de login")
+        return
+    from json_stream import write_products_file
+    directory = tempfile.mkdtemp()
+    try:
+        write_products_file(os.path.join(directory, "inventory_data.json"),
+                            ({"ID": str(i), "Nombre": f"producto número {i}", "Cantidad": i % 100,
+                              "Precio": float(i % 997)} for i in range(n)))
+        env = dict(os.environ, PYTHONPATH=REPO)
+        start = time.time()
+        result = subprocess.run([sys.executable, os.path.abspath(__file__), "--child"], cwd=directory, env=env,
+                                capture_output=True, text=True, check=True)
+        report = json.loads(result.stdout.strip().splitlines()[-1])
+    finally:
+        shutil.rmtree(directory)
+    login_ms = (report["login"] - start) * 1000
+    loaded_ms = (report["loaded"] - start) * 1000
+    print(f"{n} productos: login visible a los {login_ms:.0f} ms, inventario cargado a los {loaded_ms:.0f} ms "
+          f"({'antes' if report['loaded_at_login'] else 'después'} de mostrar el login)")
+    assert report["products"] == n
+    assert not report["deferred"], f"importados al arrancar: {report['deferred']}"
+    assert login_ms < budget_ms, f"el login tarda {login_ms:.0f} ms (límite {budget_ms} ms)"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--import-budget", type=float, default=250, help="ms for the module-level imports")
+    parser.add_argument("--login-budget", type=float, default=1500, help="ms from process start to the login window")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+    check_imports(args.import_budget)
+    check_login_window(args.products, args.login_budget)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# Compares the storage backends (INVENTORY_STORAGE=json, journal, sqlite): time to
+# load N products, to import a batch in 5000-product chunks, to add and save one
+# product, and to search (SQLite FTS5 vs the in-memory SearchIndex, which also has
+# to be built after every load). First checks that SQLite round-trips odd
+# products exactly, migrates a JSON snapshot plus journal, and returns the same
+# search results as SearchIndex.
+# Run from the repo root: python benchmarks/bench_storage.py [--products 200000]
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_journal import InventoryJournal
+from inventory_storage import SqliteStorage, open_storage
+from inventory_store import InventoryStore
+from json_stream import write_products_file
+from search_index import SearchIndex
+
+WORDS = ["jabón", "champú", "lápiz", "cuaderno", "taza", "peluche", "gatito", "conejo", "estrella", "galleta",
+         "mochila", "pegatina", "calcetín", "bufanda", "ñandú", "oso", "corazón", "nube", "arcoíris", "dulce"]
+QUERIES = ["jabon", "GATITO", "ñandú", "oso", "123", "taza 1", "nube 99", "xyz", "co", "7", "", "\"", "lápiz 4"]
+
+
+def products(n, start=0):
+    rng = random.Random(start)
+    for i in range(start, start + n):
+        yield {"ID": f"P{i:07d}", "Nombre": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i % 1000}",
+               "Cantidad": rng.randint(0, 500), "Precio": round(rng.uniform(0.5, 99.9), 2)}
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def check_round_trip(directory):
+    odd = [
+        {"ID": "A1", "Nombre": "Normal", "Cantidad": 3, "Precio": 1.5},
+        {"Nombre": "Sin ID", "Cantidad": 1, "Precio": 2.0},
+        {"ID": None, "Nombre": None, "Cantidad": None, "Precio": None},
+        {"ID": 42, "Nombre": "ID numérico", "Cantidad": "7", "Precio": 3},
+        {"ID": "big", "Nombre": "enorme", "Cantidad": 2 ** 70, "Precio": True},
+        {"ID": "x", "Nombre": ["lista"], "Cantidad": {"a": 1}, "Precio": 0.1, "Color": "rosa", "Tags": [1, 2]},
+        {"ID": "A1", "Nombre": "ID repetido", "Cantidad": 0, "Precio": 0.0},
+    ]
+    path = os.path.join(directory, "roundtrip.db")
+    storage = SqliteStorage(path)
+    store = InventoryStore()
+    storage.load_into(store)
+    storage.attach(store)
+    store.extend(odd)
+    store.remove(store.keys()[1])
+    storage.commit()
+    store.add({"ID": "late", "Nombre": "después", "Cantidad": 1, "Precio": 1.0})
+    storage.close()  # close() commits the pending add
+    expected = [p for i, p in enumerate(odd) if i != 1] + [{"ID": "late", "Nombre": "después", "Cantidad": 1, "Precio": 1.0}]
+
+    reloaded = InventoryStore()
+    storage = SqliteStorage(path)
+    storage.load_into(reloaded)
+    assert reloaded.to_list() == expected, reloaded.to_list()
+    # Keys are rowids, so new products keep going after the reloaded ones
+    assert reloaded.add({"ID": "new"}) > max(reloaded.keys()[:-1])
+    storage.close()
+    print("SQLite: productos con campos raros, sin ID o repetidos se recuperan igual: OK")
+
+
+def check_migration(directory, n):
+    json_path = os.path.join(directory, "migrar.json")
+    write_products_file(json_path, products(n))
+    journal = InventoryJournal(json_path, fsync=False)
+    store = InventoryStore()
+    journal.load_into(store)
+    journal.attach(store)
+    store.remove_many(store.keys()[:10])
+    store.extend(products(5, start=n))
+    journal.commit()  # Changes only in the journal, not in the snapshot
+    expected = store.to_list()
+
+    storage = open_storage("sqlite", json_path)
+    migrated = InventoryStore()
+    storage.load_into(migrated)
+    assert migrated.to_list() == expected
+    storage.close()
+    # Second open reads the database, not the JSON again
+    storage = open_storage("sqlite", json_path)
+    os.remove(json_path)
+    again = InventoryStore()
+    storage.load_into(again)
+    assert again.to_list() == expected
+    storage.close()
+    print(f"Migración de JSON + journal ({n} productos): OK")
+
+
+def check_search(directory, n):
+    storage = SqliteStorage(os.path.join(directory, "buscar.db"))
+    store = InventoryStore()
+    storage.load_into(store)
+    storage.attach(store)
+    index = SearchIndex(store)
+    store.extend(products(n))
+    store.remove_many(store.keys()[::7])
+    store.add({"ID": "ÑU-1", "Nombre": "Ñandú Rosa \"especial\"", "Cantidad": 1, "Precio": 1.0})
+    for query in QUERIES + ["ñu-1", "rosa \"esp"]:
+        assert storage.search(query) == index.search(query), query
+    storage.close()
+    print("Búsqueda FTS5 = SearchIndex en todas las consultas: OK")
+
+
+def bench(directory, n, chunk=5000, batch=100_000):
+    source = os.path.join(directory, "fuente.json")
+    write_products_file(source, products(n))
+    print(f"\n{n} productos; importación de {batch} en bloques de {chunk}")
+    print(f"{'modo':8} {'carga':>8} {'+índice':>8} {'importar':>9} {'1 alta':>9} {'búsqueda':>10}  tamaño")
+    for mode in ("json", "journal", "sqlite"):
+        path = os.path.join(directory, mode, "inventory_data.json")
+        os.makedirs(os.path.dirname(path))
+        shutil.copy(source, path)
+        if mode == "sqlite":
+            storage = open_storage(mode, path)
+            storage.load_into(InventoryStore())  # Migration, not timed
+            storage.close()
+
+        storage = open_storage(mode, path)
+        store = InventoryStore()
+        load, _ = timed(lambda: storage.load_into(store))
+        storage.attach(store)
+        if mode == "sqlite":
+            index_build, searcher = 0.0, storage
+        else:
+            index_build, searcher = timed(lambda: SearchIndex(store))
+
+        def import_batch():
+            for start in range(0, batch, chunk):
+                with store.lock:
+                    for product in products(chunk, start=n + start):
+                        store.add_if_new(product)
+                if mode != "json":
+                    storage.commit()
+            storage.commit()
+        insert, _ = timed(import_batch)
+
+        def add_one():
+            store.add({"ID": "uno", "Nombre": "uno", "Cantidad": 1, "Precio": 1.0})
+            storage.commit()
+        single, _ = timed(add_one)
+
+        search, _ = timed(lambda: [searcher.search(q) for q in QUERIES])
+        if mode == "journal":
+            storage._stop.set()  # No compaction on close, so the size is the journal's
+        storage.commit()
+        size = sum(os.path.getsize(os.path.join(os.path.dirname(path), f)) for f in os.listdir(os.path.dirname(path)))
+        if mode == "sqlite":
+            storage.close()
+        print(f"{mode:8} {load:7.2f}s {index_build:7.2f}s {insert:8.2f}s {single * 1000:7.1f}ms "
+              f"{search / len(QUERIES) * 1000:8.1f}ms  {size / 2 ** 20:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=200_000)
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    try:
+        check_round_trip(directory)
+        check_migration(directory, 10_000)
+        check_search(directory, 20_000)
+        bench(directory, args.products)
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Duplicate-check benchmark: InventoryStore ID index vs. the old linear any() scan.
+# Run from the repo root: python benchmarks/bench_store.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+LOOKUPS = 10_000
+
+
+def make_products(n):
+    return [{"ID": str(i), "Nombre": f"producto {i % 5000}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n)]
+
+
+def bench_index(store, n):
+    probes = [str((i * 7919) % (2 * n)) for i in range(LOOKUPS)]  # ~half hits, half misses
+    start = time.perf_counter()
+    for pid in probes:
+        store.has_id(pid)
+    return (time.perf_counter() - start) / LOOKUPS
+
+
+def bench_linear(products, n, lookups=20):
+    probes = [str(n + i) for i in range(lookups)]  # misses: worst case for any()
+    start = time.perf_counter()
+    for pid in probes:
+        any(p.get("ID") == pid for p in products)
+    return (time.perf_counter() - start) / lookups
+
+
+def main():
+    print(f"{'products':>10} {'build s':>9} {'index us/check':>15} {'linear us/check':>16}")
+    for n in SIZES:
+        products = make_products(n)
+        start = time.perf_counter()
+        store = InventoryStore(products)
+        build = time.perf_counter() - start
+        per_index = bench_index(store, n)
+        per_linear = bench_linear(products, n, lookups=3 if n >= 1_000_000 else 20)
+        print(f"{n:>10} {build:>9.3f} {per_index * 1e6:>15.3f} {per_linear * 1e6:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
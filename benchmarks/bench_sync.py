@@ -0,0 +1,122 @@
+# Two-peer loopback sync: peer B is a copy of peer A with a fraction of the
+# products changed, added or removed (plus duplicated IDs like old files have).
+# Reports bytes on the wire next to a full "Enviar por Red" push, the time taken
+# and what a second sync sends; bytes per changed product must stay within a small
+# band across change sizes. Convergence is checked in tests/test_sync.py.
+# Run from the repo root: python benchmarks/bench_sync.py [--size 1000000] [--changes 0.001,0.01,0.1]
+import argparse
+import os
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore
+from inventory_sync import SyncIndex, product_digest, sync_initiator, sync_responder
+from wire_protocol import recv_message, send_products
+
+
+WORDS = ["tornillo", "tuerca", "cable", "martillo", "llave", "cinta", "pintura", "brocha", "clavo", "sierra",
+         "taladro", "foco", "enchufe", "manguera", "pegamento", "lija", "broca", "candado", "bisagra", "escalera"]
+
+
+def make_products(n, seed=0):
+    # Varied names and prices so the full push compresses like a real inventory would
+    rng = random.Random(seed)
+    return [{"ID": str(rng.randrange(10 ** 9)) + f"-{i}",
+             "Nombre": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(1000)}",
+             "Cantidad": rng.randrange(500), "Precio": round(rng.uniform(0.5, 900), 2)} for i in range(n)]
+
+
+def diverge(products, fraction, seed=1):
+    # Returns peer B's product list: a share edited, added on each side, removed, duplicated
+    rng = random.Random(seed)
+    n = len(products)
+    count = max(1, int(n * fraction))
+    b = [dict(p) for p in products]
+    for i in rng.sample(range(n), count):
+        b[i]["Cantidad"] += 1
+    b.extend({"ID": f"b{i}", "Nombre": "nuevo B", "Cantidad": 1, "Precio": 1.0} for i in range(count // 4))
+    a_extra = [{"ID": f"a{i}", "Nombre": "nuevo A", "Cantidad": 2, "Precio": 2.0} for i in range(count // 4)]
+    b.extend(dict(b[i]) for i in rng.sample(range(n), max(1, count // 10)))  # repeated IDs
+    return products + a_extra, b
+
+
+def loopback_sync(index_a, index_b):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    result = {}
+
+    def responder():
+        conn, _ = server.accept()
+        with conn:
+            _, hello = recv_message(conn)
+            result["b"] = sync_responder(conn, index_b, hello)
+
+    thread = threading.Thread(target=responder)
+    thread.start()
+    with socket.create_connection(server.getsockname()) as client:
+        result["a"] = sync_initiator(client, index_a)
+    thread.join()
+    server.close()
+    return result["a"], result["b"]
+
+
+def full_push_bytes(products):
+    a, b = socket.socketpair()
+    total = {}
+    drain = threading.Thread(target=lambda: total.setdefault("n", recv_message(b)))
+    drain.start()
+    sent = send_products(a, products)
+    drain.join()
+    a.close()
+    b.close()
+    return sent
+
+
+def content(store):
+    return Counter(product_digest(p) for p in store)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--changes", default="0.001,0.01,0.1")
+    args = parser.parse_args()
+
+    base = make_products(args.size)
+    push = full_push_bytes(base)
+    print(f"{args.size} productos, envío completo: {push / 1e6:.2f} MB")
+    per_change = []
+    for fraction in [float(x) for x in args.changes.split(",")]:
+        products_a, products_b = diverge(base, fraction)
+        store_a, store_b = InventoryStore(products_a), InventoryStore(products_b)
+        index_a, index_b = SyncIndex(store_a), SyncIndex(store_b)
+        start = time.perf_counter()
+        index_a.items(), index_b.items()
+        hashing = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats_a, stats_b = loopback_sync(index_a, index_b)
+        elapsed = time.perf_counter() - start
+        wire = stats_a["sent"] + stats_b["sent"]
+
+        again_a, again_b = loopback_sync(index_a, index_b)
+
+        changes = stats_a["changed"]
+        per_change.append(wire / changes)
+        print(f"cambio {fraction:6.1%}: {changes:7d} IDs distintos, {wire / 1e6:8.3f} MB "
+              f"({wire / push:6.2%} del envío completo, {wire / changes:5.0f} B/cambio), "
+              f"hash inicial {hashing:.1f}s, sync {elapsed:.2f}s, resincronizar {again_a['sent'] + again_b['sent']} B")
+
+    # Bytes per changed product stay within a small band across change sizes
+    assert max(per_change) < 4 * min(per_change), per_change
+
+
+if __name__ == "__main__":
+    main()
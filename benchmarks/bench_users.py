@@ -0,0 +1,154 @@
+# User accounts (user_store.UserStore): checks first that an old users.json (both
+# formats) is migrated into users.db once, that old sha256 hashes still log in and
+# are replaced by scrypt ones, that wrong passwords are refused with or without a
+# cached check, and that changing or deleting an account forgets the cached one.
+# Then, with --users accounts: the migration, opening the store again, login latency
+# (old hash, scrypt, repeat from the cache, wrong password, unknown user) and
+# registrations per second, the scrypt hash apart from the write, against rewriting
+# the whole users.json per registration as before.
+# Run from the repo root: python benchmarks/bench_users.py [--users 100000] [--logins 20] [--registrations 50]
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from user_store import UserError, UserStore, hash_password, is_legacy_hash
+
+
+def legacy_hash(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def write_legacy_users(path, count):
+    # users.json as older versions wrote it; the hashes are sha256 so writing 100k is quick
+    users = {"admin": {"password": legacy_hash("admin"), "profile_image": ""}}
+    for i in range(count):
+        users[f"usuario{i}"] = {"password": legacy_hash(f"clave{i}"), "profile_image": f"fotos/{i}.png"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=4)
+    return users
+
+
+def check(tmp):
+    path = os.path.join(tmp, "users.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"viejo": legacy_hash("uno"), "ana": {"password": legacy_hash("dos"), "profile_image": "ana.png"},
+                   "roto": 5}, f)
+    store = UserStore(path)
+    assert len(store) == 3 and "roto" not in store and "admin" in store, len(store)
+    assert store.get("ana")["profile_image"] == "ana.png"
+    assert store.authenticate("viejo", "mal") is None
+    assert store.authenticate("viejo", "uno") is not None
+    upgraded = store.get("viejo")["password"]
+    assert not is_legacy_hash(upgraded)
+    assert store.authenticate("viejo", "uno") is not None and store.get("viejo")["password"] == upgraded
+    assert store.authenticate("viejo", "mal") is None, "el caché aceptó una contraseña incorrecta"
+    assert store.authenticate("nadie", "uno") is None
+
+    store.register("nuevo", "tres")
+    try:
+        store.register("nuevo", "otra")
+        raise AssertionError("registro repetido")
+    except UserError:
+        pass
+    assert store.authenticate("nuevo", "tres") is not None
+    store.change_password("nuevo", "tres", "cuatro")
+    assert store.authenticate("nuevo", "tres") is None, "el caché aceptó la contraseña anterior"
+    assert store.authenticate("nuevo", "cuatro") is not None
+    store.delete("nuevo")
+    assert store.authenticate("nuevo", "cuatro") is None
+    store.close()
+
+    # The JSON file isn't read again once migrated, and changes are kept
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"intruso": legacy_hash("x")}, f)
+    store = UserStore(path)
+    assert "intruso" not in store and "nuevo" not in store
+    assert store.authenticate("viejo", "uno") is not None and store.authenticate("admin", "admin") is not None
+    store.close()
+    print("OK: migración, hashes antiguos actualizados, caché invalidado al cambiar o borrar")
+
+
+def time_logins(store, logins, username, password, forget=True):
+    # Milliseconds per authenticate(); forget empties the cache first
+    total = 0.0
+    for _ in range(logins):
+        if forget:
+            store.cache.forget(username)
+        start = time.perf_counter()
+        store.authenticate(username, password)
+        total += time.perf_counter() - start
+    return total * 1000 / logins
+
+
+def bench(tmp, count, logins, registrations):
+    path = os.path.join(tmp, "users.json")
+    users = write_legacy_users(path, count)
+    json_mb = os.path.getsize(path) / 2 ** 20
+    start = time.perf_counter()
+    store = UserStore(path)
+    migrate_seconds = time.perf_counter() - start
+    store.close()
+    start = time.perf_counter()
+    store = UserStore(path)
+    open_ms = (time.perf_counter() - start) * 1000
+    assert len(store) == count + 1
+    print(f"{count} usuarios: migrar users.json ({json_mb:.1f} MB) {migrate_seconds:.2f} s, "
+          f"abrir users.db {open_ms:.1f} ms")
+
+    # The first login of each old account checks sha256 and stores a new scrypt hash
+    start = time.perf_counter()
+    for i in range(logins):
+        assert store.authenticate(f"usuario{i}", f"clave{i}") is not None
+    upgrade_ms = (time.perf_counter() - start) * 1000 / logins
+    name = f"usuario{count // 2}"
+    store.authenticate(name, f"clave{count // 2}")
+    rows = [
+        ("primer login (hash antiguo)", upgrade_ms),
+        ("login scrypt", time_logins(store, logins, name, f"clave{count // 2}")),
+        ("login repetido (caché)", time_logins(store, logins * 100, name, f"clave{count // 2}", forget=False)),
+        ("contraseña incorrecta", time_logins(store, logins, name, "mal", forget=False)),
+        ("usuario inexistente", time_logins(store, logins, "nadie", "mal")),
+    ]
+    for label, ms in rows:
+        print(f"  {label:<28} {ms:>9.3f} ms")
+
+    start = time.perf_counter()
+    for _ in range(registrations):
+        hash_password("clave")
+    hash_ms = (time.perf_counter() - start) * 1000 / registrations
+    start = time.perf_counter()
+    for i in range(registrations):
+        store.register(f"alta{i}", "clave")
+    register_ms = (time.perf_counter() - start) * 1000 / registrations
+    store.close()
+
+    # Before: every registration rewrote the whole users.json
+    start = time.perf_counter()
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=4)
+    rewrite_ms = (time.perf_counter() - start) * 1000
+    print(f"  registro                     {register_ms:>9.1f} ms ({1000 / register_ms:.1f}/s): scrypt {hash_ms:.1f} ms, "
+          f"escritura {register_ms - hash_ms:.2f} ms; antes reescribir users.json {rewrite_ms:.0f} ms + sha256")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--registrations", type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        check_dir = os.path.join(tmp, "check")
+        os.mkdir(check_dir)
+        check(check_dir)
+        bench(tmp, args.users, args.logins, args.registrations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# Time-to-first-paint and scroll latency of the virtual inventory table.
+# Needs a display (use xvfb-run on headless machines).
+# Run from the repo root: python benchmarks/bench_virtual_tree.py
+import os
+import random
+import sys
+import time
+import tkinter as tk
+from tkinter import ttk
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_store import InventoryStore
+from virtual_tree import VirtualTreeview
+
+SIZES = [10_000, 100_000, 1_000_000]
+SCROLLS = 200
+COLUMNS = ("ID", "Nombre", "Cantidad", "Precio")
+
+
+def make_store(n):
+    return InventoryStore({"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n))
+
+
+def row_values(store):
+    def values(key):
+        p = store.get(key)
+        return (p["ID"], p["Nombre"], p["Cantidad"], p["Precio"])
+    return values
+
+
+def make_tree(root):
+    frame = ttk.Frame(root)
+    frame.pack(fill=tk.BOTH, expand=True)
+    tree = ttk.Treeview(frame, columns=COLUMNS, show="headings", height=25)
+    tree.grid(row=0, column=0, sticky="nsew")
+    scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL)
+    scrollbar.grid(row=0, column=1, sticky="ns")
+    return frame, tree, scrollbar
+
+
+def bench_virtual(root, store):
+    frame, tree, scrollbar = make_tree(root)
+    table = VirtualTreeview(tree, scrollbar, row_values(store))
+    start = time.perf_counter()
+    table.set_rows(store.keys())
+    root.update()
+    first_paint = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(SCROLLS):
+        start = time.perf_counter()
+        table.yview("moveto", str(random.random()))
+        root.update_idletasks()
+        latencies.append(time.perf_counter() - start)
+    frame.destroy()
+    latencies.sort()
+    return first_paint, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+
+
+def bench_full_insert(root, store):
+    # The old populate_treeview: one Tk item per product
+    frame, tree, scrollbar = make_tree(root)
+    values = row_values(store)
+    start = time.perf_counter()
+    for key in store.keys():
+        tree.insert("", "end", values=values(key))
+    root.update()
+    first_paint = time.perf_counter() - start
+    frame.destroy()
+    return first_paint
+
+
+def main():
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"No display available ({e}); skipping.")
+        return
+    print(f"{'products':>10} {'virtual paint s':>16} {'scroll p50 ms':>14} {'scroll p99 ms':>14} {'full insert s':>14}")
+    for n in SIZES:
+        store = make_store(n)
+        paint, p50, p99 = bench_virtual(root, store)
+        full = f"{bench_full_insert(root, store):14.2f}" if n <= 100_000 else f"{'skipped':>14}"
+        print(f"{n:>10} {paint:>16.4f} {p50 * 1e3:>14.3f} {p99 * 1e3:>14.3f} {full}")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
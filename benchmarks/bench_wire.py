@@ -0,0 +1,85 @@
+# Loopback transfer of an inventory: framed protocol (none/zlib/lzma) vs. the old
+# "json.dumps + sendall / data += recv(4096) until close" exchange.
+# Reports MB/s of JSON moved and CPU seconds (both ends) per MB.
+# Run from the repo root: python benchmarks/bench_wire.py [--sizes 10000,100000,1000000]
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wire_protocol import CODEC_NAMES, recv_products, send_products
+
+LEGACY_LIMIT = 100_000  # data += chunk is quadratic; larger sizes take far too long
+
+
+def make_products(n):
+    return [{"ID": str(i), "Nombre": f"producto {i % 5000}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n)]
+
+
+def legacy_send(sock, products):
+    data = json.dumps(products).encode("utf-8")
+    sock.sendall(data)
+    return len(data)
+
+
+def legacy_recv(conn):
+    data = b""
+    while True:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data.decode("utf-8"))
+
+
+def transfer(products, send, recv):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    port = server.getsockname()[1]
+    result = {}
+
+    def receiver():
+        conn, _ = server.accept()
+        with conn:
+            result["products"] = recv(conn)
+
+    thread = threading.Thread(target=receiver)
+    thread.start()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    with socket.create_connection(("127.0.0.1", port)) as client:
+        wire_bytes = send(client, products)
+    thread.join()
+    wall = time.perf_counter() - wall
+    cpu = time.process_time() - cpu
+    server.close()
+    assert len(result["products"]) == len(products)
+    return wall, cpu, wire_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    print(f"{'products':>10} {'method':>8} {'JSON MB':>8} {'wire MB':>8} {'MB/s':>8} {'CPU s/MB':>9}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        products = make_products(n)
+        json_mb = len(json.dumps(products).encode("utf-8")) / 1e6
+        methods = [("legacy", legacy_send, legacy_recv)] if n <= LEGACY_LIMIT else []
+        for name, codec in CODEC_NAMES.items():
+            methods.append((name, lambda s, p, c=codec: send_products(s, p, c), recv_products))
+        for name, send, recv in methods:
+            wall, cpu, wire_bytes = transfer(products, send, recv)
+            print(f"{n:>10} {name:>8} {json_mb:>8.1f} {wire_bytes / 1e6:>8.1f} {json_mb / wall:>8.1f} {cpu / json_mb:>9.3f}")
+        if n > LEGACY_LIMIT:
+            print(f"{n:>10} {'legacy':>8} skipped (quadratic receive)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# Headless benchmark suite: runs the app's inventory logic (the same modules
+# InventoryApp uses, no Tk) on synthetic catalogues and writes the timings as
+# JSON. Covers loading and saving with every storage mode, adding, searching and
+# deleting with the app's listeners attached, JSON/Excel import and export
+# through the background jobs, and pushing/reading over a loopback
+# InventoryServer. With --baseline the results are compared against a stored
+# run and the script exits with 1 if any scenario got slower than the tolerance.
+# Run from the repo root: python benchmarks/run_suite.py [--sizes 1000 100000] [--only load search]
+#     [--output benchmark_results.json] [--baseline benchmarks/baseline.json] [--save-baseline]
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_analytics import InventoryAnalytics
+from inventory_io import excel_export_job, excel_import_job, json_export_job, json_import_job, write_excel_products
+from inventory_server import InventoryClient, InventoryServer
+from inventory_storage import STORAGE_MODES, open_storage
+from inventory_store import InventoryStore
+from jobs import JobRunner
+from json_stream import write_products_file
+from search_index import SearchIndex
+from synthetic import generate_products
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+EXCEL_MAX = 100_000   # openpyxl needs minutes beyond this; bigger sizes skip the Excel scenarios
+CHANGES = 1000        # Products added, searched or deleted per scenario
+
+
+class Context:
+    """One size: a work directory and the synthetic catalogue written there once."""
+
+    def __init__(self, size, workdir):
+        self.size = size
+        self.workdir = workdir
+        self.catalogue = os.path.join(workdir, "catalogo.jsonl")
+        write_products_file(self.catalogue, generate_products(size))
+
+    def path(self, name):
+        return os.path.join(self.workdir, name)
+
+    def store(self, app_listeners=False):
+        # The catalogue in a store; app_listeners attaches what InventoryApp keeps up to date
+        store = InventoryStore()
+        open_storage("json", self.catalogue).load_into(store)
+        if app_listeners:
+            SearchIndex(store)
+            InventoryAnalytics(store)
+        return store
+
+    def fresh_dir(self, name):
+        path = self.path(name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+
+def new_products(count, start):
+    return [{"ID": f"N{i}", "Nombre": f"producto nuevo {i}", "Cantidad": i % 20, "Precio": 4.99}
+            for i in range(start, start + count)]
+
+
+def run_job(work, on_chunk=None):
+    runner = JobRunner()
+    job = runner.start("bench", work, on_chunk=on_chunk)
+    runner.wait(job)
+    if job.status != "done":
+        raise RuntimeError(f"El trabajo terminó con estado {job.status}: {job.error}")
+    return job.result
+
+
+# --- Scenarios: each returns (seconds, rows) for the timed part only ---
+def load(ctx, mode):
+    # A saved inventory with some changes on top (journal records, SQLite rows), then a fresh load
+    folder = ctx.fresh_dir(f"load_{mode}")
+    inventory_file = os.path.join(folder, "inventory_data.json")
+    shutil.copy(ctx.catalogue, os.path.join(folder, "inventory_data.jsonl"))
+    store = InventoryStore()
+    open_storage("json", os.path.join(folder, "inventory_data.jsonl")).load_into(store)
+    write_products_file(inventory_file, store.to_list())
+    storage = open_storage(mode, inventory_file)
+    storage.load_into(InventoryStore())
+    storage.attach(store)
+    store.extend(new_products(CHANGES, 0))
+    storage.commit()
+    storage.close(store)
+
+    start = time.perf_counter()
+    loaded = InventoryStore()
+    storage = open_storage(mode, inventory_file)
+    storage.load_into(loaded)
+    seconds = time.perf_counter() - start
+    storage.close()
+    assert len(loaded) == ctx.size + CHANGES
+    return seconds, len(loaded)
+
+
+def save(ctx, mode):
+    # CHANGES adds, then one save as the app does after an edit or an import chunk
+    folder = ctx.fresh_dir(f"save_{mode}")
+    inventory_file = os.path.join(folder, "inventory_data.json")
+    shutil.copy(ctx.catalogue, os.path.join(folder, "inventory_data.jsonl"))
+    store = InventoryStore()
+    open_storage("json", os.path.join(folder, "inventory_data.jsonl")).load_into(store)
+    write_products_file(inventory_file, store.to_list())
+    store = InventoryStore()
+    storage = open_storage(mode, inventory_file)
+    storage.load_into(store)
+    storage.attach(store)
+    store.extend(new_products(CHANGES, 0))
+    start = time.perf_counter()
+    storage.commit()
+    seconds = time.perf_counter() - start
+    storage.close(store)
+    return seconds, len(store) if mode == "json" else CHANGES
+
+
+def add(ctx):
+    store = ctx.store(app_listeners=True)
+    products = new_products(CHANGES, 0)
+    start = time.perf_counter()
+    for product in products:
+        store.add_if_new(product)
+    return time.perf_counter() - start, CHANGES
+
+
+def search_index_build(ctx):
+    store = ctx.store()
+    start = time.perf_counter()
+    SearchIndex(store)
+    return time.perf_counter() - start, ctx.size
+
+
+def search(ctx):
+    # A mix of what people type: whole IDs, words of popular and rare names, fragments
+    store = ctx.store()
+    index = SearchIndex(store)
+    rng = random.Random(1)
+    keys = store.keys()
+    queries = []
+    for _ in range(CHANGES // 10):
+        product = store.get(rng.choice(keys))
+        words = product["Nombre"].split()
+        queries += [product["ID"], rng.choice(words), " ".join(words[:2]), product["ID"][-3:], "zzz-no-existe"]
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    return time.perf_counter() - start, len(queries)
+
+
+def delete(ctx):
+    store = ctx.store(app_listeners=True)
+    keys = random.Random(2).sample(store.keys(), min(CHANGES, len(store)))
+    start = time.perf_counter()
+    store.remove_many(keys)
+    return time.perf_counter() - start, len(keys)
+
+
+def json_export(ctx):
+    store = ctx.store()
+    path = ctx.path("export.json")
+    start = time.perf_counter()
+    run_job(json_export_job(path, store.to_list()))
+    return time.perf_counter() - start, len(store)
+
+
+def supplier_products(ctx):
+    # Another file of the same size; its first half repeats IDs already in the catalogue
+    return generate_products(ctx.size, seed=1, first_id=ctx.size // 2)
+
+
+def json_import(ctx):
+    path = ctx.path("import.json")
+    write_products_file(path, supplier_products(ctx))
+    store = ctx.store(app_listeners=True)
+
+    def commit(job, products):
+        with store.lock:
+            for product in products:
+                store.add_if_new(product)
+    start = time.perf_counter()
+    result = run_job(json_import_job(path), on_chunk=commit)
+    return time.perf_counter() - start, result["rows"]
+
+
+def excel_export(ctx):
+    store = ctx.store()
+    start = time.perf_counter()
+    run_job(excel_export_job(ctx.path("export.xlsx"), store))
+    return time.perf_counter() - start, len(store)
+
+
+def excel_import(ctx):
+    path = ctx.path("import.xlsx")
+    write_excel_products(path, supplier_products(ctx))
+    store = ctx.store(app_listeners=True)
+
+    def commit(job, products):
+        with store.lock:
+            for product in products:
+                store.add_if_new(product)
+    start = time.perf_counter()
+    result = run_job(excel_import_job(path, set(store.ids())), on_chunk=commit)
+    return time.perf_counter() - start, result["rows"]
+
+
+def network_push(ctx):
+    # Another instance's products pushed in 5000-product messages to a loopback server
+    server = InventoryServer(ctx.store(app_listeners=True), host="127.0.0.1", port=0).start()
+    products = list(supplier_products(ctx))
+    try:
+        with InventoryClient("127.0.0.1", server.port) as client:
+            start = time.perf_counter()
+            for i in range(0, len(products), 5000):
+                client.push(products[i:i + 5000])
+            seconds = time.perf_counter() - start
+    finally:
+        server.stop()
+    return seconds, len(products)
+
+
+def network_get(ctx):
+    server = InventoryServer(ctx.store(), host="127.0.0.1", port=0).start()
+    try:
+        with InventoryClient("127.0.0.1", server.port) as client:
+            start = time.perf_counter()
+            products = client.get()
+            seconds = time.perf_counter() - start
+    finally:
+        server.stop()
+    assert len(products) == ctx.size
+    return seconds, len(products)
+
+
+SCENARIOS = {f"load_{mode}": (lambda mode: lambda ctx: load(ctx, mode))(mode) for mode in STORAGE_MODES}
+SCENARIOS.update({f"save_{mode}": (lambda mode: lambda ctx: save(ctx, mode))(mode) for mode in STORAGE_MODES})
+SCENARIOS.update({
+    "add": add,
+    "search_index_build": search_index_build,
+    "search": search,
+    "delete": delete,
+    "json_export": json_export,
+    "json_import": json_import,
+    "excel_export": excel_export,
+    "excel_import": excel_import,
+    "network_push": network_push,
+    "network_get": network_get,
+})
+
+
+# --- Results ---
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": commit, "python": platform.python_version(),
+            "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def run(sizes, names, repeat):
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.perf_counter()
+            ctx = Context(size, workdir)
+            print(f"--- {size} productos (catálogo generado en {time.perf_counter() - start:.1f}s) ---")
+            for name in names:
+                if name.startswith("excel") and size > EXCEL_MAX:
+                    print(f"  {name:<20} omitido (más de {EXCEL_MAX} filas)")
+                    continue
+                runs = [SCENARIOS[name](ctx) for _ in range(repeat)]
+                seconds, rows = min(runs)
+                results[f"{name}@{size}"] = {"seconds": seconds, "rows": rows,
+                                             "rows_per_second": rows / seconds if seconds > 0 else None}
+                print(f"  {name:<20} {seconds * 1000:10.1f} ms  {rows / seconds if seconds else 0:14,.0f} filas/s")
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta):
+    # Scenarios slower than baseline * (1 + tolerance) and by more than min_delta seconds
+    regressions = []
+    print(f"--- Comparación con la referencia ({baseline['meta'].get('commit') or 'sin commit'}, "
+          f"{baseline['meta'].get('date', '?')}) ---")
+    for key, result in results.items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            print(f"  {key:<28} sin referencia")
+            continue
+        ratio = result["seconds"] / reference["seconds"] if reference["seconds"] else float("inf")
+        slower = ratio > 1 + tolerance and result["seconds"] - reference["seconds"] > min_delta
+        mark = "  ← REGRESIÓN" if slower else ""
+        print(f"  {key:<28} {reference['seconds'] * 1000:10.1f} ms → {result['seconds'] * 1000:10.1f} ms "
+              f"({ratio:.2f}x){mark}")
+        if slower:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000])
+    parser.add_argument("--only", nargs="+", help="scenarios (or prefixes such as load, excel)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.005, help="seconds; smaller changes are noise")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS)
+    if args.only:
+        names = [name for name in names if any(name == o or name.startswith(o + "_") for o in args.only)]
+        if not names:
+            parser.error(f"ningún escenario coincide; hay {', '.join(SCENARIOS)}")
+    report = {"meta": metadata(), "results": run(args.sizes, names, args.repeat)}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados en {args.output}")
+
+    if args.save_baseline:
+        baseline = {"meta": report["meta"], "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline["results"] = json.load(f)["results"]
+        baseline["results"].update(report["results"])
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Referencia guardada en {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report["results"], baseline, args.tolerance, args.min_delta)
+        if regressions:
+            print(f"{len(regressions)} escenario(s) más lentos que la referencia: {', '.join(regressions)}")
+            sys.exit(1)
+        print("Sin regresiones.")
+
+
+if __name__ == "__main__":
+    main()
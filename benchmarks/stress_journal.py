@@ -0,0 +1,70 @@
+# Journal write amplification vs. full JSON rewrites. Crash safety under repeated
+# hard kills in the middle of appends and compactions is in tests/test_journal.py.
+# Run from the repo root: python benchmarks/stress_journal.py [--base-size 10000] [--mutations 100]
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from inventory_journal import InventoryJournal
+from inventory_store import InventoryStore
+
+
+def make_product(i):
+    return {"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 50, "Precio": float(i % 97)}
+
+
+def bench_write_amplification(base_size, mutations):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory_data.json")
+        products = [make_product(i) for i in range(base_size)]
+        logical = 0
+
+        # Old behaviour: rewrite the whole pretty-printed file after every mutation
+        store = InventoryStore(products)
+        json_bytes = 0
+        start = time.perf_counter()
+        for i in range(base_size, base_size + mutations):
+            product = make_product(i)
+            logical += len(json.dumps(product, separators=(",", ":")))
+            store.add(product)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(store.to_list(), f, ensure_ascii=False, indent=4)
+                json_bytes += f.tell()
+        json_time = time.perf_counter() - start
+        os.remove(path)
+
+        # Journaled: one compact appended record per mutation, one final compaction
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(products, f)
+        journal = InventoryJournal(path)
+        store = InventoryStore()
+        journal.load_into(store)
+        journal.attach(store)
+        start = time.perf_counter()
+        for i in range(base_size, base_size + mutations):
+            store.add(make_product(i))
+            journal.commit()
+        append_time = time.perf_counter() - start
+        journal.close(store)
+        journal_bytes = journal.journal_bytes_written + journal.snapshot_bytes_written
+
+    print(f"write amplification ({base_size} products, {mutations} single-product saves):")
+    print(f"  json rewrite: {json_bytes / logical:10.1f}x  ({json_bytes / 1e6:.1f} MB, {json_time:.2f}s)")
+    print(f"  journal     : {journal_bytes / logical:10.1f}x  ({journal_bytes / 1e6:.1f} MB, {append_time:.2f}s + 1 compaction)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-size", type=int, default=10_000)
+    parser.add_argument("--mutations", type=int, default=100)
+    args = parser.parse_args()
+    bench_write_amplification(args.base_size, args.mutations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Shared inventory (INVENTORY_SHARED=1, shared_journal.SharedJournal): times
+# refresh() after another instance saved a few products, and after it compacted,
+# against loading the whole inventory. The multi-process checks (no lost updates,
+# one winner per contended ID, every writer converges) are in
+# tests/test_shared_journal.py.
+# Run from the repo root: python benchmarks/stress_shared.py [--size 200000] [--changes 100]
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_products
+from inventory_core import Inventory
+from json_stream import write_products_file
+from shared_journal import SharedJournal
+
+
+def open_shared(path, compact_records):
+    SharedJournal.COMPACT_RECORDS = compact_records
+    inventory = Inventory(path, "journal", shared=True)
+    inventory.load(compactor=False)
+    return inventory
+
+
+def bench_refresh(size, changes):
+    # Another instance saves a few products: refresh() reads only the new journal records
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "inventory_data.json")
+        write_products_file(path, generate_products(size, duplicates=0))
+        SharedJournal.COMPACT_RECORDS = 10 ** 9
+        start = time.perf_counter()
+        reader = open_shared(path, 10 ** 9)
+        load_seconds = time.perf_counter() - start
+        writer = open_shared(path, 10 ** 9)
+
+        start = time.perf_counter()
+        for _ in range(100):
+            reader.refresh()
+        poll_ms = (time.perf_counter() - start) * 1000 / 100
+
+        writer.store.extend(generate_products(changes, seed=1, duplicates=0, first_id=size))
+        writer.save()
+        start = time.perf_counter()
+        result = reader.refresh()
+        refresh_ms = (time.perf_counter() - start) * 1000
+        assert len(result["added"]) == changes and len(reader.store) == size + changes
+
+        # Compaction elsewhere: the snapshot is reread and diffed
+        with writer.store.lock:
+            writer.store.remove(writer.store.keys()[0])
+        writer.storage._records_since_snapshot = writer.storage.COMPACT_RECORDS = 0
+        writer.save()
+        start = time.perf_counter()
+        result = reader.refresh()
+        reload_ms = (time.perf_counter() - start) * 1000
+        assert len(result["removed"]) == 1 and len(reader.store) == size + changes - 1
+        writer.close()
+        reader.close()
+    print(f"{size} productos: cargar {load_seconds * 1000:.0f} ms, comprobar sin cambios {poll_ms:.3f} ms, "
+          f"refresh con {changes} nuevos {refresh_ms:.1f} ms, tras una compactación {reload_ms:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--changes", type=int, default=100)
+    args = parser.parse_args()
+    bench_refresh(args.size, args.changes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Deterministic synthetic catalogues for the benchmarks. Names are built from a
+# shop vocabulary with Zipf-like popularity (a few items are very common, most are
+# rare), quantities are heavy-tailed with some zeros, prices are log-normal in
+# cents, and a chosen share of products repeats an earlier ID, as old files do.
+# The same seed and size always give the same products, one at a time, so
+# catalogues of 10M products can be written without holding them in memory.
+# Run from the repo root: python benchmarks/synthetic.py --size 1000000 --out catalogo.jsonl [--duplicates 0.01]
+import argparse
+import itertools
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import write_products_file
+
+ITEMS = ["peluche", "taza", "libreta", "llavero", "mochila", "estuche", "cojín", "pegatinas", "bolígrafo",
+         "agenda", "calcetines", "gorro", "bufanda", "manta", "lámpara", "monedero", "funda de móvil", "diadema",
+         "pinza de pelo", "goma de borrar", "lápiz", "marcapáginas", "imán", "chapa", "bolsa de tela", "cuaderno",
+         "botella", "fiambrera", "zapatillas", "pijama", "toalla", "espejo", "peine", "vela", "maceta", "reloj",
+         "puzzle", "figura", "sello", "washi tape"]
+MOTIFS = ["conejito", "gatito", "osito", "panda", "unicornio", "pingüino", "zorrito", "ranita", "patito",
+          "koala", "dinosaurio", "cerdito", "ballena", "nube", "fresa", "cactus", "arcoíris", "estrella",
+          "luna", "corazón", "seta", "hamster", "perrito", "pulpo", "abejita"]
+COLORS = ["rosa", "lila", "menta", "celeste", "amarillo", "blanco", "melocotón", "crema", "coral", "lavanda",
+          "verde", "negro"]
+SIZES = ["mini", "pequeño", "mediano", "grande", "XL"]
+ODD = [
+    {"ID": "sin-precio", "Nombre": "sin precio", "Cantidad": 3},
+    {"ID": "texto", "Nombre": "cantidad en texto", "Cantidad": "7", "Precio": "2.5"},
+    {"ID": "extra", "Nombre": "campo extra", "Cantidad": 1, "Precio": 1.0, "Color": "rosa"},
+]
+
+
+def _zipf_weights(n, s=1.1):
+    return list(itertools.accumulate(1 / rank ** s for rank in range(1, n + 1)))
+
+
+def product_id(index):
+    # IDs look like SKUs: a prefix per block of 100k products and a base-36 number
+    return f"K{index // 100_000:03d}-{_base36(index % 100_000).rjust(4, '0')}"
+
+
+def _base36(n):
+    digits = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    out = ""
+    while True:
+        n, r = divmod(n, 36)
+        out = digits[r] + out
+        if not n:
+            return out
+
+
+def generate_products(size, seed=0, duplicates=0.01, odd=0.0, first_id=0):
+    # Yields size products with IDs from first_id on; duplicates is the share that reuses
+    # an earlier product's ID, odd the share with missing, extra or mistyped fields
+    rng = random.Random(seed)
+    items, motifs, colors = _zipf_weights(len(ITEMS)), _zipf_weights(len(MOTIFS)), _zipf_weights(len(COLORS))
+    choices = rng.choices
+    for i in range(size):
+        if odd and rng.random() < odd:
+            product = dict(rng.choice(ODD))
+            product["ID"] = f"{product['ID']}-{i}"
+            yield product
+            continue
+        index = rng.randrange(i) if i and rng.random() < duplicates else i
+        name = f"{choices(ITEMS, cum_weights=items)[0]} {choices(MOTIFS, cum_weights=motifs)[0]} " \
+               f"{choices(COLORS, cum_weights=colors)[0]}"
+        if rng.random() < 0.3:
+            name += f" {rng.choice(SIZES)}"
+        quantity = 0 if rng.random() < 0.05 else min(10_000, int(rng.paretovariate(1.2)))
+        price = round(math.exp(rng.gauss(2.3, 0.9)), 2)
+        yield {"ID": product_id(first_id + index), "Nombre": name, "Cantidad": quantity, "Precio": max(price, 0.01)}
+
+
+def write_catalogue(path, size, seed=0, duplicates=0.01, odd=0.0):
+    # .json (array) or .jsonl by extension; returns bytes written
+    return write_products_file(path, generate_products(size, seed, duplicates, odd))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duplicates", type=float, default=0.01)
+    parser.add_argument("--odd", type=float, default=0.0)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    written = write_catalogue(args.out, args.size, args.seed, args.duplicates, args.odd)
+    elapsed = time.perf_counter() - start
+    print(f"{args.size} productos en {args.out}: {written / 2 ** 20:.1f} MB en {elapsed:.1f}s "
+          f"({args.size / elapsed:,.0f} productos/s)")
+
+
+if __name__ == "__main__":
+    main()
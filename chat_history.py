@@ -0,0 +1,191 @@
+import json
+import os
+import struct
+import time
+import tkinter as tk
+
+OFFSET = struct.Struct("<Q")
+
+
+class ChatHistory:
+    """Append-only chat log with an offset index, both kept on disk.
+
+    The log holds one JSON line per message ({"t": unix time, "text": ...});
+    path + ".idx" holds the byte offset of every line as a little-endian u64,
+    so message i is found with one seek whatever the history length and
+    nothing grows in memory. A crash between the two writes is repaired on
+    open: unindexed complete lines are indexed and a torn last line dropped.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path + ".idx"
+        self._log = open(path, "ab+")
+        self._index = open(self.index_path, "ab+")
+        self._count = 0
+        self._repair()
+
+    def _repair(self):
+        index_size = os.path.getsize(self.index_path)
+        log_size = os.path.getsize(self.path)
+        count = index_size // OFFSET.size
+        # Drop index entries past the end of the log, then the line they point into
+        while count and self._offset(count - 1) >= log_size:
+            count -= 1
+        end = 0
+        if count:
+            end = self._offset(count - 1)
+            self._log.seek(end)
+            line = self._log.readline()
+            if line.endswith(b"\n"):
+                end += len(line)
+            else:
+                count -= 1  # Torn last line
+        self._index.truncate(count * OFFSET.size)
+        self._count = count
+        # Index complete lines written after the last indexed one
+        self._log.seek(end)
+        offsets = []
+        for line in self._log:
+            if not line.endswith(b"\n"):
+                break
+            offsets.append(end)
+            end += len(line)
+        self._log.truncate(end)
+        if offsets:
+            self._index.seek(0, os.SEEK_END)
+            self._index.write(b"".join(OFFSET.pack(o) for o in offsets))
+            self._count += len(offsets)
+        self._log.flush()
+        self._index.flush()
+
+    def _offset(self, i):
+        self._index.seek(i * OFFSET.size)
+        return OFFSET.unpack(self._index.read(OFFSET.size))[0]
+
+    def __len__(self):
+        return self._count
+
+    def append(self, text):
+        # Returns the message number
+        line = json.dumps({"t": round(time.time(), 3), "text": text}, ensure_ascii=False).encode("utf-8") + b"\n"
+        self._log.seek(0, os.SEEK_END)
+        offset = self._log.tell()
+        self._log.write(line)
+        self._log.flush()
+        self._index.seek(0, os.SEEK_END)
+        self._index.write(OFFSET.pack(offset))
+        self._index.flush()
+        self._count += 1
+        return self._count - 1
+
+    def read(self, start, stop):
+        # Texts of messages start..stop-1, read with one contiguous read of the log
+        start, stop = max(0, start), min(stop, self._count)
+        if start >= stop:
+            return []
+        begin = self._offset(start)
+        if stop < self._count:
+            end = self._offset(stop)
+        else:
+            end = self._log.seek(0, os.SEEK_END)
+        self._log.seek(begin)
+        data = self._log.read(end - begin)
+        return [json.loads(line)["text"] for line in data.splitlines()]
+
+    def close(self):
+        self._log.close()
+        self._index.close()
+
+
+class ChatHistoryView:
+    """Shows a window of a ChatHistory in a Text widget, one line per message.
+
+    Only messages first..last-1 are in the widget, never more than
+    max_lines. New messages are added at the bottom while the window is at
+    the end of the history; scrolling to the top or bottom pages older or
+    newer messages in and trims the opposite end.
+    """
+
+    def __init__(self, text, scrollbar, history, max_lines=1000, page=200):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.history = history
+        self.max_lines = max_lines
+        self.page = page
+        self.first = self.last = len(history)
+        self._paging = False
+        text.configure(yscrollcommand=self._on_yscroll)
+        self._insert(self.history.read(self.last - page, self.last), at_end=False)
+        self.first = max(0, self.last - page)
+        text.see(tk.END)
+
+    @staticmethod
+    def _line(message):
+        return message.replace("\n", " ") + "\n"
+
+    def _insert(self, messages, at_end):
+        if not messages:
+            return
+        self.text.config(state="normal")
+        self.text.insert(tk.END if at_end else "1.0", "".join(self._line(m) for m in messages))
+        self.text.config(state="disabled")
+
+    def _delete_lines(self, start, stop):
+        # Widget lines are 1-based; the text always ends with one extra empty line
+        self.text.config(state="normal")
+        self.text.delete(f"{start}.0", f"{stop}.0")
+        self.text.config(state="disabled")
+
+    def append(self, message):
+        at_tail = self.last == len(self.history)
+        self.history.append(message)
+        if not at_tail:
+            return  # The user is reading older messages; they are paged in on the way down
+        follow = self.text.yview()[1] >= 1.0
+        self._insert([message], at_end=True)
+        self.last += 1
+        if self.last - self.first > self.max_lines:
+            trim = self.last - self.first - self.max_lines
+            self._delete_lines(1, trim + 1)
+            self.first += trim
+        if follow:
+            self.text.see(tk.END)
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._paging:
+            return
+        if float(first) <= 0.0 and self.first > 0:
+            self._paging = True
+            self.text.after_idle(self.page_older)
+        elif float(last) >= 1.0 and self.last < len(self.history):
+            self._paging = True
+            self.text.after_idle(self.page_newer)
+
+    def page_older(self):
+        self._paging = False
+        start = max(0, self.first - self.page)
+        messages = self.history.read(start, self.first)
+        self._insert(messages, at_end=False)
+        self.first = start
+        overflow = self.last - self.first - self.max_lines
+        if overflow > 0:
+            shown = self.last - self.first
+            self._delete_lines(shown - overflow + 1, shown + 1)
+            self.last -= overflow
+        self.text.yview(f"{len(messages) + 1}.0")  # Keep the line that was on top in place
+
+    def page_newer(self):
+        self._paging = False
+        stop = min(len(self.history), self.last + self.page)
+        messages = self.history.read(self.last, stop)
+        top_before = self.text.index("@0,0")
+        self._insert(messages, at_end=True)
+        self.last = stop
+        overflow = self.last - self.first - self.max_lines
+        if overflow > 0:
+            self._delete_lines(1, overflow + 1)
+            self.first += overflow
+            line = int(top_before.split(".")[0]) - overflow
+            self.text.yview(f"{max(1, line)}.0")
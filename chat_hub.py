@@ -0,0 +1,186 @@
+import asyncio
+import json
+import socket
+import threading
+
+from background_server import BackgroundServer
+from wire_protocol import CODEC_NONE, KIND_CHAT, MAGIC, ProtocolError, encode_message, read_frame, recv_frame
+
+CHAT_PORT = 12346
+CLIENT_QUEUE = 1000          # Frames waiting for one client before it counts as too slow
+MAX_CHAT_MESSAGE = 1 << 20   # 1 MiB per message
+
+
+def encode_chat(user, text):
+    # One length-prefixed frame (wire_protocol header) holding {"user", "text"}
+    header, payload = encode_message(KIND_CHAT, {"user": user, "text": text}, CODEC_NONE)
+    return header + payload
+
+
+def decode_chat(raw):
+    message = json.loads(raw)
+    if not isinstance(message, dict) or not isinstance(message.get("text"), str):
+        raise ProtocolError("Mensaje de chat inválido")
+    return str(message.get("user", "")), message["text"]
+
+
+class _HubClient:
+    def __init__(self, writer, legacy, queue_size):
+        self.writer = writer
+        self.legacy = legacy    # Older app versions send and expect raw UTF-8 text
+        self.queue = asyncio.Queue(queue_size)
+
+
+class ChatHub(BackgroundServer):
+    """Chat server fanning every message out to all connected clients.
+
+    One event loop serves every connection. Each client has a bounded send
+    queue drained by its own writer task, so a slow reader only delays
+    itself; a client whose queue fills up is disconnected. The hub's own
+    user takes part through send() and the on_message(user, text) callback,
+    which runs on the hub's thread.
+    """
+
+    NAME = "Chat hub"
+
+    def __init__(self, host="0.0.0.0", port=CHAT_PORT, on_message=None, queue_size=CLIENT_QUEUE):
+        super().__init__(host, port)
+        self.on_message = on_message
+        self.queue_size = queue_size
+        self.clients = set()
+        self.delivered = 0
+        self.dropped_clients = 0
+
+    def send(self, user, text):
+        # Thread-safe; used by the hub's own user
+        self.call_soon(self._broadcast, user, text, None)
+
+    def _broadcast(self, user, text, sender):
+        frame = legacy_frame = None
+        for client in list(self.clients):
+            if client is sender:
+                continue
+            if client.legacy:
+                legacy_frame = legacy_frame or f"{user}: {text}".encode("utf-8")
+                item = legacy_frame
+            else:
+                frame = frame or encode_chat(user, text)
+                item = frame
+            try:
+                client.queue.put_nowait(item)
+            except asyncio.QueueFull:
+                print(f"Chat: cliente demasiado lento, desconectado ({client.writer.get_extra_info('peername')})")
+                self.dropped_clients += 1
+                self._drop(client)
+        if sender is not None and self.on_message is not None:
+            self.on_message(user, text)
+
+    def _drop(self, client):
+        self.clients.discard(client)
+        client.writer.transport.abort()
+
+    async def _handle(self, reader, writer):
+        client = _HubClient(writer, False, self.queue_size)
+        self.clients.add(client)
+        sender = asyncio.create_task(self._write_loop(client))
+        try:
+            # Framed clients start with MAGIC; older versions send plain text. Until a client
+            # has sent something it is treated as framed.
+            start = await reader.read(len(MAGIC))
+            while start and len(start) < len(MAGIC) and MAGIC.startswith(start):
+                more = await reader.read(len(MAGIC) - len(start))
+                if not more:
+                    break
+                start += more
+            if not start:
+                return
+            if start != MAGIC:
+                client.legacy = True
+                await self._read_legacy(client, reader, start)
+            else:
+                await self._read_frames(client, reader, start)
+        except (ConnectionError, ProtocolError, ValueError) as e:
+            print(f"Chat: cliente desconectado por un error: {e}")
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+
+    async def _read_frames(self, client, reader, start):
+        while True:
+            frame = await read_frame(reader, MAX_CHAT_MESSAGE, start)
+            start = b""
+            if frame is None:
+                return
+            kind, raw = frame
+            if kind != KIND_CHAT:
+                raise ProtocolError(f"Mensaje de tipo {kind} en el chat")
+            user, text = decode_chat(raw)
+            self._broadcast(user, text, client)
+
+    async def _read_legacy(self, client, reader, data):
+        # Old clients have no framing: every read is taken as one message, as they did
+        while data:
+            text = data.decode("utf-8", errors="replace")
+            user, _, body = text.partition(": ")
+            self._broadcast(user if body else "", body or text, client)
+            data = await reader.read(1024)
+
+    async def _write_loop(self, client):
+        writer = client.writer
+        while True:
+            writer.write(await client.queue.get())
+            count = 1
+            # Coalesce whatever else is queued before waiting on the socket
+            while not client.queue.empty():
+                writer.write(client.queue.get_nowait())
+                count += 1
+            await writer.drain()
+            self.delivered += count
+
+
+class ChatClient:
+    """Connection to a ChatHub (or to a peer running one).
+
+    Incoming messages are read on one background thread and passed to
+    on_message(user, text); on_close() runs when the connection ends.
+    """
+
+    def __init__(self, host, port=CHAT_PORT, on_message=None, on_close=None, timeout=5):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.settimeout(None)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.on_message = on_message
+        self.on_close = on_close
+        self._send_lock = threading.Lock()
+        self._closed = False
+        threading.Thread(target=self._receive_loop, name="chat-client", daemon=True).start()
+
+    def send(self, user, text):
+        frame = encode_chat(user, text)
+        with self._send_lock:
+            self.sock.sendall(frame)
+
+    def _receive_loop(self):
+        try:
+            while True:
+                frame = recv_frame(self.sock, MAX_CHAT_MESSAGE)
+                if frame is None:
+                    break
+                kind, raw = frame
+                if kind == KIND_CHAT and self.on_message is not None:
+                    self.on_message(*decode_chat(raw))
+        except (OSError, ProtocolError, ValueError) as e:
+            if not self._closed:
+                print(f"Chat: error al recibir: {e}")
+        finally:
+            if not self._closed and self.on_close is not None:
+                self.on_close()
+            self.close()
+
+    def close(self):
+        self._closed = True
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
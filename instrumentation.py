@@ -0,0 +1,206 @@
+import cProfile
+import functools
+import io
+import json
+import math
+import pstats
+import threading
+import time
+
+SUB_BUCKETS = 4   # Buckets per power of two: values are placed to within ~19%
+
+
+class Histogram:
+    """Count, total, min, max and log-scale buckets of a series of values.
+
+    A value v > 0 goes to a bucket of width 2**e / SUB_BUCKETS; percentiles
+    are the upper edge of the bucket holding them, capped at the maximum.
+    Memory stays at a few dozen buckets whatever the number of values.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.buckets = {}   # bucket -> count; bucket None holds zeros
+
+    @staticmethod
+    def _bucket(value):
+        if value <= 0:
+            return None
+        mantissa, exponent = math.frexp(value)   # value = mantissa * 2**exponent, 0.5 <= mantissa < 1
+        return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+    @staticmethod
+    def _upper(bucket):
+        if bucket is None:
+            return 0
+        exponent, sub = divmod(bucket, SUB_BUCKETS)
+        return (0.5 + (sub + 1) / (2 * SUB_BUCKETS)) * 2.0 ** exponent
+
+    def add(self, value):
+        if not self.count:
+            self.min = self.max = value
+        elif value < self.min:
+            self.min = value
+        elif value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+        bucket = self._bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def _ordered(self):
+        # (upper edge, count) ascending
+        return sorted((self._upper(bucket), count) for bucket, count in self.buckets.items())
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for upper, count in self._ordered():
+            seen += count
+            if seen >= rank:
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": [[upper, count] for upper, count in self._ordered()],
+        }
+
+
+class Instruments:
+    """Latency, bytes written and rows touched per UI handler.
+
+    Handlers are wrapped with @instruments.handler(name). While disabled the
+    wrapper only checks self.enabled and calls through. While enabled every
+    call adds its time to the handler's histogram; code inside a handler
+    reports its bytes and rows with count(), and they also count for the
+    handler that called it (add_product includes its save_inventory). One
+    handler at a time can be run under cProfile; its stats accumulate until
+    reset().
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.profile_name = None   # handler run under cProfile
+        self._handlers = {}        # name -> {"latency_ms", "bytes", "rows": Histogram, "errors": n}
+        self._profiles = {}        # name -> cProfile.Profile
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def handler(self, name=None):
+        def decorate(fn):
+            label = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                return self._call(label, fn, args, kwargs)
+            return wrapper
+        return decorate
+
+    def _call(self, name, fn, args, kwargs):
+        outer = getattr(self._local, "call", None)
+        call = self._local.call = {"bytes": 0, "rows": 0}
+        failed = True
+        start = time.perf_counter()
+        try:
+            if name == self.profile_name and not getattr(self._local, "profiling", False):
+                result = self._profiled(name, fn, args, kwargs)
+            else:
+                result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.call = outer
+            if outer is not None:
+                outer["bytes"] += call["bytes"]
+                outer["rows"] += call["rows"]
+            self.record(name, elapsed, call["bytes"], call["rows"], failed)
+
+    def _profiled(self, name, fn, args, kwargs):
+        with self._lock:
+            profile = self._profiles.setdefault(name, cProfile.Profile())
+        self._local.profiling = True
+        try:
+            return profile.runcall(fn, *args, **kwargs)
+        except ValueError as e:
+            if "profil" not in str(e):
+                raise
+            return fn(*args, **kwargs)   # Another profiler is active on this thread
+        finally:
+            self._local.profiling = False
+
+    def count(self, written=0, rows=0):
+        # Adds to the handler running on this thread; ignored outside one
+        call = getattr(self._local, "call", None)
+        if call is not None:
+            call["bytes"] += written
+            call["rows"] += rows
+
+    def record(self, name, seconds, written=0, rows=0, failed=False):
+        # Also used directly for work that isn't a handler call (background jobs)
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._handlers.get(name)
+            if stats is None:
+                stats = self._handlers[name] = {"latency_ms": Histogram(), "bytes": Histogram(),
+                                                "rows": Histogram(), "errors": 0}
+            stats["latency_ms"].add(seconds * 1000)
+            stats["bytes"].add(written)
+            stats["rows"].add(rows)
+            stats["errors"] += failed
+
+    def reset(self):
+        with self._lock:
+            self._handlers = {}
+            self._profiles = {}
+
+    # --- Reports ---
+    def snapshot(self):
+        with self._lock:
+            return {name: {"latency_ms": stats["latency_ms"].summary(), "bytes": stats["bytes"].summary(),
+                           "rows": stats["rows"].summary(), "errors": stats["errors"]}
+                    for name, stats in sorted(self._handlers.items())}
+
+    def profile_text(self, name, limit=30):
+        # cProfile stats of a handler, sorted by cumulative time; "" if it wasn't profiled
+        with self._lock:
+            profile = self._profiles.get(name)
+        if profile is None:
+            return ""
+        out = io.StringIO()
+        try:
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(limit)
+        except TypeError:   # Nothing was recorded yet
+            return ""
+        return out.getvalue()
+
+    def dump(self, path):
+        report = {
+            "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "handlers": self.snapshot(),
+            "profiles": {name: self.profile_text(name) for name in list(self._profiles)},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+
+# Shared by the app's handlers; INVENTORY_INSTRUMENT=1 or the debug window turn it on
+instruments = Instruments()
@@ -0,0 +1,193 @@
+import bisect
+import heapq
+import itertools
+import math
+import threading
+
+LOW_STOCK = 5     # Cantidad at or under this is a low-stock alert
+TOP_N = 10
+_EXACT = 1 << 1074   # Every float is a whole number of 2**-1074 units
+
+
+def _number(value):
+    # Cantidad/Precio that aren't numbers (old files, network pushes) count as 0
+    if type(value) is int or (type(value) is float and math.isfinite(value)):
+        return value
+    return 0
+
+
+def _value(quantity, price):
+    try:
+        value = _number(quantity) * _number(price)
+    except OverflowError:   # Huge int Cantidad times a float
+        return 0
+    return value if type(value) is int or math.isfinite(value) else 0
+
+
+def product_value(product):
+    return _value(product.get("Cantidad"), product.get("Precio"))
+
+
+def _exact(value):
+    # value as an integer count of 2**-1074, so sums come out the same in any order
+    if type(value) is int:
+        return value * _EXACT
+    numerator, denominator = value.as_integer_ratio()
+    return numerator * (_EXACT // denominator)
+
+
+def _exact_sum(values):
+    # Sum of _exact(value) over many values; numerators are added per denominator first
+    by_denominator = {}
+    for value in values:
+        numerator, denominator = value.as_integer_ratio()
+        by_denominator[denominator] = by_denominator.get(denominator, 0) + numerator
+    return sum(numerator * (_EXACT // denominator) for denominator, numerator in by_denominator.items())
+
+
+def _from_exact(total):
+    return total // _EXACT if total % _EXACT == 0 else total / _EXACT
+
+
+def _is_low(quantity, threshold):
+    return type(quantity) in (int, float) and quantity <= threshold
+
+
+def _aggregate(store, low_stock, candidates):
+    # (products, exact units, exact value, low-stock keys, best candidates) from the store's columns
+    keys, (quantities, prices) = store.columns(("Cantidad", "Precio"))
+    values = [_value(q, p) for q, p in zip(quantities, prices)]
+    units = _exact_sum(_number(q) for q in quantities)
+    low = [key for key, q in zip(keys, quantities) if _is_low(q, low_stock)]
+    top = heapq.nsmallest(candidates, zip([-value for value in values], keys))
+    return len(keys), units, _exact_sum(values), low, top
+
+
+class InventoryAnalytics:
+    """Totals, top products by value and low-stock alerts for a store.
+
+    Maintained by the store listener on every add, delete, import and network
+    receive. Sums are kept exactly (see _exact), so they equal a full
+    recompute whatever the order of the mutations. The top list keeps 4 *
+    top_n candidates; every product outside it is worth no more than the
+    last candidate, so deleting candidates only shrinks it, and the store is
+    scanned again only when fewer than top_n are left.
+    """
+
+    def __init__(self, store, low_stock=LOW_STOCK, top_n=TOP_N):
+        self.store = store
+        self.low_stock = low_stock
+        self.top_n = top_n
+        self.version = 0
+        self._lock = threading.Lock()
+        with store.lock:
+            self._reset()
+            store.add_listener(self._on_change)
+
+    def _reset(self):
+        # Starts over from what the store holds now (nothing, after a clear)
+        self.products, self._units, self._value, low, self._top = _aggregate(self.store, self.low_stock, 4 * self.top_n)
+        self._low = dict.fromkeys(low)   # Ordered set of keys, in store order
+        # self._top: (-value, key) ascending, best first, at most 4 * top_n
+
+    # --- Maintenance ---
+    def _on_change(self, op, key, product):
+        with self._lock:
+            if op == "add":
+                self._add(key, product)
+            elif op == "remove":
+                self._remove(key, product)
+            else:
+                self._reset()
+            self.version += 1
+
+    def _add(self, key, product):
+        value = product_value(product)
+        complete = len(self._top) == self.products   # Every product is a candidate
+        self.products += 1
+        self._units += _exact(_number(product.get("Cantidad")))
+        self._value += _exact(value)
+        if _is_low(product.get("Cantidad"), self.low_stock):
+            self._low[key] = None
+        entry = (-value, key)
+        if complete or (self._top and entry < self._top[-1]):
+            bisect.insort(self._top, entry)
+            if len(self._top) > 4 * self.top_n:
+                self._top.pop()
+
+    def _remove(self, key, product):
+        value = product_value(product)
+        self.products -= 1
+        self._units -= _exact(_number(product.get("Cantidad")))
+        self._value -= _exact(value)
+        self._low.pop(key, None)
+        entry = (-value, key)
+        i = bisect.bisect_left(self._top, entry)
+        if i < len(self._top) and self._top[i] == entry:
+            del self._top[i]
+
+    def _refill(self):
+        self._top = _aggregate(self.store, self.low_stock, 4 * self.top_n)[4]
+
+    # --- Queries ---
+    def snapshot(self, low_stock_items=20):
+        # Figures for the panel; top and low_stock are store keys
+        with self.store.lock, self._lock:
+            if len(self._top) < min(self.top_n, self.products):
+                self._refill()
+            return {
+                "products": self.products,
+                "units": _from_exact(self._units),
+                "value": _from_exact(self._value),
+                "top": [(-value, key) for value, key in self._top[:self.top_n]],
+                "low_stock_count": len(self._low),
+                "low_stock": list(itertools.islice(self._low, low_stock_items)),
+            }
+
+
+class NameTotals:
+    """Products, units and value per Nombre, added one row at a time (Excel summary sheets)."""
+
+    def __init__(self):
+        self.totals = {}
+
+    def add(self, name, quantity, price):
+        entry = self.totals.get(name)
+        if entry is None:
+            entry = self.totals[name] = [0, 0, 0]
+        entry[0] += 1
+        entry[1] += _number(quantity)
+        entry[2] += _value(quantity, price)
+
+    def __len__(self):
+        return len(self.totals)
+
+    def rows(self):
+        # (Nombre, products, units, value), most valuable first
+        ordered = sorted(self.totals.items(), key=lambda item: (-item[1][2], str(item[0])))
+        for name, (products, units, value) in ordered:
+            yield name, products, units, round(value, 2)
+
+
+def compute_full(store, low_stock=LOW_STOCK, top_n=TOP_N, low_stock_items=20):
+    # Same figures as InventoryAnalytics.snapshot(), recomputed product by product
+    # from full product dicts. Only used to verify the incremental version.
+    units = value = 0
+    top = []
+    low = []
+    items = store.items()
+    for key, product in items:
+        product_total = product_value(product)
+        units += _exact(_number(product.get("Cantidad")))
+        value += _exact(product_total)
+        top.append((-product_total, key))
+        if _is_low(product.get("Cantidad"), low_stock):
+            low.append(key)
+    return {
+        "products": len(items),
+        "units": _from_exact(units),
+        "value": _from_exact(value),
+        "top": [(-v, key) for v, key in heapq.nsmallest(top_n, top)],
+        "low_stock_count": len(low),
+        "low_stock": low[:low_stock_items],
+    }
@@ -5,24 +5,74 @@ from ttkbootstrap.constants import INFO, PRIMARY, SUCCESS, WARNING, DANGER
 from ttkbootstrap import Style
 import socket
 import os
-import pandas as pd
 import json
 import tkinter as tk
 from tkinter import messagebox, filedialog, PhotoImage
-import hashlib
+import threading
+from inventory_core import (CHUNK_SIZE, DuplicateProductError, Inventory, ProductError, parse_product, send_inventory,
+                            sync_with)
+from user_store import UserError, UserStore
+from virtual_tree import VirtualTreeview
+from sort_index import SortIndex, SortedView, merge_keys, sort_keys
+from search_index import SearchIndex
+from inventory_analytics import LOW_STOCK, TOP_N
+from inventory_io import (EXCEL_MAX_ROWS, columnar_export_job, columnar_import_job, excel_export_job, excel_import_job,
+                          json_export_job, json_import_job, parse_where)
+from jobs import JobRunner
+from parallel_import import describe_report, parallel_import_job
+from instrumentation import instruments
+from chat_history import ChatHistory, ChatHistoryView
+from json_stream import InventoryFormatError
+from wire_protocol import DEFAULT_PORT
+
+COLUMNAR_FILETYPES = [("Parquet", "*.parquet"), ("Arrow / Feather", "*.arrow *.feather")]
+
 
 class InventoryApp:
+    SEARCH_DEBOUNCE_MS = 200 # Wait for a pause in typing before searching
+    ANALYTICS_REFRESH_MS = 500 # How often the statistics panel checks for changes
+    IMPORT_REPORT_LINES = 15 # Files listed after a multi-file import
+    WATCH_MS = 1000 # How often a shared inventory file is checked for other instances' changes
+
     def __init__(self, root):
         self.root = root
         self.root.title("🌸 Sistema de Gestión de Inventarios Kawaii 🌸") # Cute title
-        self.inventory_file = "inventory_data.json"
-        self.users_file = "users.json"
-        # Ensure load_users is called *after* users_file is defined
-        self.load_users()
-
-        # Datos del inventario
-        self.inventory = []
-        self.load_inventory() # Ensure this is also defined
+        # Products, storage, search and totals live in inventory_core (shared with
+        # inventory_cli); INVENTORY_FORMAT and INVENTORY_STORAGE pick the file and backend
+        self.inventory = Inventory()
+        self.inventory_file = self.inventory.inventory_file
+        self.storage_mode = self.inventory.storage_mode
+        self.store = self.inventory.store
+        self.storage = None
+        # INVENTORY_INSTRUMENT=1 times every handler from the start (see "🐞 Rendimiento")
+        if os.environ.get("INVENTORY_INSTRUMENT") == "1":
+            instruments.enabled = True
+        self.debug_window = None
+        self.users = UserStore("users.json")
+
+        # The inventory loads in the background while the login screen is up;
+        # setup_ui waits for it if the user is faster
+        self.search_index = None
+        self.analytics = None
+        self.sort_spec = [] # [(column, descending), ...], first column first
+        self.sort_indexes = {} # column -> SortIndex, built the first time the column leads a sort
+        self.shown_keys = None # Search results on display, None when showing every product
+        self.shown_query = ""  # The search that gave shown_keys
+        self._analytics_after_id = None
+        self.inventory_ready = threading.Event()
+        threading.Thread(target=self.load_inventory_in_background, name="inventory-load", daemon=True).start()
+        self._search_after_id = None
+        # Chat log shared by every chat window (opened on first use)
+        self.chat_history_file = "chat_history.log"
+        self.chat_history = None
+        self.chat_view = None
+        # Started by "Recibir por Red" and kept running until stopped
+        self.inventory_server = None
+        self._network_refresh_pending = False
+        # INVENTORY_SHARED=1: other instances' saves are picked up by watch_inventory
+        self._watch_after_id = None
+        # Imports/exports run as background jobs; events come back via root.after
+        self.jobs = JobRunner(self.root)
 
         # --- Style Customizations ---
         style = Style()
@@ -62,80 +112,27 @@ class InventoryApp:
         # Pantalla de inicio de sesión
         self.show_login_screen()
 
-    def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
-
-    # --- Re-inserting load_users method ---
-    def load_users(self):
-        if os.path.exists(self.users_file):
-            try:
-                with open(self.users_file, "r", encoding="utf-8") as f:
-                    raw_users = json.load(f)
-                    self.users = {}
-                    for username, data in raw_users.items():
-                        if isinstance(data, str): # Handle old format
-                            self.users[username] = {"password": data, "profile_image": ""}
-                        elif isinstance(data, dict) and "password" in data: # Handle new format
-                             self.users[username] = data
-                        else:
-                             print(f"Skipping invalid user data for {username}") # Log invalid entries
-                # Ensure default admin exists if file is empty or corrupted after load
-                if "admin" not in self.users:
-                     print("Admin user not found after loading, creating default.")
-                     self.users["admin"] = {"password": self.hash_password("admin"), "profile_image": ""}
-                     self.save_users() # Save if we added admin
-
-            except json.JSONDecodeError:
-                print(f"Error decoding JSON from {self.users_file}. Initializing with default admin.")
-                self.users = {"admin": {"password": self.hash_password("admin"), "profile_image": ""}}
-                self.save_users()
-            except Exception as e:
-                 print(f"An error occurred loading users: {e}. Initializing with default admin.")
-                 self.users = {"admin": {"password": self.hash_password("admin"), "profile_image": ""}}
-                 self.save_users()
-
-        else:
-            print(f"{self.users_file} not found. Creating default users.")
-            self.users = {
-                "admin": {"password": self.hash_password("admin"), "profile_image": ""},
-                # Add back default user if desired
-                # "user": {"password": self.hash_password("user123"), "profile_image": ""}
-            }
-            self.save_users()
-    # --- End re-inserting load_users method ---
-
-
-    def save_users(self):
+    def load_inventory_in_background(self):
         try:
-            with open(self.users_file, "w", encoding="utf-8") as f:
-                json.dump(self.users, f, ensure_ascii=False, indent=4)
-        except Exception as e:
-            print(f"Error saving users to {self.users_file}: {e}")
-            # Avoid showing messagebox here if it causes issues during init
-            # messagebox.showerror("Error Guardando Usuarios", f"No se pudo guardar el archivo de usuarios: {e}")
-
-
-    # --- Make sure load_inventory is also defined ---
-    def load_inventory(self):
-        if os.path.exists(self.inventory_file):
+            self.inventory.load()
+        finally:
+            self.storage = self.inventory.storage
+            self.inventory.build_indexes()
+            self.search_index = self.inventory.search_index
+            self.analytics = self.inventory.analytics
+            self.inventory_ready.set()
+
+    def close_storage(self):
+        # Called on exit so the snapshot is up to date for other tools
+        self.inventory_ready.wait()
+        if self.inventory_server is not None:
+            self.inventory_server.stop()
+        self.close_sort_indexes()
+        if self.storage is not None:
             try:
-                with open(self.inventory_file, "r", encoding="utf-8") as f:
-                    self.inventory = json.load(f)
-                    # Basic validation: ensure it's a list
-                    if not isinstance(self.inventory, list):
-                        print(f"Inventory data in {self.inventory_file} is not a list. Initializing empty inventory.")
-                        self.inventory = []
-                        self.save_inventory() # Optionally overwrite corrupted file
-            except json.JSONDecodeError:
-                 print(f"Error decoding JSON from {self.inventory_file}. Initializing empty inventory.")
-                 self.inventory = []
+                self.inventory.close()
             except Exception as e:
-                 print(f"An error occurred loading inventory: {e}. Initializing empty inventory.")
-                 self.inventory = []
-        else:
-             print(f"{self.inventory_file} not found. Starting with empty inventory.")
-             self.inventory = []
-    # --- End load_inventory definition ---
+                print(f"Error closing inventory storage: {e}")
 
     # ... (rest of the InventoryApp class methods like show_login_screen, setup_ui etc.) ...
     # Ensure all methods previously defined are still present and correctly indented
@@ -186,24 +183,17 @@ class InventoryApp:
         if file_path:
             self.profile_image_path.set(file_path)
 
+    @instruments.handler()
     def register_user(self):
         new_user = self.entry_new_user.get()
         new_password = self.entry_new_password.get()
         profile_image = self.profile_image_path.get()
 
-        if not new_user or not new_password:
-            messagebox.showerror("Error", "Usuario y contraseña son obligatorios")
-            return
-
-        if new_user in self.users:
-            messagebox.showerror("Error", "El usuario ya existe")
+        try:
+            self.users.register(new_user, new_password, profile_image)
+        except UserError as e:
+            messagebox.showerror("Error", str(e))
             return
-
-        self.users[new_user] = {
-            "password": self.hash_password(new_password),
-            "profile_image": profile_image
-        }
-        self.save_users()
         messagebox.showinfo("Éxito", "Usuario registrado correctamente")
         self.back_to_login()
 
@@ -213,14 +203,14 @@ class InventoryApp:
             self.register_frame.destroy()
         self.show_login_screen()
 
+    @instruments.handler()
     def authenticate_user(self):
         username = self.entry_user.get()
         password = self.entry_password.get()
-        hashed_password = self.hash_password(password)
-
-        if username in self.users and self.users[username]["password"] == hashed_password:
+        user = self.users.authenticate(username, password)
+        if user is not None:
             self.current_user = username
-            self.current_user_image = self.users[username].get("profile_image", "") # Use .get for safety
+            self.current_user_image = user.get("profile_image", "") # Use .get for safety
             if hasattr(self, 'login_frame') and self.login_frame.winfo_exists():
                 self.login_frame.destroy()
             # setup_ui now handles placing the profile image frame
@@ -229,6 +219,14 @@ class InventoryApp:
             messagebox.showerror("Error", "Usuario o contraseña incorrectos")
 
     def setup_ui(self):
+        if not self.inventory_ready.is_set():
+            # Logged in before the inventory finished loading: show a note and check again
+            if not hasattr(self, 'loading_frame') or not self.loading_frame.winfo_exists():
+                self.loading_frame = ttk.Frame(self.root, padding=(20, 10), style='TFrame')
+                self.loading_frame.grid(row=0, column=0, padx=10, pady=10)
+                ttk.Label(self.loading_frame, text="⏳ Cargando inventario...").grid(row=0, column=0, padx=5, pady=5)
+            self.root.after(50, self.setup_ui)
+            return
         # Clear previous UI elements if they exist
         for widget in self.root.winfo_children():
              # Keep the main window, destroy frames if they exist from previous logins/screens
@@ -276,6 +274,9 @@ class InventoryApp:
         ttk.Label(frame_search, text="Buscar por ID o Nombre:").grid(row=0, column=0, padx=5, pady=5)
         self.entry_search = ttk.Entry(frame_search, bootstyle=INFO)
         self.entry_search.grid(row=0, column=1, padx=5, pady=5)
+        # Search as you type (debounced) and on Enter
+        self.entry_search.bind("<KeyRelease>", self.schedule_live_search)
+        self.entry_search.bind("<Return>", lambda event: self.search_product())
         ttk.Button(frame_search, text="Buscar", command=self.search_product, bootstyle=SUCCESS).grid(row=0, column=2, padx=5, pady=5)
 
         # Tabla para mostrar el inventario
@@ -284,23 +285,45 @@ class InventoryApp:
         main_frame.grid_rowconfigure(2, weight=1) # Allow treeview frame to expand
         main_frame.grid_columnconfigure(0, weight=1) # Allow treeview frame to expand
 
-        self.tree = ttk.Treeview(tree_frame, columns=("ID", "Nombre", "Cantidad", "Precio"), show="headings", bootstyle=INFO)
+        self.tree = ttk.Treeview(tree_frame, columns=("ID", "Nombre", "Cantidad", "Precio"), show="headings", height=15, bootstyle=INFO)
         self.tree.heading("ID", text="ID")
         self.tree.heading("Nombre", text="Nombre")
         self.tree.heading("Cantidad", text="Cantidad")
         self.tree.heading("Precio", text="Precio")
+        # Click a heading to sort by it (again to reverse); Shift+click adds it as a further key
+        self.tree.bind("<ButtonRelease-1>", self.on_heading_click, add="+")
         self.tree.grid(row=0, column=0, sticky='nsew') # Grid within tree_frame
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
-        # Add scrollbar to Treeview
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
+        # Add scrollbar to Treeview. The table is virtual: only the visible rows exist as
+        # Tk items and the scrollbar is sized to the full list of rows.
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
         scrollbar.grid(row=0, column=1, sticky='ns')
+        self.table = VirtualTreeview(self.tree, scrollbar, self.product_row_values)
 
         # Populate treeview after setting it up
         self.populate_treeview()
 
+        # Panel de estadísticas: totals are kept up to date by InventoryAnalytics, the
+        # panel only redraws when they changed
+        frame_stats = ttk.LabelFrame(main_frame, text="📊 Estadísticas 📊", style='TLabelframe')
+        frame_stats.grid(row=0, column=1, rowspan=3, padx=10, pady=10, sticky="nsew")
+        frame_stats.grid_rowconfigure(4, weight=1)
+        self.stats_label = ttk.Label(frame_stats, text="", justify=tk.LEFT)
+        self.stats_label.grid(row=0, column=0, padx=5, pady=5, sticky='w')
+        ttk.Label(frame_stats, text=f"💎 Top {TOP_N} por valor:").grid(row=1, column=0, padx=5, sticky='w')
+        self.top_value_list = tk.Listbox(frame_stats, height=TOP_N, width=42, activestyle="none")
+        self.top_value_list.grid(row=2, column=0, padx=5, pady=(0, 5), sticky='ew')
+        self.low_stock_label = ttk.Label(frame_stats, text="")
+        self.low_stock_label.grid(row=3, column=0, padx=5, sticky='w')
+        self.low_stock_list = tk.Listbox(frame_stats, height=8, width=42, activestyle="none")
+        self.low_stock_list.grid(row=4, column=0, padx=5, pady=(0, 5), sticky='nsew')
+        self._stats_version = None
+        if self._analytics_after_id is not None:
+            self.root.after_cancel(self._analytics_after_id)
+        self.refresh_analytics()
+
 
         # Botones para acciones
         frame_actions = ttk.Frame(main_frame, style='TFrame')
@@ -323,27 +346,169 @@ class InventoryApp:
         ttk.Button(frame_actions, text="🗑️ Eliminar Seleccionados", command=self.delete_selected_products, bootstyle=DANGER).grid(row=1, column=1, padx=5, pady=3, sticky='ew')
         # Network buttons might be less common, place them together
         ttk.Button(frame_actions, text="📡 Enviar por Red", command=self.send_inventory, bootstyle=WARNING).grid(row=1, column=2, padx=5, pady=3, sticky='ew')
-        ttk.Button(frame_actions, text="🛰️ Recibir por Red", command=self.receive_inventory, bootstyle=WARNING).grid(row=1, column=3, padx=5, pady=3, sticky='ew')
+        self.receive_button = ttk.Button(frame_actions, text="🛰️ Recibir por Red", command=self.receive_inventory, bootstyle=WARNING)
+        self.receive_button.grid(row=1, column=3, padx=5, pady=3, sticky='ew')
+        ttk.Button(frame_actions, text="🔄 Sincronizar por Red", command=self.sync_inventory, bootstyle=WARNING).grid(row=2, column=0, padx=5, pady=3, sticky='ew')
+        ttk.Button(frame_actions, text="🐞 Rendimiento", command=self.open_debug_window, bootstyle=INFO).grid(row=2, column=1, padx=5, pady=3, sticky='ew')
+        ttk.Button(frame_actions, text="📥 Importar Parquet/Arrow", command=self.import_from_columnar, bootstyle=PRIMARY).grid(row=2, column=2, padx=5, pady=3, sticky='ew')
+        ttk.Button(frame_actions, text="📤 Exportar Parquet/Arrow", command=self.export_to_columnar, bootstyle=PRIMARY).grid(row=2, column=3, padx=5, pady=3, sticky='ew')
 
 
         if self.current_user == "admin":
             ttk.Button(frame_actions, text="👤 Borrar Usuario", command=self.show_delete_user_screen, bootstyle=DANGER).grid(row=1, column=4, padx=5, pady=3, sticky='ew') # Place admin button last
 
+        # Barra de estado para tareas en segundo plano (importar/exportar)
+        frame_status = ttk.Frame(main_frame, style='TFrame')
+        frame_status.grid(row=4, column=0, padx=10, pady=(0, 10), sticky="ew")
+        frame_status.grid_columnconfigure(0, weight=1)
+        self.job_label = ttk.Label(frame_status, text="")
+        self.job_label.grid(row=0, column=0, padx=5, sticky='w')
+        self.job_progress = ttk.Progressbar(frame_status, length=200, mode="determinate", bootstyle=INFO)
+        self.job_progress.grid(row=0, column=1, padx=5)
+        self.job_cancel_button = ttk.Button(frame_status, text="✖ Cancelar", command=self.cancel_job, state="disabled", bootstyle=DANGER)
+        self.job_cancel_button.grid(row=0, column=2, padx=5)
+        self.current_job = None
+
+        if self.inventory.shared:
+            if self._watch_after_id is not None:
+                self.root.after_cancel(self._watch_after_id)
+            self.watch_inventory()
+
         # Call show_profile_image to place it in the dedicated frame
         self.show_profile_image()
 
+    def watch_inventory(self):
+        # A stat() of the inventory files per tick; they are only read when they changed
+        self._watch_after_id = self.root.after(self.WATCH_MS, self.watch_inventory)
+        try:
+            changes = self.inventory.refresh()
+        except Exception as e:
+            print(f"Error reading changes to {self.inventory_file}: {e}")
+            return
+        if changes:
+            self.show_shared_changes(changes)
+
+    def show_external_changes(self, added, removed):
+        # Only the rows other instances or network peers added or removed are touched
+        self.table.remove_keys(removed)
+        if self.shown_keys is not None and removed:
+            removed = set(removed)
+            self.shown_keys = [key for key in self.shown_keys if key not in removed]
+        added = self.show_new_keys(added)
+        instruments.count(rows=len(added) + len(removed))
+
+    def show_new_keys(self, keys):
+        # Rows for products added outside the table (imports, peers, other instances). While
+        # search results are on display only the matching ones are shown, and a sorted table
+        # gets them in their place; returns the keys shown
+        if self.shown_keys is None:
+            self.table.extend(keys) # Store order, or a live sorted view that has them already
+            return keys
+        keys = self.search_index.filter(self.shown_query, keys)
+        if not keys:
+            return keys
+        self.shown_keys = self.shown_keys + keys
+        if self.sort_spec:
+            self.table.replace(merge_keys(self.store, self.table.rows, keys, self.sort_spec))
+        else:
+            self.table.extend(keys)
+        return keys
+
+    @instruments.handler()
+    def show_shared_changes(self, changes):
+        self.show_external_changes(changes["added"], changes["removed"])
+        self.job_label.config(text=f"Cambios de otro equipo: {len(changes['added'])} productos nuevos, "
+                                   f"{len(changes['removed'])} eliminados.")
+        if changes["dropped"]:
+            ids = ", ".join(str(product.get("ID")) for product in changes["dropped"][:10])
+            more = f" y {len(changes['dropped']) - 10} más" if len(changes["dropped"]) > 10 else ""
+            messagebox.showwarning("Conflicto 🧸", f"Otro equipo guardó antes productos con estos IDs: {ids}{more}.\n"
+                                                  "Se conserva su versión y la tuya no se ha guardado.", parent=self.root)
+
+    @instruments.handler()
+    def refresh_analytics(self):
+        self._analytics_after_id = self.root.after(self.ANALYTICS_REFRESH_MS, self.refresh_analytics)
+        if self.analytics.version == self._stats_version or not self.stats_label.winfo_exists():
+            return
+        self._stats_version = self.analytics.version
+        stats = self.analytics.snapshot()
+        self.stats_label.config(text=f"💰 Valor total: {stats['value']:,.2f}\n"
+                                     f"📦 Productos: {stats['products']:,}\n"
+                                     f"🧮 Unidades: {stats['units']:,}")
+        self.top_value_list.delete(0, tk.END)
+        for value, key in stats["top"]:
+            row = self.store.row(key)
+            if row is not None:
+                self.top_value_list.insert(tk.END, f"{value:,.2f}  ·  {row[1]} ({row[0]})")
+        self.low_stock_label.config(text=f"⚠️ Poco stock (≤ {LOW_STOCK}): {stats['low_stock_count']:,}")
+        self.low_stock_list.delete(0, tk.END)
+        for key in stats["low_stock"]:
+            row = self.store.row(key)
+            if row is not None:
+                self.low_stock_list.insert(tk.END, f"{row[2]} uds  ·  {row[1]} ({row[0]})")
+
+    @instruments.handler()
     def populate_treeview(self):
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        # Insert items from inventory
-        for product in self.inventory:
-             # Use .get with defaults for safety
-            pid = product.get("ID", "")
-            name = product.get("Nombre", "")
-            qty = product.get("Cantidad", 0)
-            price = product.get("Precio", 0.0)
-            self.tree.insert("", "end", values=(pid, name, qty, price))
+        # Show every product; rows are store keys rendered on demand
+        self.shown_keys = None
+        self.table.set_rows(*self.sorted_rows(None))
+        instruments.count(rows=len(self.store))
+
+    def sorted_rows(self, keys):
+        # (rows, live) for the table: keys (None = every product) in the current sort order
+        if not self.sort_spec:
+            return (self.store.keys() if keys is None else keys), False
+        if keys is not None:
+            keys = [key for key in keys if self.store.has_key(key)] # Drop rows deleted since the search
+            return sort_keys(self.store, keys, self.sort_spec), False
+        # Every product: read through a sort index kept up to date by the store listener
+        field = self.sort_spec[0][0]
+        if field not in self.sort_indexes:
+            self.sort_indexes[field] = SortIndex(self.store, field)
+        return SortedView(self.store, self.sort_indexes, self.sort_spec), True
+
+    def close_sort_indexes(self):
+        for index in self.sort_indexes.values():
+            index.close()
+        self.sort_indexes = {}
+
+    def on_heading_click(self, event):
+        if self.tree.identify_region(event.x, event.y) != "heading":
+            return
+        column = self.tree.identify_column(event.x) # "#1".."#4"
+        field = self.tree["columns"][int(column[1:]) - 1]
+        self.sort_by(field, extend=bool(event.state & 0x0001)) # Shift held
+
+    @instruments.handler()
+    def sort_by(self, field, extend=False):
+        # A plain click sorts by field alone, reversing it if it already was; Shift+click
+        # reverses field within the current keys or appends it as the last key
+        spec = list(self.sort_spec)
+        if not extend and [f for f, _ in spec] != [field]:
+            spec = []
+        fields = [f for f, _ in spec]
+        if field in fields:
+            i = fields.index(field)
+            spec[i] = (field, not spec[i][1])
+        else:
+            spec.append((field, False))
+        self.sort_spec = spec
+        for column in self.tree["columns"]:
+            text = column
+            for i, (f, descending) in enumerate(spec):
+                if f == column:
+                    text += " ▼" if descending else " ▲"
+                    if len(spec) > 1:
+                        text += str(i + 1)
+            self.tree.heading(column, text=text)
+        self.table.reorder(*self.sorted_rows(self.shown_keys))
+
+    def product_row_values(self, key):
+        # Read straight from the store's columns, no product dict is built
+        values = self.store.row(key)
+        if values is None: # Deleted by another thread since the rows were set
+            return ("", "", "", "")
+        return values
 
 
     def show_profile_image(self):
@@ -386,34 +551,25 @@ class InventoryApp:
             self.profile_image_label.pack(pady=5, padx=5)
 
 
+    @instruments.handler()
     def add_product(self):
         product_id = self.entry_id.get()
         name = self.entry_name.get()
         quantity_str = self.entry_quantity.get()
         price_str = self.entry_price.get()
 
-        if not product_id or not name or not quantity_str or not price_str:
-            messagebox.showerror("Error 💖", "¡Todos los campos son necesarios!")
-            return
-
-        # Validate if product ID already exists
-        if any(p.get("ID") == product_id for p in self.inventory):
-             messagebox.showwarning("Aviso 🧸", f"¡El producto con ID '{product_id}' ya existe!")
-             return
-
         try:
-            quantity = int(quantity_str)
-            price = float(price_str)
-            if quantity < 0 or price < 0:
-                 messagebox.showerror("Error 💖", "¡Cantidad y precio no pueden ser negativos!")
-                 return
-        except ValueError:
-            messagebox.showerror("Error 💖", "Cantidad debe ser un número entero y Precio un número decimal")
-            return
-
-        product = {"ID": product_id, "Nombre": name, "Cantidad": quantity, "Precio": price}
-        self.inventory.append(product)
-        self.tree.insert("", "end", values=(product_id, name, quantity, price))
+            product = parse_product(product_id, name, quantity_str, price_str)
+            # Refused if the ID already exists (hash lookup)
+            key = self.inventory.add_product(product)
+        except DuplicateProductError as e:
+            messagebox.showwarning("Aviso 🧸", str(e))
+            return
+        except ProductError as e:
+            messagebox.showerror("Error 💖", str(e))
+            return
+        instruments.count(rows=1)
+        self.table.append(key)
         self.save_inventory()
 
         # Clear entries after adding
@@ -424,124 +580,254 @@ class InventoryApp:
         messagebox.showinfo("Éxito ✨", "¡Producto agregado con éxito!")
 
 
-    def search_product(self):
-        query = self.entry_search.get().strip().lower()
+    @instruments.handler()
+    def search_product(self, live=False):
+        query = self.entry_search.get()
 
-        # Clear the table before showing results
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Filter products by ID or Name (case- and accent-insensitive) using the index
+        matches = self.search_index.search(query)
+        instruments.count(rows=len(matches))
 
-        found = False
-        # Filter products by ID or Name (case-insensitive)
-        for product in self.inventory:
-            product_id = str(product.get("ID", "")).lower() # Ensure ID is string for comparison
-            product_name = product.get("Nombre", "").lower()
-            if query in product_id or query in product_name:
-                self.tree.insert("", "end", values=(product.get("ID", ""), product.get("Nombre", ""), product.get("Cantidad", 0), product.get("Precio", 0.0)))
-                found = True
+        # Replace the table rows with the results, in the current sort order
+        self.shown_keys = matches
+        self.shown_query = query
+        self.table.set_rows(*self.sorted_rows(matches))
 
-        # Show message if no results found
-        if not found:
+        # Show message if no results found (not while typing)
+        if not matches and not live:
             messagebox.showinfo("Sin resultados ☁️", "No se encontraron productos que coincidan.")
             # Optionally repopulate with all items if search is cleared?
             # if not query: self.populate_treeview()
 
+    def schedule_live_search(self, event=None):
+        if event is not None and event.keysym == "Return":
+            return # Enter already searched
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(self.SEARCH_DEBOUNCE_MS, self.live_search)
 
+    def live_search(self):
+        self._search_after_id = None
+        query = self.entry_search.get().strip()
+        if query and len(query) < SearchIndex.MIN_QUERY:
+            return # Too short for the index; Enter/Buscar still searches
+        self.search_product(live=True)
+
+
+    @instruments.handler()
     def save_inventory(self):
         try:
-            with open(self.inventory_file, "w", encoding="utf-8") as f:
-                json.dump(self.inventory, f, ensure_ascii=False, indent=4)
+            written = self.inventory.save()
+            if self.storage_mode == "sqlite":
+                instruments.count(rows=written) # SQLite reports rows, the files bytes
+            else:
+                instruments.count(written=written)
         except Exception as e:
              print(f"Error saving inventory to {self.inventory_file}: {e}")
              messagebox.showerror("Error Guardando Inventario", f"No se pudo guardar el archivo de inventario: {e}")
 
 
+    @instruments.handler()
     def send_inventory(self):
         # Simple placeholder for IP - ideally use a config or prompt
         host = simpledialog.askstring("Enviar Inventario", "Introduce la IP de destino:", parent=self.root)
         if not host: return # User cancelled
-        port = 12345 # Keep port consistent
-
-        try:
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(5) # Add a timeout
-                s.connect((host, port))
-                data = json.dumps(self.inventory).encode("utf-8")
-                s.sendall(data)
+        port = DEFAULT_PORT
+
+        def work(job):
+            # Products are encoded as they are built; only the compressed message is held
+            total = len(self.store)
+
+            def counted():
+                for count, product in enumerate(self.inventory.iter_products(), 1):
+                    yield product
+                    if count % CHUNK_SIZE == 0:
+                        job.check_cancelled()
+                        job.progress(count, total)
+            try:
+                result = send_inventory(host, counted(), port)
+            except socket.timeout:
+                raise ConnectionError(f"Tiempo de espera agotado al conectar con {host}") from None
+            job.progress(total, total)
+            return result
+
+        def finish(job):
+            if job.status != "done":
+                return
+            if job.result is not None:
+                messagebox.showinfo("Éxito ✨", f"Inventario enviado a {host}: {job.result['added']} productos nuevos, "
+                                               f"{job.result['duplicates']} ya existían.")
+            else: # Older versions close without replying
                 messagebox.showinfo("Éxito ✨", f"Inventario enviado a {host}")
-        except socket.timeout:
-             messagebox.showerror("Error de Red 🔌", f"Tiempo de espera agotado al conectar con {host}")
-        except Exception as e:
-            messagebox.showerror("Error de Red 🔌", f"Error al enviar inventario a {host}: {e}")
 
+        self.run_job(f"📡 Enviando a {host}", work, "Error de Red 🔌", on_finish=finish)
 
-    def receive_inventory(self):
-        host = "0.0.0.0"  # Listen on all interfaces
-        port = 12345
-
-        # Run receiving part in a separate thread to avoid blocking UI
-        def receive_thread():
-            try:
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    s.bind((host, port))
-                    s.listen(1)
-                    print(f"Esperando conexión en el puerto {port}...") # Log to console
-                    # Show non-blocking message
-                    # messagebox.showinfo("Esperando...", f"Esperando conexión en el puerto {port}...", parent=self.root) # This might still block a bit
-
-                    conn, addr = s.accept()
-                    print(f"Conexión aceptada desde {addr}")
-                    with conn:
-                        data = b""
-                        while True: # Loop to receive potentially large data
-                            chunk = conn.recv(4096) # Receive in chunks
-                            if not chunk:
-                                break
-                            data += chunk
-
-                        if not data:
-                             print("No data received.")
-                             # Use thread-safe message box if needed, or update status bar
-                             # messagebox.showwarning("Recepción", "No se recibieron datos.", parent=self.root)
-                             return
-
-                        received_inventory = json.loads(data.decode("utf-8"))
-                        print(f"Inventario recibido: {len(received_inventory)} items.")
-
-                        # Update inventory and UI (needs to be thread-safe if modifying UI directly)
-                        # For simplicity, append and save, then refresh UI from main thread if needed
-                        new_items_count = 0
-                        for product in received_inventory:
-                             # Basic validation of received product structure
-                             if isinstance(product, dict) and "ID" in product and "Nombre" in product:
-                                 # Optional: Check for duplicates or merge logic here
-                                 self.inventory.append(product)
-                                 new_items_count += 1
-                             else:
-                                 print(f"Skipping invalid product data received: {product}")
-
-                        if new_items_count > 0:
-                            self.save_inventory()
-                            # Schedule UI update from the main thread
-                            self.root.after(0, self.populate_treeview)
-                            self.root.after(0, lambda: messagebox.showinfo("Éxito ✨", f"{new_items_count} productos recibidos correctamente.", parent=self.root))
-                        else:
-                             self.root.after(0, lambda: messagebox.showwarning("Recepción", "Se recibieron datos, pero no contenían productos válidos.", parent=self.root))
 
+    @instruments.handler()
+    def receive_inventory(self):
+        # Starts (or stops) the inventory server: it keeps accepting pushes, reads and syncs
+        # from any number of instances until it is stopped or the app closes
+        if self.inventory_server is not None and self.inventory_server.running:
+            self.inventory_server.stop()
+            self.network_refresh() # Rows for changes received since the last refresh
+            self.inventory_server = None
+            self.receive_button.config(text="🛰️ Recibir por Red")
+            messagebox.showinfo("Recepción", "Servidor de inventario detenido.", parent=self.root)
+            return
 
-            except Exception as e:
-                print(f"Error al recibir el inventario: {e}")
-                # Schedule error message from the main thread
-                self.root.after(0, lambda: messagebox.showerror("Error de Red 🔌", f"Error al recibir inventario: {e}", parent=self.root))
+        # The servers pull in asyncio; imported on first use to keep startup fast
+        from inventory_server import InventoryServer
+        server = InventoryServer(self.store, port=DEFAULT_PORT, on_change=self.schedule_network_refresh,
+                                 sync_index=self.inventory.get_sync_index(), track_changes=True)
+        try:
+            server.start()
+        except OSError as e:
+            messagebox.showerror("Error de Red 🔌", f"No se pudo abrir el puerto {server.port}: {e}", parent=self.root)
+            return
+        self.inventory_server = server
+        self.receive_button.config(text="🛑 Dejar de Recibir")
+        messagebox.showinfo("Recibiendo...", f"Servidor de inventario activo en el puerto {server.port}.\n"
+                            "Otros equipos pueden enviar o sincronizar sin volver a pulsar este botón.", parent=self.root)
+
+    def schedule_network_refresh(self):
+        # Called from the server's threads; changes from many clients are saved and shown once
+        if self._network_refresh_pending:
+            return
+        self._network_refresh_pending = True
+        self.root.after(0, self.network_refresh)
 
-        import threading
-        # Show immediate feedback that listening has started
-        messagebox.showinfo("Recibiendo...", f"Escuchando en el puerto {port}...\nLa aplicación puede parecer no responder mientras espera.", parent=self.root)
-        threading.Thread(target=receive_thread, daemon=True).start()
+    @instruments.handler()
+    def network_refresh(self):
+        self._network_refresh_pending = False
+        self.save_inventory()
+        changes = self.inventory_server.take_changes() if self.inventory_server is not None else None
+        if changes:
+            self.show_external_changes(changes["added"], changes["removed"])
+        if self.inventory_server is not None:
+            self.job_label.config(text=f"Servidor: {len(self.store)} productos, "
+                                       f"{self.inventory_server.requests} mensajes recibidos.")
+
+    @instruments.handler()
+    def sync_inventory(self):
+        # Two-way sync with an instance listening in "Recibir por Red"; both end up with the same products
+        host = simpledialog.askstring("Sincronizar Inventario", "Introduce la IP del otro equipo:", parent=self.root)
+        if not host: return # User cancelled
+        port = DEFAULT_PORT
+
+        def work(job):
+            stats = sync_with(host, self.inventory.get_sync_index(), port)
+            job.progress(stats["changed"])
+            return stats
+
+        def finish(job):
+            if job.status != "done":
+                return
+            stats = job.result
+            print(f"Sincronización con {host}: {stats}")
+            if stats["added"] or stats["removed"]:
+                self.save_inventory()
+                self.populate_treeview()
+            if stats["changed"]:
+                messagebox.showinfo("Éxito ✨", f"Sincronizado con {host}: {stats['changed']} productos distintos, "
+                                               f"{stats['added']} actualizados o añadidos, {stats['removed']} copias antiguas o repetidas eliminadas.")
+            else:
+                messagebox.showinfo("Éxito ✨", f"El inventario ya estaba sincronizado con {host}.")
+
+        self.run_job("Sincronizando", work, "Error de Red 🔌", on_finish=finish)
+
+    # --- Background jobs ---
+    def run_job(self, title, work, error_title, on_chunk=None, on_finish=None):
+        # Starts work in a worker thread; on_finish(job) runs on the UI thread whatever the outcome
+        if self.jobs.busy:
+            messagebox.showwarning("Aviso 🧸", "Ya hay una tarea en curso. Espera a que termine o cancélala.")
+            return None
+
+        def progress(job):
+            if job.total:
+                self.job_progress.stop()
+                self.job_progress.config(mode="determinate", maximum=job.total, value=job.done)
+            self.job_label.config(text=f"{title}: {job.done} filas...")
+
+        def finished(job, status_text):
+            # The work itself ran in a thread; its time goes in as "job: <title>"
+            instruments.record(f"job: {title}", job.elapsed, rows=job.done, failed=job.status == "error")
+            self.job_progress.stop()
+            self.job_progress.config(mode="determinate", maximum=100, value=0)
+            self.job_cancel_button.config(state="disabled")
+            self.job_label.config(text=status_text)
+            self.current_job = None
+            if on_finish:
+                on_finish(job)
+
+        def done(job, result):
+            finished(job, f"{title}: {job.done} filas en {job.elapsed:.1f}s ({job.rows_per_second:,.0f} filas/s) ✨")
+
+        def cancelled(job):
+            finished(job, f"{title}: cancelado tras {job.done} filas.")
+
+        def error(job, e):
+            finished(job, f"{title}: error.")
+            if isinstance(e, InventoryFormatError):
+                messagebox.showerror(error_title, str(e))
+            elif isinstance(e, json.JSONDecodeError):
+                messagebox.showerror(error_title, f"El archivo JSON no es válido ({e}).")
+            else:
+                messagebox.showerror(error_title, f"No se pudo completar la tarea: {e}")
+
+        self.job_label.config(text=f"{title}...")
+        self.job_progress.config(mode="indeterminate")
+        self.job_progress.start()
+        self.job_cancel_button.config(state="normal")
+        self.current_job = self.jobs.start(title, work, on_progress=progress, on_chunk=on_chunk,
+                                           on_done=done, on_error=error, on_cancel=cancelled)
+        return self.current_job
+
+    def cancel_job(self):
+        if self.current_job is not None:
+            self.current_job.cancel()
+            self.job_label.config(text="Cancelando...")
+
+    def import_products_job(self, title, work, error_title, source):
+        # Shared by the Excel/JSON imports: chunks are committed to the store as they arrive
+        counts = {"imported": 0, "duplicates": 0}
+
+        @instruments.handler("import_chunk")
+        def commit_chunk(job, products):
+            new_keys, duplicates = self.inventory.add_new(products)
+            counts["imported"] += len(new_keys)
+            counts["duplicates"] += duplicates
+            instruments.count(rows=len(products))
+            self.show_new_keys(new_keys) # Only search matches, in the current sort order
+            if self.storage_mode != "json":
+                self.inventory.save() # One journal write / SQLite transaction per chunk; json rewrites once at the end
+
+        def finish(job):
+            if counts["imported"]:
+                self.save_inventory()
+            if job.status == "error":
+                return
+            skipped = counts["duplicates"] + (job.result or {}).get("skipped", 0)
+            info_message = f"¡{counts['imported']} productos importados desde {source}!"
+            if job.status == "cancelled":
+                info_message = f"Importación cancelada. {counts['imported']} productos ya importados se conservan."
+            if skipped > 0:
+                info_message += f"\n({skipped} filas omitidas por datos faltantes, inválidos o duplicados)."
+            filtered = (job.result or {}).get("filtered", 0)
+            if filtered > 0:
+                info_message += f"\n({filtered} filas no cumplían el filtro.)"
+            reports = (job.result or {}).get("files")
+            if reports:
+                lines = [describe_report(report) for report in reports]
+                if len(lines) > self.IMPORT_REPORT_LINES:
+                    lines = lines[:self.IMPORT_REPORT_LINES] + [f"... y {len(lines) - self.IMPORT_REPORT_LINES} archivos más (detalle en la consola)"]
+                info_message += "\n\n" + "\n".join(lines)
+            messagebox.showinfo("Éxito ✨", info_message)
 
+        self.run_job(title, work, error_title, on_chunk=commit_chunk, on_finish=finish)
 
+    @instruments.handler()
     def export_to_excel(self):
-        if not self.inventory:
+        if not self.store:
             messagebox.showwarning("Aviso 🧸", "¡El inventario está vacío, no hay nada que exportar!")
             return
 
@@ -549,132 +835,107 @@ class InventoryApp:
         if not file_path:
             return
 
-        try:
-            df = pd.DataFrame(self.inventory)
-            df.to_excel(file_path, index=False)
-            messagebox.showinfo("Éxito ✨", "¡Inventario exportado a Excel!")
-        except Exception as e:
-             messagebox.showerror("Error Exportando 📄", f"No se pudo exportar a Excel: {e}")
+        summary = messagebox.askyesno("Exportar Excel 📊", "¿Añadir una hoja de resumen por nombre (productos, unidades y valor)?")
 
+        def finish(job):
+            if job.status == "done":
+                sheets = job.result["sheets"]
+                extra = f"\n(Más de {EXCEL_MAX_ROWS - 1} filas: repartido en {sheets} hojas.)" if sheets > 1 else ""
+                messagebox.showinfo("Éxito ✨", f"¡Inventario exportado a Excel!{extra}")
 
+        # Rows are streamed from the store to disk, so the UI stays responsive and memory flat
+        self.run_job("📤 Exportando Excel", excel_export_job(file_path, self.store, summary=summary), "Error Exportando 📄", on_finish=finish)
+
+
+    @instruments.handler()
     def export_to_json(self):
-        if not self.inventory:
+        if not self.store:
             messagebox.showwarning("Aviso 🧸", "¡El inventario está vacío, no hay nada que exportar!")
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Archivos JSON", "*.json")])
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Archivos JSON", "*.json"), ("JSON Lines", "*.jsonl")])
         if not file_path:
             return
 
-        try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                json.dump(self.inventory, f, ensure_ascii=False, indent=4)
-            messagebox.showinfo("Éxito ✨", "¡Inventario exportado a JSON!")
-        except Exception as e:
-             messagebox.showerror("Error Exportando 📄", f"No se pudo exportar a JSON: {e}")
+        def finish(job):
+            if job.status == "done":
+                messagebox.showinfo("Éxito ✨", "¡Inventario exportado a JSON!")
 
+        # Products are built and written one at a time (JSON Lines for .jsonl)
+        work = json_export_job(file_path, self.inventory.iter_products(), total=len(self.store))
+        self.run_job("📤 Exportando JSON", work, "Error Exportando 📄", on_finish=finish)
 
+
+    @instruments.handler()
     def import_from_excel(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Archivos Excel", "*.xlsx")])
-        if not file_path:
+        file_paths = filedialog.askopenfilenames(filetypes=[("Archivos Excel", "*.xlsx")])
+        if not file_paths:
+            return
+        if len(file_paths) > 1:
+            self.import_many_files(file_paths, "Excel")
             return
 
-        try:
-            df = pd.read_excel(file_path)
-            imported_count = 0
-            skipped_count = 0
-            # Basic validation of columns
-            required_cols = ["ID", "Nombre", "Cantidad", "Precio"]
-            if not all(col in df.columns for col in required_cols):
-                 messagebox.showerror("Error Importando 📄", f"El archivo Excel debe contener las columnas: {', '.join(required_cols)}")
-                 return
-
-            for _, row in df.iterrows():
-                 # Check for NaN or missing values before conversion
-                 if pd.isna(row["ID"]) or pd.isna(row["Nombre"]) or pd.isna(row["Cantidad"]) or pd.isna(row["Precio"]):
-                     print(f"Skipping row due to missing data: {row.to_dict()}")
-                     skipped_count += 1
-                     continue
+        # Parsing and validation run in a worker; validated rows are committed in chunks
+        work = excel_import_job(file_paths[0], self.store.ids())
+        self.import_products_job("📥 Importando Excel", work, "Error Importando 📄", "Excel")
 
-                 try:
-                     product = {
-                         "ID": str(row["ID"]), # Ensure ID is string
-                         "Nombre": str(row["Nombre"]),
-                         "Cantidad": int(row["Cantidad"]),
-                         "Precio": float(row["Precio"])
-                     }
-                     # Optional: Add check for duplicates before appending
-                     if not any(p.get("ID") == product["ID"] for p in self.inventory):
-                         self.inventory.append(product)
-                         self.tree.insert("", "end", values=(product["ID"], product["Nombre"], product["Cantidad"], product["Precio"]))
-                         imported_count += 1
-                     else:
-                          print(f"Skipping duplicate ID from Excel: {product['ID']}")
-                          skipped_count +=1
-
-                 except ValueError:
-                     print(f"Skipping row due to invalid data type (Cantidad/Precio): {row.to_dict()}")
-                     skipped_count += 1
-                     continue
-
-            self.save_inventory() # Save after importing all valid rows
-            info_message = f"¡{imported_count} productos importados desde Excel!"
-            if skipped_count > 0:
-                 info_message += f"\n({skipped_count} filas omitidas por datos faltantes, inválidos o duplicados)."
-            messagebox.showinfo("Éxito ✨", info_message)
 
-        except Exception as e:
-            messagebox.showerror("Error Importando 📄", f"No se pudo importar el archivo Excel: {e}")
+    @instruments.handler()
+    def import_from_json(self):
+        file_paths = filedialog.askopenfilenames(filetypes=[("Archivos JSON", "*.json"), ("JSON Lines", "*.jsonl")])
+        if not file_paths:
+            return
+        if len(file_paths) > 1:
+            self.import_many_files(file_paths, "JSON")
+            return
 
+        # The file is parsed incrementally in a worker and committed batch by batch
+        self.import_products_job("📥 Importando JSON", json_import_job(file_paths[0]), "Error Importando 📄", "JSON")
 
-    def import_from_json(self):
-        file_path = filedialog.askopenfilename(filetypes=[("Archivos JSON", "*.json")])
+
+    def import_many_files(self, file_paths, source):
+        # Each file is parsed in its own process; the results are merged in name order
+        work = parallel_import_job(file_paths, self.store.ids())
+        self.import_products_job(f"📥 Importando {len(file_paths)} archivos {source}", work, "Error Importando 📄",
+                                 f"{len(file_paths)} archivos {source}")
+
+
+    @instruments.handler()
+    def export_to_columnar(self):
+        if not self.store:
+            messagebox.showwarning("Aviso 🧸", "¡El inventario está vacío, no hay nada que exportar!")
+            return
+
+        file_path = filedialog.asksaveasfilename(defaultextension=".parquet", filetypes=COLUMNAR_FILETYPES)
         if not file_path:
             return
 
+        def finish(job):
+            if job.status == "done":
+                messagebox.showinfo("Éxito ✨", f"¡Inventario exportado a {os.path.basename(file_path)}!")
+
+        # Typed columns written in blocks straight from the store (needs pyarrow)
+        self.run_job("📤 Exportando Parquet/Arrow", columnar_export_job(file_path, self.store), "Error Exportando 📄", on_finish=finish)
+
+
+    @instruments.handler()
+    def import_from_columnar(self):
+        file_path = filedialog.askopenfilename(filetypes=COLUMNAR_FILETYPES)
+        if not file_path:
+            return
+        where = simpledialog.askstring("Filtro (opcional)", "Importar solo las filas que cumplan, p. ej. Cantidad > 0 y Precio <= 10\n"
+                                       "(déjalo vacío para importarlas todas):", parent=self.root)
+        if where is None:
+            return # User cancelled
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                if not isinstance(data, list):
-                     messagebox.showerror("Error Importando 📄", "El archivo JSON debe contener una lista de productos.")
-                     return
-
-                imported_count = 0
-                skipped_count = 0
-                for product in data:
-                    # Basic validation
-                    if isinstance(product, dict) and "ID" in product and "Nombre" in product and "Cantidad" in product and "Precio" in product:
-                         # Ensure types are correct if possible, or handle potential errors
-                         try:
-                             product["ID"] = str(product["ID"])
-                             product["Cantidad"] = int(product["Cantidad"])
-                             product["Precio"] = float(product["Precio"])
-
-                             # Optional: Add check for duplicates before appending
-                             if not any(p.get("ID") == product["ID"] for p in self.inventory):
-                                 self.inventory.append(product)
-                                 self.tree.insert("", "end", values=(product["ID"], product["Nombre"], product["Cantidad"], product["Precio"]))
-                                 imported_count += 1
-                             else:
-                                 print(f"Skipping duplicate ID from JSON: {product['ID']}")
-                                 skipped_count += 1
-                         except (ValueError, TypeError) as type_err:
-                              print(f"Skipping product due to invalid data type in JSON: {product} - {type_err}")
-                              skipped_count += 1
-                    else:
-                         print(f"Skipping invalid product structure in JSON: {product}")
-                         skipped_count += 1
-
-            self.save_inventory() # Save after processing the file
-            info_message = f"¡{imported_count} productos importados desde JSON!"
-            if skipped_count > 0:
-                 info_message += f"\n({skipped_count} productos omitidos por estructura inválida, tipos de datos incorrectos o duplicados)."
-            messagebox.showinfo("Éxito ✨", info_message)
+            clauses = parse_where(where) if where.strip() else ()
+        except ValueError as e:
+            messagebox.showerror("Error Importando 📄", str(e))
+            return
 
-        except json.JSONDecodeError:
-             messagebox.showerror("Error Importando 📄", "El archivo JSON no es válido.")
-        except Exception as e:
-            messagebox.showerror("Error Importando 📄", f"No se pudo importar el archivo JSON: {e}")
+        # Only the product columns are read and the filter runs while reading
+        self.import_products_job("📥 Importando Parquet/Arrow", columnar_import_job(file_path, clauses),
+                                 "Error Importando 📄", os.path.basename(file_path))
 
 
     def show_change_password_screen(self):
@@ -700,6 +961,7 @@ class InventoryApp:
         ttk.Button(self.change_password_frame, text="Cambiar", command=self.change_password, bootstyle=SUCCESS).grid(row=3, column=0, columnspan=2, pady=10)
 
 
+    @instruments.handler()
     def change_password(self):
         current_password = self.entry_current_password.get()
         new_password = self.entry_new_password_change.get() # Use correct variable name
@@ -709,7 +971,7 @@ class InventoryApp:
             messagebox.showerror("Error 🔑", "¡Todos los campos son obligatorios!", parent=self.change_password_window)
             return
 
-        if self.hash_password(current_password) != self.users[self.current_user]["password"]:
+        if self.users.authenticate(self.current_user, current_password) is None:
             messagebox.showerror("Error 🔑", "La contraseña actual es incorrecta", parent=self.change_password_window)
             return
 
@@ -719,36 +981,33 @@ class InventoryApp:
 
         # Optional: Add password strength check here
 
-        self.users[self.current_user]["password"] = self.hash_password(new_password)
-        self.save_users()
+        try:
+            self.users.change_password(self.current_user, current_password, new_password)
+        except UserError as e:
+            messagebox.showerror("Error 🔑", str(e), parent=self.change_password_window)
+            return
         messagebox.showinfo("Éxito ✨", "Contraseña cambiada correctamente", parent=self.change_password_window)
         self.change_password_window.destroy()
 
 
+    @instruments.handler()
     def delete_selected_products(self):
-        selected_items = self.tree.selection()
-        if not selected_items:
+        # Selection is tracked by store key, including rows scrolled out of view
+        selected_keys = self.table.selected_keys()
+        if not selected_keys:
             messagebox.showwarning("Aviso 🧸", "¡Selecciona uno o más productos para eliminar!", parent=self.root)
             return
 
-        confirm = messagebox.askyesno("Confirmar Eliminación 🗑️", f"¿Seguro que quieres eliminar {len(selected_items)} producto(s) seleccionados?", parent=self.root)
+        confirm = messagebox.askyesno("Confirmar Eliminación 🗑️", f"¿Seguro que quieres eliminar {len(selected_keys)} producto(s) seleccionados?", parent=self.root)
         if not confirm:
             return
 
-        ids_to_delete = []
-        for item in selected_items:
-            values = self.tree.item(item, "values")
-            if values: # Ensure values exist
-                 ids_to_delete.append(values[0]) # Get the ID (first column)
+        # Each selected row is removed from the store in O(1)
+        deleted_count = self.store.remove_many(selected_keys)
+        instruments.count(rows=deleted_count)
 
-        # Filter out the inventory based on IDs
-        original_count = len(self.inventory)
-        self.inventory = [product for product in self.inventory if product.get("ID") not in ids_to_delete]
-        deleted_count = original_count - len(self.inventory)
-
-        # Remove from treeview
-        for item in selected_items:
-            self.tree.delete(item)
+        # Remove from the table
+        self.table.remove_keys(selected_keys)
 
         if deleted_count > 0:
             self.save_inventory()
@@ -777,6 +1036,7 @@ class InventoryApp:
         ttk.Button(self.delete_user_frame, text="Borrar", command=self.delete_user, bootstyle=DANGER).grid(row=1, column=0, columnspan=2, pady=10)
 
 
+    @instruments.handler()
     def delete_user(self):
         user_to_delete = self.entry_delete_user.get()
 
@@ -784,24 +1044,106 @@ class InventoryApp:
              messagebox.showerror("Error 👤", "Introduce el nombre de usuario a borrar.", parent=self.delete_user_window)
              return
 
-        if user_to_delete == "admin":
-            messagebox.showerror("Error 👤", "¡No puedes borrar al usuario administrador!", parent=self.delete_user_window)
+        if user_to_delete == "admin" or user_to_delete not in self.users:
+            try:
+                self.users.delete(user_to_delete) # Refuses with the reason
+            except UserError as e:
+                messagebox.showerror("Error 👤", str(e), parent=self.delete_user_window)
             return
 
-        if user_to_delete in self.users:
-            confirm = messagebox.askyesno("Confirmar Borrado 👤", f"¿Estás seguro de que quieres borrar al usuario '{user_to_delete}'? Esta acción no se puede deshacer.", parent=self.delete_user_window)
-            if confirm:
-                del self.users[user_to_delete]
-                self.save_users()
-                messagebox.showinfo("Éxito ✨", f"Usuario '{user_to_delete}' borrado correctamente.", parent=self.delete_user_window)
-                self.delete_user_window.destroy()
-        else:
-            messagebox.showerror("Error 👤", f"El usuario '{user_to_delete}' no existe.", parent=self.delete_user_window)
+        confirm = messagebox.askyesno("Confirmar Borrado 👤", f"¿Estás seguro de que quieres borrar al usuario '{user_to_delete}'? Esta acción no se puede deshacer.", parent=self.delete_user_window)
+        if confirm:
+            self.users.delete(user_to_delete)
+            messagebox.showinfo("Éxito ✨", f"Usuario '{user_to_delete}' borrado correctamente.", parent=self.delete_user_window)
+            self.delete_user_window.destroy()
 
 
+    # --- Debug window: handler timings and profiles ---
+    DEBUG_REFRESH_MS = 1000
+    DEBUG_COLUMNS = ("Manejador", "Llamadas", "Media ms", "p50 ms", "p90 ms", "p99 ms", "Máx ms", "Bytes", "Filas", "Errores")
+
+    def open_debug_window(self):
+        if self.debug_window is not None and self.debug_window.winfo_exists():
+            self.debug_window.lift()
+            return
+        self.debug_window = ttk.Toplevel(self.root)
+        self.debug_window.title("🐞 Rendimiento 🐞")
+        frame = ttk.Frame(self.debug_window, padding=(10, 10), style='TFrame')
+        frame.pack(expand=True, fill=tk.BOTH)
+        frame.grid_columnconfigure(0, weight=1)
+        frame.grid_rowconfigure(1, weight=1)
+        frame.grid_rowconfigure(3, weight=1)
+
+        controls = ttk.Frame(frame, style='TFrame')
+        controls.grid(row=0, column=0, sticky='ew')
+        self.debug_enabled_var = tk.BooleanVar(value=instruments.enabled)
+        ttk.Checkbutton(controls, text="Medir", variable=self.debug_enabled_var, command=self.toggle_instruments).pack(side=tk.LEFT, padx=5)
+        ttk.Label(controls, text="Perfilar con cProfile:").pack(side=tk.LEFT, padx=(15, 5))
+        self.debug_profile_combo = ttk.Combobox(controls, state="readonly", width=28)
+        self.debug_profile_combo.pack(side=tk.LEFT)
+        self.debug_profile_combo.bind("<<ComboboxSelected>>", self.choose_profiled_handler)
+        ttk.Button(controls, text="Reiniciar", command=self.reset_instruments, bootstyle=WARNING).pack(side=tk.LEFT, padx=5)
+        ttk.Button(controls, text="Guardar JSON", command=self.dump_instruments, bootstyle=PRIMARY).pack(side=tk.LEFT, padx=5)
+
+        self.debug_tree = ttk.Treeview(frame, columns=self.DEBUG_COLUMNS, show="headings", height=12, bootstyle=INFO)
+        for column in self.DEBUG_COLUMNS:
+            self.debug_tree.heading(column, text=column)
+            self.debug_tree.column(column, width=180 if column == "Manejador" else 75, anchor='w' if column == "Manejador" else 'e')
+        self.debug_tree.grid(row=1, column=0, sticky='nsew', pady=5)
+        ttk.Label(frame, text="Perfil (tiempo acumulado):").grid(row=2, column=0, sticky='w')
+        self.debug_profile_text = tk.Text(frame, height=14, width=110, font=("Courier", 9), state="disabled")
+        self.debug_profile_text.grid(row=3, column=0, sticky='nsew')
+        self.refresh_debug_window()
+
+    def toggle_instruments(self):
+        instruments.enabled = self.debug_enabled_var.get()
+
+    def choose_profiled_handler(self, event=None):
+        name = self.debug_profile_combo.get()
+        instruments.profile_name = None if name == "(ninguno)" else name
+
+    def reset_instruments(self):
+        instruments.reset()
+        self.refresh_debug_window(reschedule=False)
+
+    def dump_instruments(self):
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")], parent=self.debug_window)
+        if not path:
+            return
+        try:
+            instruments.dump(path)
+        except OSError as e:
+            messagebox.showerror("Error 💖", f"No se pudo guardar el informe: {e}", parent=self.debug_window)
+
+    def refresh_debug_window(self, reschedule=True):
+        if self.debug_window is None or not self.debug_window.winfo_exists():
+            self.debug_window = None
+            return
+        snapshot = instruments.snapshot()
+        self.debug_tree.delete(*self.debug_tree.get_children())
+        for name, stats in snapshot.items():
+            latency = stats["latency_ms"]
+            self.debug_tree.insert("", "end", values=(name, latency["count"], f"{latency['mean']:.2f}",
+                                                      f"{latency['p50']:.2f}", f"{latency['p90']:.2f}",
+                                                      f"{latency['p99']:.2f}", f"{latency['max']:.2f}",
+                                                      f"{stats['bytes']['total']:,}", f"{stats['rows']['total']:,}",
+                                                      stats["errors"]))
+        # Handlers appear in the list once they have run with "Medir" on
+        self.debug_profile_combo.config(values=["(ninguno)"] + [name for name in snapshot if not name.startswith("job: ")])
+        text = instruments.profile_text(instruments.profile_name) if instruments.profile_name else ""
+        text = text or "Elige un manejador para perfilar sus próximas llamadas."
+        if text != self.debug_profile_text.get("1.0", "end-1c"): # Rewriting would reset the scroll
+            self.debug_profile_text.config(state="normal")
+            self.debug_profile_text.delete("1.0", tk.END)
+            self.debug_profile_text.insert(tk.END, text)
+            self.debug_profile_text.config(state="disabled")
+        if reschedule:
+            self.root.after(self.DEBUG_REFRESH_MS, self.refresh_debug_window)
+
     def open_chat_window(self):
         self.chat_window = ttk.Toplevel(self.root)
         self.chat_window.title("💬 Chat Kawaii 💬")
+        self.chat_window.protocol("WM_DELETE_WINDOW", self.close_chat_window) # Frees the chat port
         # Apply style to the main chat frame
         chat_main_frame = ttk.Frame(self.chat_window, padding=(10,10), style='TFrame')
         chat_main_frame.pack(expand=True, fill=tk.BOTH)
@@ -822,8 +1164,11 @@ class InventoryApp:
 
         # Add scrollbar to chat display
         chat_scrollbar = ttk.Scrollbar(chat_main_frame, orient=tk.VERTICAL, command=self.chat_display.yview)
-        self.chat_display['yscrollcommand'] = chat_scrollbar.set
         chat_scrollbar.grid(row=0, column=2, sticky='ns', pady=10, padx=(0,10))
+        # Only the latest messages are in the widget; older ones are paged in from the log when scrolling up
+        if self.chat_history is None:
+            self.chat_history = ChatHistory(self.chat_history_file)
+        self.chat_view = ChatHistoryView(self.chat_display, chat_scrollbar, self.chat_history)
 
 
         # Frame for entry and button
@@ -850,35 +1195,25 @@ class InventoryApp:
 
 
     def initialize_chat_connection(self):
-         # Simple client/server decision - prompt user?
-         # For now, try to connect as client first, if fails, start server.
-         # This is a basic approach and might need refinement.
-         import threading
+         # With an IP we join that instance's chat hub; without one this instance becomes
+         # the hub and any number of users can connect to it.
 
          def connect_as_client():
              host = simpledialog.askstring("Conectar Chat", "Introduce la IP del otro usuario (deja vacío para esperar conexión):", parent=self.chat_window)
              if host: # User entered an IP, try to connect
+                 from chat_hub import ChatClient
                  port = 12346
                  try:
                      print(f"Intentando conectar a {host}:{port}...")
-                     # self.update_chat_status("Intentando conectar...")
-                     client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                     client_socket.settimeout(5)
-                     client_socket.connect((host, port))
-                     self.chat_connection = client_socket
+                     self.chat_connection = ChatClient(host, port, on_message=self.receive_message, on_close=self.chat_disconnected)
                      print("Conectado como cliente.")
-                     # self.update_chat_status(f"Conectado a {host}")
-                     # Start receiving messages in a separate thread
-                     threading.Thread(target=self.receive_messages, daemon=True).start()
                  except socket.timeout:
                       print("Timeout al conectar como cliente.")
-                      # self.update_chat_status("Error: Timeout")
-                      messagebox.showerror("Error de Chat", "Tiempo de espera agotado al conectar.", parent=self.chat_window)
+                      self.root.after(0, lambda: messagebox.showerror("Error de Chat", "Tiempo de espera agotado al conectar.", parent=self.chat_window))
                       self.start_chat_server() # Fallback to server mode
                  except Exception as e:
                       print(f"Error al conectar como cliente: {e}")
-                      # self.update_chat_status(f"Error: {e}")
-                      messagebox.showerror("Error de Chat", f"No se pudo conectar: {e}", parent=self.chat_window)
+                      self.root.after(0, lambda: messagebox.showerror("Error de Chat", f"No se pudo conectar: {e}", parent=self.chat_window))
                       self.start_chat_server() # Fallback to server mode
              else: # User didn't enter IP, start server
                  self.start_chat_server()
@@ -888,121 +1223,81 @@ class InventoryApp:
 
 
     def start_chat_server(self):
-        def server_thread():
-            host = "0.0.0.0"
-            port = 12346
-            self.chat_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            try:
-                self.chat_socket.bind((host, port))
-                self.chat_socket.listen(1)
-                print(f"Chat server escuchando en el puerto {port}...")
-                # self.update_chat_status(f"Esperando conexión en puerto {port}...")
-                # Accept connection - this blocks the server_thread
-                conn, addr = self.chat_socket.accept()
-                self.chat_connection = conn # Store the connection socket
-                print(f"Chat conectado con {addr}")
-                # self.update_chat_status(f"Conectado con {addr[0]}")
-                # Now start listening for messages on this connection
-                self.receive_messages() # This will run in the server_thread
-            except OSError as e:
-                 print(f"Error al iniciar el servidor de chat (¿Puerto en uso?): {e}")
-                 # self.update_chat_status(f"Error al iniciar servidor: {e}")
-                 # Schedule messagebox from main thread
-                 self.root.after(0, lambda: messagebox.showerror("Error de Chat", f"No se pudo iniciar el servidor en el puerto {port}. ¿Ya está en uso?", parent=self.chat_window))
-            except Exception as e:
-                 print(f"Error inesperado en el servidor de chat: {e}")
-                 # self.update_chat_status(f"Error de servidor: {e}")
-
-
-        import threading
-        # Only start server thread if no connection exists yet
-        if not hasattr(self, 'chat_connection') or self.chat_connection is None:
-             threading.Thread(target=server_thread, daemon=True).start()
+        # Only start the hub if no connection exists yet
+        if getattr(self, 'chat_connection', None) is not None or getattr(self, 'chat_hub', None) is not None:
+            return
+        from chat_hub import ChatHub
+        port = 12346
+        hub = ChatHub(port=port, on_message=self.receive_message)
+        try:
+            hub.start()
+        except OSError as e:
+             print(f"Error al iniciar el servidor de chat (¿Puerto en uso?): {e}")
+             # Schedule messagebox from main thread
+             self.root.after(0, lambda: messagebox.showerror("Error de Chat", f"No se pudo iniciar el servidor en el puerto {port}. ¿Ya está en uso?", parent=self.chat_window))
+             return
+        self.chat_hub = hub
+        self.root.after(0, lambda: self.chat_window.title(f"💬 Chat Kawaii 💬 (esperando amiguis en el puerto {port})"))
 
 
     def send_message_event(self, event): # Handles Enter key press
         self.send_message()
 
+    @instruments.handler()
     def send_message(self):
-        if not hasattr(self, 'chat_connection') or self.chat_connection is None:
+        connection = getattr(self, 'chat_connection', None) or getattr(self, 'chat_hub', None)
+        if connection is None:
             messagebox.showwarning("Chat Desconectado ☁️", "No hay conexión activa para enviar mensajes.", parent=self.chat_window)
             return
 
         message = self.chat_entry.get()
         if message:
             try:
-                full_message = f"{self.current_user}: {message}" # Prepend username
-                self.chat_connection.sendall(full_message.encode("utf-8"))
+                connection.send(self.current_user, message) # Framed, so the receiver gets exactly this text
+                instruments.count(written=len(message.encode("utf-8")), rows=1)
                 self.display_message(f"Tú: {message}") # Display locally without username prefix
                 self.chat_entry.delete(0, tk.END)
-            except BrokenPipeError: # Handle case where other side disconnected
-                 print("Error al enviar: Conexión cerrada por el otro usuario.")
+            except OSError as e: # Other side disconnected
+                 print(f"Error al enviar: {e}")
                  messagebox.showerror("Error de Chat 🔌", "La conexión se ha cerrado.", parent=self.chat_window)
                  self.close_chat_connection()
-                 # self.update_chat_status("Desconectado")
-            except Exception as e:
-                 print(f"Error al enviar mensaje: {e}")
-                 messagebox.showerror("Error de Chat 🔌", f"No se pudo enviar el mensaje: {e}", parent=self.chat_window)
 
 
-    def receive_messages(self):
-        # This function now runs in a dedicated thread (either client or server)
-        while True:
-            try:
-                if not hasattr(self, 'chat_connection') or self.chat_connection is None:
-                     break # Exit if connection is lost/closed
-
-                message_bytes = self.chat_connection.recv(1024)
-                if not message_bytes: # Empty bytes indicate disconnection
-                    print("Chat desconectado (recv returned empty).")
-                    self.close_chat_connection()
-                    # Schedule UI update from main thread
-                    self.root.after(0, lambda: messagebox.showinfo("Chat Desconectado ☁️", "El otro usuario se ha desconectado.", parent=self.chat_window))
-                    # self.root.after(0, self.update_chat_status, "Desconectado")
-                    break
-
-                message = message_bytes.decode("utf-8")
-                if message:
-                    # Schedule display_message to run in the main UI thread
-                    self.root.after(0, self.display_message, message) # Display full message with sender name
-
-            except ConnectionResetError:
-                 print("Chat desconectado (ConnectionResetError).")
-                 self.close_chat_connection()
-                 self.root.after(0, lambda: messagebox.showinfo("Chat Desconectado ☁️", "La conexión se ha reiniciado.", parent=self.chat_window))
-                 # self.root.after(0, self.update_chat_status, "Desconectado")
-                 break
-            except Exception as e:
-                print(f"Error al recibir mensajes: {e}")
-                self.close_chat_connection()
-                # self.root.after(0, self.update_chat_status, f"Error: {e}")
-                break # Exit loop on error
+    def receive_message(self, user, text):
+        # Called from the chat client's or hub's thread
+        self.root.after(0, self.display_message, f"{user}: {text}" if user else text)
+
+    def chat_disconnected(self):
+        print("Chat desconectado.")
+        self.chat_connection = None
+        self.root.after(0, lambda: messagebox.showinfo("Chat Desconectado ☁️", "El otro usuario se ha desconectado.", parent=self.chat_window))
 
 
+    @instruments.handler()
     def display_message(self, message):
-        if hasattr(self, 'chat_display') and self.chat_display.winfo_exists():
-            self.chat_display.config(state="normal")
-            self.chat_display.insert(tk.END, message + "\\n")
-            self.chat_display.see(tk.END) # Scroll to the bottom
-            self.chat_display.config(state="disabled")
+        # Saved to the chat log and shown (scrolling to the bottom if the user was there)
+        if self.chat_view is not None and self.chat_display.winfo_exists():
+            self.chat_view.append(message)
+        elif self.chat_history is not None:
+            self.chat_history.append(message)
 
     def close_chat_connection(self):
-         if hasattr(self, 'chat_connection') and self.chat_connection:
+         if getattr(self, 'chat_connection', None) is not None:
              try:
                  self.chat_connection.close()
              except Exception as e:
                  print(f"Error al cerrar socket de chat: {e}")
              finally:
                   self.chat_connection = None
-         if hasattr(self, 'chat_socket') and self.chat_socket: # Close server socket too if it exists
-              try:
-                  self.chat_socket.close()
-              except Exception as e:
-                  print(f"Error al cerrar socket servidor de chat: {e}")
-              finally:
-                   self.chat_socket = None
+         if getattr(self, 'chat_hub', None) is not None: # Stop the hub too if this instance runs it
+              self.chat_hub.stop()
+              self.chat_hub = None
          print("Conexión de chat cerrada.")
-         # self.update_chat_status("Desconectado") # Update status if using a label
+
+    def close_chat_window(self):
+        self.close_chat_connection()
+        self.chat_view = None
+        self.chat_window.destroy()
 
     # def update_chat_status(self, status):
     #      if hasattr(self, 'chat_status_label') and self.chat_status_label.winfo_exists():
@@ -1015,5 +1310,6 @@ if __name__ == "__main__":
 
     # Changed themename from "darkly" to "minty" for a lighter aesthetic
     app = ttk.Window(themename="minty") # Keep minty as base
-    InventoryApp(app)
-    app.mainloop()
\ No newline at end of file
+    inventory_app = InventoryApp(app)
+    app.mainloop()
+    inventory_app.close_storage()
\ No newline at end of file
@@ -0,0 +1,363 @@
+"""Command-line tools for the inventory, without the GUI.
+
+    python inventory_cli.py import proveedores.xlsx
+    python inventory_cli.py export copia.jsonl
+    python inventory_cli.py merge a.jsonl b.json c.xlsx --out todo.jsonl
+    python inventory_cli.py dedupe catalogo.jsonl --out limpio.jsonl --keep last
+    python inventory_cli.py send 192.168.1.20 [--file catalogo.jsonl]
+    python inventory_cli.py serve [--port 12345]
+    python inventory_cli.py stats [--file catalogo.parquet --where "Cantidad > 0"]
+
+Files are .json, .jsonl, .xlsx, .parquet or .arrow/.feather (the last two need
+pyarrow). merge, dedupe, stats and send --file read and write one product at a
+time and keep only the IDs seen (spilled to a temporary SQLite file past
+--memory-ids), so multi-GB files go through with bounded memory. import,
+export, serve and commands without --file work on the app's inventory
+(INVENTORY_FORMAT / INVENTORY_STORAGE / INVENTORY_SHARED, as in the app;
+--shared when other instances are using it). import and stats take --where
+"Cantidad > 0"; Parquet/Arrow files apply it while reading. import
+--workers N reads several files in parallel processes before adding them.
+Progress and throughput go to stderr.
+"""
+import argparse
+import heapq
+import math
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from inventory_analytics import LOW_STOCK, TOP_N, product_value
+from inventory_core import CHUNK_SIZE, Inventory, Throughput, send_inventory
+from inventory_io import iter_product_file, parse_where, write_product_file
+from parallel_import import describe_report
+from inventory_storage import STORAGE_MODES
+from json_stream import InventoryFormatError
+from wire_protocol import DEFAULT_PORT
+
+MEMORY_IDS = 2_000_000   # IDs kept in a dict before spilling to SQLite
+SUMMARY_HELP = "En .xlsx, añade hojas de resumen por nombre"
+WHERE_HELP = "Solo las filas que cumplan el filtro, p. ej. \"Cantidad > 0 y Precio <= 10\" (en Parquet/Arrow se aplica al leer)"
+
+
+class IdTable:
+    """ID -> int for streaming dedupe; moves to a temporary SQLite file when it grows."""
+
+    def __init__(self, memory_ids=MEMORY_IDS):
+        self.memory_ids = memory_ids
+        self.ids = {}
+        self.db = None
+        self.path = None
+
+    def _spill(self):
+        fd, self.path = tempfile.mkstemp(prefix="inventory_ids_", suffix=".db")
+        os.close(fd)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=OFF")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.execute("CREATE TABLE ids (id TEXT PRIMARY KEY, value INTEGER) WITHOUT ROWID")
+        self.db.executemany("INSERT INTO ids VALUES (?, ?)", self.ids.items())
+        self.ids = None
+
+    def add(self, product_id, value=0):
+        # True if the ID is new; otherwise the stored value is left alone
+        if self.db is None:
+            if product_id in self.ids:
+                return False
+            self.ids[product_id] = value
+            if len(self.ids) > self.memory_ids:
+                self._spill()
+            return True
+        return self.db.execute("INSERT OR IGNORE INTO ids VALUES (?, ?)", (product_id, value)).rowcount == 1
+
+    def set(self, product_id, value):
+        if self.db is None:
+            self.ids[product_id] = value
+            if len(self.ids) > self.memory_ids:
+                self._spill()
+        else:
+            self.db.execute("INSERT OR REPLACE INTO ids VALUES (?, ?)", (product_id, value))
+
+    def get(self, product_id):
+        if self.db is None:
+            return self.ids.get(product_id)
+        row = self.db.execute("SELECT value FROM ids WHERE id = ?", (product_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            os.remove(self.path)
+            self.db = None
+
+
+def _counted(products, meter):
+    rows = 0
+    for product in products:
+        yield product
+        rows += 1
+        if rows % 10_000 == 0:
+            meter.update(rows)
+    meter.rows = rows
+
+
+def _input_bytes(paths):
+    return sum(os.path.getsize(path) for path in paths)
+
+
+def _report(meter, paths=(), extra=""):
+    print(meter.line(_input_bytes(paths) if paths else None) + extra, file=sys.stderr, flush=True)
+
+
+def _skipped(counts):
+    text = f", {counts['invalid']} inválidos" if counts.get("invalid") else ""
+    if counts.get("filtered"):
+        text += f", {counts['filtered']} filtrados"
+    return text
+
+
+def _open_inventory(args):
+    inventory = Inventory(args.inventory, args.storage, shared=True if args.shared else None)
+    inventory.load(compactor=False)
+    return inventory
+
+
+# --- Commands ---
+def cmd_import(args):
+    inventory = _open_inventory(args)
+    try:
+        if args.workers != 1 and len(args.files) > 1:
+            meter = Throughput(f"import {len(args.files)} archivos", out=sys.stderr)
+            counts, reports = inventory.import_files(args.files, args.workers or None, args.where, args.chunk_size,
+                                                     on_file=lambda report: print(describe_report(report), file=sys.stderr))
+            meter.rows = counts["rows"]
+            _report(meter, [r["file"] for r in reports if r["error"] is None], f": {counts['imported']} nuevos, {counts['duplicates']} duplicados{_skipped(counts)}")
+            return 1 if any(r["error"] is not None for r in reports) else 0
+        for path in args.files:
+            meter = Throughput(f"import {path}", out=sys.stderr)
+            counts = inventory.import_file(path, on_chunk=lambda c: meter.update(c["rows"]), chunk_size=args.chunk_size,
+                                           where=args.where)
+            meter.rows = counts["rows"]
+            _report(meter, [path], f": {counts['imported']} nuevos, {counts['duplicates']} duplicados{_skipped(counts)}")
+    finally:
+        inventory.close()
+    return 0
+
+
+def cmd_export(args):
+    inventory = _open_inventory(args)
+    try:
+        meter = Throughput(f"export {args.out}", out=sys.stderr)
+        meter.rows = inventory.export_file(args.out, summary=args.summary, on_rows=meter.update)
+        _report(meter, extra=f", {os.path.getsize(args.out) / 2 ** 20:.1f} MB escritos")
+    finally:
+        inventory.close()
+    return 0
+
+
+def cmd_merge(args):
+    # Products of every file in order; an ID already written is skipped (first wins)
+    seen = IdTable(args.memory_ids)
+    counts = {"duplicates": 0}
+
+    def merged():
+        for path in args.files:
+            for product in iter_product_file(path, counts):
+                if seen.add(product["ID"]):
+                    yield product
+                else:
+                    counts["duplicates"] += 1
+
+    meter = Throughput(f"merge -> {args.out}", out=sys.stderr)
+    try:
+        write_product_file(args.out, _counted(merged(), meter), summary=args.summary)
+    finally:
+        seen.close()
+    _report(meter, args.files, f" escritas, {counts['duplicates']} duplicados{_skipped(counts)}")
+    return 0
+
+
+def cmd_dedupe(args):
+    # --keep first: one pass. --keep last: the first pass records each ID's last row,
+    # the second writes a product only at that row, so the file order is kept.
+    seen = IdTable(args.memory_ids)
+    counts = {}
+    meter = Throughput(f"dedupe -> {args.out}", out=sys.stderr)
+    try:
+        if args.keep == "last":
+            for row, product in enumerate(iter_product_file(args.file, counts)):
+                seen.set(product["ID"], row)
+            kept = (product for row, product in enumerate(iter_product_file(args.file))
+                    if seen.get(product["ID"]) == row)
+        else:
+            kept = (product for product in iter_product_file(args.file, counts) if seen.add(product["ID"]))
+        written = write_product_file(args.out, _counted(kept, meter), summary=args.summary)
+    finally:
+        seen.close()
+    valid = counts["rows"] - counts["invalid"]
+    _report(meter, [args.file], f" escritas, {valid - written} duplicados{_skipped(counts)}")
+    return 0
+
+
+def cmd_send(args):
+    meter = Throughput(f"send {args.host}", out=sys.stderr)
+    if args.file:
+        result = send_inventory(args.host, _counted(iter_product_file(args.file), meter), args.port,
+                                batch_size=args.batch_size)
+        paths = [args.file]
+    else:
+        inventory = _open_inventory(args)
+        try:
+            result = send_inventory(args.host, _counted(inventory.iter_products(), meter), args.port,
+                                    batch_size=args.batch_size)
+        finally:
+            inventory.close()
+        paths = ()
+    _report(meter, paths, f": {result['added']} nuevos, {result['duplicates']} ya existían")
+    return 0
+
+
+def cmd_serve(args):
+    from inventory_server import InventoryServer
+    inventory = _open_inventory(args)
+    server = InventoryServer(inventory.store, host=args.host, port=args.port,
+                             sync_index=inventory.get_sync_index())
+    try:
+        server.start()
+        print(f"Servidor de inventario en {args.host}:{server.port} ({len(inventory.store)} productos). "
+              f"Ctrl-C para parar.", file=sys.stderr, flush=True)
+        requests = 0
+        while True:
+            time.sleep(args.save_interval)
+            inventory.refresh()   # Other instances' saves, with --shared
+            if server.requests != requests:
+                requests = server.requests
+                inventory.save()
+                print(f"{len(inventory.store)} productos, {requests} mensajes recibidos.", file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        inventory.close()
+    return 0
+
+
+def cmd_stats(args):
+    # Same totals as the statistics panel, accumulated one product at a time
+    counts = {}
+    if args.file:
+        products = iter_product_file(args.file, counts, args.where)
+        inventory = None
+    else:
+        if args.where:
+            raise ValueError("--where solo se aplica con --file")
+        inventory = _open_inventory(args)
+        products = inventory.iter_products()
+    meter = Throughput("stats", out=sys.stderr)
+    total = units = 0
+    values = []
+    low = 0
+    top = []   # (value, row, ID, Nombre), smallest first
+    try:
+        for row, product in enumerate(_counted(products, meter)):
+            value = product_value(product)
+            values.append(value)
+            if len(values) >= 100_000:
+                values = [math.fsum(values)]
+            quantity = product.get("Cantidad")
+            if type(quantity) in (int, float) and math.isfinite(quantity):
+                units += quantity
+                if quantity <= args.low_stock:
+                    low += 1
+            total += 1
+            entry = (value, -row, product.get("ID"), product.get("Nombre"))
+            if len(top) < args.top:
+                heapq.heappush(top, entry)
+            elif entry > top[0]:
+                heapq.heapreplace(top, entry)
+    finally:
+        if inventory is not None:
+            inventory.close()
+    _report(meter, [args.file] if args.file else ())
+    print(f"Productos: {total}{_skipped(counts)}")
+    print(f"Unidades: {units}")
+    print(f"Valor total: {math.fsum(values):.2f}")
+    print(f"Stock bajo (<= {args.low_stock}): {low}")
+    print(f"Top {args.top} por valor:")
+    for value, _, product_id, name in sorted(top, reverse=True):
+        print(f"  {product_id}\t{name}\t{value:.2f}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Inventario sin interfaz gráfica.")
+    parser.add_argument("--inventory", help="Archivo de inventario (por defecto el de la app)")
+    parser.add_argument("--storage", choices=STORAGE_MODES, help="Almacenamiento (por defecto INVENTORY_STORAGE o journal)")
+    parser.add_argument("--shared", action="store_true",
+                        help="Otras instancias usan el mismo inventario (como INVENTORY_SHARED=1): cada guardado "
+                             "toma el cerrojo del archivo y aplica antes sus cambios")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import", help="Añade al inventario los productos nuevos de uno o más archivos")
+    command.add_argument("files", nargs="+")
+    command.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    command.add_argument("--where", type=parse_where, default=(), help=WHERE_HELP)
+    command.add_argument("--workers", type=int, default=1,
+                         help="Procesos que leen archivos a la vez (0: uno por núcleo). Con más de uno, los archivos se "
+                              "unen por orden de nombre y, si un ID está en varios, gana el primero")
+    command.set_defaults(run=cmd_import)
+
+    command = commands.add_parser("export", help="Escribe el inventario en un archivo")
+    command.add_argument("out")
+    command.add_argument("--summary", action="store_true", help=SUMMARY_HELP)
+    command.set_defaults(run=cmd_export)
+
+    command = commands.add_parser("merge", help="Une archivos; con IDs repetidos gana el primero")
+    command.add_argument("files", nargs="+")
+    command.add_argument("--out", required=True)
+    command.add_argument("--memory-ids", type=int, default=MEMORY_IDS)
+    command.add_argument("--summary", action="store_true", help=SUMMARY_HELP)
+    command.set_defaults(run=cmd_merge)
+
+    command = commands.add_parser("dedupe", help="Quita los IDs repetidos de un archivo")
+    command.add_argument("file")
+    command.add_argument("--out", required=True)
+    command.add_argument("--keep", choices=("first", "last"), default="first")
+    command.add_argument("--memory-ids", type=int, default=MEMORY_IDS)
+    command.add_argument("--summary", action="store_true", help=SUMMARY_HELP)
+    command.set_defaults(run=cmd_dedupe)
+
+    command = commands.add_parser("send", help="Envía productos a un equipo en \"Recibir por Red\" o serve")
+    command.add_argument("host")
+    command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    command.add_argument("--file", help="Enviar este archivo en vez del inventario")
+    command.add_argument("--batch-size", type=int, default=CHUNK_SIZE)
+    command.set_defaults(run=cmd_send)
+
+    command = commands.add_parser("serve", help="Recibe envíos y sincronizaciones hasta Ctrl-C")
+    command.add_argument("--host", default="0.0.0.0")
+    command.add_argument("--port", type=int, default=DEFAULT_PORT)
+    command.add_argument("--save-interval", type=float, default=1.0)
+    command.set_defaults(run=cmd_serve)
+
+    command = commands.add_parser("stats", help="Totales, stock bajo y productos de más valor")
+    command.add_argument("--file", help="Calcular sobre este archivo en vez del inventario")
+    command.add_argument("--where", type=parse_where, default=(), help=WHERE_HELP)
+    command.add_argument("--low-stock", type=int, default=LOW_STOCK)
+    command.add_argument("--top", type=int, default=TOP_N)
+    command.set_defaults(run=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except (InventoryFormatError, OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
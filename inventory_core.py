@@ -0,0 +1,283 @@
+import json
+import os
+import socket
+import time
+
+from inventory_analytics import InventoryAnalytics
+from arrow_io import BATCH_ROWS, PARQUET_EXTENSIONS, is_columnar_path, write_columnar_rows
+from inventory_io import iter_product_file, replace_file, write_excel_rows, write_product_file
+from inventory_storage import STORAGE_MODES, SqliteStorage, open_storage
+from inventory_store import InventoryStore
+from inventory_sync import SyncIndex, sync_initiator
+from json_stream import iter_batches
+from search_index import SearchIndex
+from wire_protocol import DEFAULT_PORT, KIND_REPLY, recv_message, send_products
+
+CHUNK_SIZE = 5000   # Products per import commit / network message
+
+
+class ProductError(ValueError):
+    pass
+
+
+class DuplicateProductError(ProductError):
+    pass
+
+
+def inventory_file_from_env():
+    # INVENTORY_FORMAT=jsonl keeps the inventory as JSON Lines (one product per line)
+    return "inventory_data.jsonl" if os.environ.get("INVENTORY_FORMAT") == "jsonl" else "inventory_data.json"
+
+
+def storage_mode_from_env():
+    # "journal" appends each change to inventory_data.json.journal and compacts in the
+    # background; "json" rewrites the whole file on every save (old behaviour);
+    # "sqlite" keeps it in inventory_data.db (migrated from the JSON file on first use)
+    mode = os.environ.get("INVENTORY_STORAGE", "journal")
+    if mode not in STORAGE_MODES:
+        print(f"Unknown INVENTORY_STORAGE={mode}, using journal.")
+        mode = "journal"
+    return mode
+
+
+def shared_from_env():
+    # INVENTORY_SHARED=1: other instances use the same inventory file (journal storage)
+    return os.environ.get("INVENTORY_SHARED") == "1"
+
+
+def parse_product(product_id, name, quantity, price):
+    # A product from the text of the "Agregar" form (or the CLI); ProductError if invalid
+    if not product_id or not name or quantity in (None, "") or price in (None, ""):
+        raise ProductError("¡Todos los campos son necesarios!")
+    try:
+        quantity = int(quantity)
+        price = float(price)
+    except ValueError:
+        raise ProductError("Cantidad debe ser un número entero y Precio un número decimal") from None
+    if quantity < 0 or price < 0:
+        raise ProductError("¡Cantidad y precio no pueden ser negativos!")
+    return {"ID": product_id, "Nombre": name, "Cantidad": quantity, "Precio": price}
+
+
+class Inventory:
+    """The inventory without a GUI: store, storage backend, search and totals.
+
+    InventoryApp keeps one of these behind its widgets and inventory_cli
+    uses it for batch jobs. load() reads the inventory and starts recording
+    changes; save() writes what changed since the last save.
+    """
+
+    def __init__(self, inventory_file=None, storage_mode=None, shared=None):
+        self.inventory_file = inventory_file or inventory_file_from_env()
+        self.storage_mode = storage_mode or storage_mode_from_env()
+        self.shared = shared_from_env() if shared is None else shared
+        if self.shared and self.storage_mode != "journal":
+            print(f"INVENTORY_SHARED only applies to journal storage; {self.storage_mode} is used as usual.")
+            self.shared = False
+        self.store = InventoryStore()
+        self.storage = None
+        self.search_index = None
+        self.analytics = None
+        self.sync_index = None
+
+    def load(self, compactor=True):
+        self.storage = open_storage(self.storage_mode, self.inventory_file, self.shared)
+        try:
+            replayed = self.storage.load_into(self.store)
+            print(f"Inventario cargado ({self.storage_mode}): {len(self.store)} productos ({replayed} cambios aplicados).")
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {self.inventory_file}. Initializing empty inventory.")
+            self.store.clear()
+        except Exception as e:
+            print(f"An error occurred loading inventory: {e}. Initializing empty inventory.")
+            self.store.clear()
+        # Record mutations from now on; the journal also compacts in the background
+        self.storage.attach(self.store)
+        if compactor and self.storage_mode == "journal" and not self.shared:
+            self.storage.start_compactor(self.store)
+        return len(self.store)
+
+    def build_indexes(self):
+        if isinstance(self.storage, SqliteStorage):
+            # Searches are answered by the database's FTS5 index
+            self.search_index = self.storage
+        else:
+            # Trigram index for search, kept in sync with the store
+            self.search_index = SearchIndex(self.store)
+        # Totals for the statistics panel, updated on every change from here on
+        self.analytics = InventoryAnalytics(self.store)
+
+    def get_sync_index(self):
+        if self.sync_index is None:
+            self.sync_index = SyncIndex(self.store)
+        return self.sync_index
+
+    def save(self):
+        # The journal and SQLite write only the changes since the last save. Returns bytes
+        # written (json, journal) or rows (sqlite).
+        return self.storage.commit()
+
+    def refresh(self):
+        # Shared inventories: applies what other instances saved. Returns {"added",
+        # "removed"} store keys and "dropped" unsaved products that lost their ID to
+        # another instance, or None if nothing changed (also after save())
+        if not self.shared:
+            return None
+        self.storage.refresh()
+        return self.storage.take_changes()
+
+    def close(self):
+        # Flushes everything so the snapshot is up to date for other tools
+        if self.storage is not None:
+            self.storage.close(self.store)
+
+    # --- Products ---
+    def add_product(self, product):
+        with self.store.lock:
+            if self.store.has_id(product["ID"]):
+                raise DuplicateProductError(f"¡El producto con ID '{product['ID']}' ya existe!")
+            return self.store.add(product)
+
+    def add_new(self, products):
+        # Adds the products whose ID isn't in the inventory yet; returns (new keys, duplicates)
+        new_keys = []
+        duplicates = 0
+        with self.store.lock:
+            for product in products:
+                key = self.store.add_if_new(product)
+                if key is None:
+                    duplicates += 1
+                else:
+                    new_keys.append(key)
+        return new_keys, duplicates
+
+    def delete(self, keys):
+        return self.store.remove_many(keys)
+
+    def search(self, query):
+        return self.search_index.search(query)
+
+    def iter_products(self):
+        # Every product, built one at a time, so exports don't hold a second copy
+        for key in self.store.keys():
+            product = self.store.get(key)
+            if product is not None:
+                yield product
+
+    # --- Files ---
+    def import_file(self, path, on_chunk=None, chunk_size=CHUNK_SIZE, where=()):
+        # Streams a product file in (see iter_product_file; where is a parse_where filter);
+        # every chunk is saved (json mode saves once at the end). Returns {"rows",
+        # "invalid", "filtered", "imported", "duplicates"}.
+        counts = {"rows": 0, "invalid": 0, "filtered": 0, "imported": 0, "duplicates": 0}
+        for chunk in iter_batches(iter_product_file(path, counts, where), chunk_size):
+            new_keys, duplicates = self.add_new(chunk)
+            counts["imported"] += len(new_keys)
+            counts["duplicates"] += duplicates
+            if self.storage_mode != "json":
+                self.save()
+            if on_chunk is not None:
+                on_chunk(counts)
+        if self.storage_mode == "json":
+            self.save()
+        return counts
+
+    def import_files(self, paths, workers=None, where=(), chunk_size=CHUNK_SIZE, on_file=None):
+        # Several files read by a process pool and merged in name order (see
+        # parallel_import.merge_files); nothing is added until every file has been read.
+        # Returns (counts as in import_file, one report per file)
+        from parallel_import import merge_files
+        products, reports = merge_files(paths, self.store.ids(), workers, where, on_file=on_file)
+        counts = {"imported": 0, "duplicates": 0}
+        for field in ("rows", "invalid", "filtered"):
+            counts[field] = sum(report[field] for report in reports)
+        for chunk in iter_batches(products, chunk_size):
+            new_keys, duplicates = self.add_new(chunk)
+            counts["imported"] += len(new_keys)
+            counts["duplicates"] += duplicates
+        counts["duplicates"] += sum(r["repeated"] + r["conflicts"] + r["existing"] for r in reports)
+        self.save()
+        return counts, reports
+
+    def export_file(self, path, summary=False, on_rows=None):
+        # Returns the number of products written; on_rows(count) reports progress
+        if path.lower().endswith(".xlsx"):
+            # Row tuples straight from the store's columns, no product dicts
+            return replace_file(path, lambda tmp_path: write_excel_rows(
+                tmp_path, self.store.row_batches(), summary=summary, on_batch=on_rows))["rows"]
+        if is_columnar_path(path):
+            parquet = path.lower().endswith(PARQUET_EXTENSIONS)
+            return replace_file(path, lambda tmp_path: write_columnar_rows(
+                tmp_path, self.store.row_batches(BATCH_ROWS), parquet, on_batch=on_rows))["rows"]
+        counter = {"rows": 0}
+
+        def counted():
+            for product in self.iter_products():
+                yield product
+                counter["rows"] += 1
+                if on_rows is not None and counter["rows"] % CHUNK_SIZE == 0:
+                    on_rows(counter["rows"])
+        return write_product_file(path, counted())
+
+
+# --- Network ---
+def send_inventory(host, products, port=DEFAULT_PORT, batch_size=None):
+    """Pushes products to an instance running "Recibir por Red" (or inventory_cli serve).
+
+    products may be any iterable. With batch_size they go in messages of that
+    many over one connection, so nothing bigger than a batch is held;
+    otherwise they go as one message (only its compressed payload is held),
+    which older instances also accept. Returns {"added",
+    "duplicates"}, or None if the other side closed without replying.
+    """
+    if batch_size:
+        from inventory_server import InventoryClient   # Pulls in asyncio; keeps app startup fast
+        totals = {"added": 0, "duplicates": 0, "invalid": 0}
+        with InventoryClient(host, port) as client:
+            for batch in iter_batches(products, batch_size):
+                reply = client.push(batch)
+                for field in totals:
+                    totals[field] += reply.get(field, 0)
+        return totals
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.settimeout(5)
+        s.connect((host, port))
+        # Framed message: header (version, length, codec, checksum) + zlib payload
+        sent = send_products(s, products)
+        s.settimeout(60) # The server replies once the products are applied
+        reply = recv_message(s)
+    if reply is not None and reply[0] == KIND_REPLY:
+        return dict(reply[1], sent=sent)
+    return None
+
+
+def sync_with(host, sync_index, port=DEFAULT_PORT):
+    # Two-way sync with a listening instance; returns sync_initiator's stats
+    with socket.create_connection((host, port), timeout=5) as s:
+        s.settimeout(300) # The other side may need a while to hash a large inventory
+        return sync_initiator(s, sync_index)
+
+
+class Throughput:
+    """Rows and bytes per second of a long job, printed every few seconds."""
+
+    def __init__(self, label, interval=2.0, out=None):
+        self.label = label
+        self.interval = interval
+        self.out = out
+        self.start = self._last = time.perf_counter()
+        self.rows = 0
+
+    def update(self, rows, force=False):
+        self.rows = rows
+        now = time.perf_counter()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            print(self.line(), file=self.out, flush=True)
+
+    def line(self, input_bytes=None):
+        elapsed = max(time.perf_counter() - self.start, 1e-9)
+        text = f"{self.label}: {self.rows:,} filas en {elapsed:.1f}s ({self.rows / elapsed:,.0f} filas/s"
+        if input_bytes:
+            text += f", {input_bytes / elapsed / 2 ** 20:.1f} MB/s"
+        return text + ")"
@@ -0,0 +1,400 @@
+import operator
+import os
+import re
+
+# openpyxl is imported inside the Excel reader: it is only needed for Excel files
+from arrow_io import (BATCH_ROWS, COLUMNAR_FILE_TYPES, PARQUET_EXTENSIONS, iter_columnar_batches, open_columnar,
+                      write_columnar_rows)
+from inventory_analytics import NameTotals
+from json_stream import InventoryFormatError, coerce_json_product, is_jsonl_path, iter_batches, iter_products, write_products
+from xlsx_stream import StreamingWorkbook
+
+REQUIRED_COLUMNS = ["ID", "Nombre", "Cantidad", "Precio"]
+PRODUCT_FILE_TYPES = (".json", ".jsonl", ".xlsx") + COLUMNAR_FILE_TYPES
+EXCEL_MAX_ROWS = 1_048_576   # Per sheet, header included
+PRODUCT_SHEET = "Inventario"
+SUMMARY_SHEET = "Resumen por nombre"
+SUMMARY_COLUMNS = ["Nombre", "Productos", "Unidades", "Valor"]
+_OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "==": operator.eq, "!=": operator.ne}
+_CLAUSE = re.compile(r"\s*(ID|Nombre|Cantidad|Precio)\s*(>=|<=|==|!=|=|>|<)\s*(\"[^\"]*\"|'[^']*'|\S+)\s*$")
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+
+# --- Background job bodies (see jobs.JobRunner) ---
+# Import jobs hand validated products to the UI thread with job.commit(chunk); the
+# duplicate check against the store happens there, when the chunk is added.
+def excel_import_job(file_path, existing_ids, chunk_size=5000):
+    # Rows are streamed from the workbook and validated by excel_row_to_product, like
+    # inventory_cli, so both give the same IDs; rows whose ID is in existing_ids or
+    # earlier in the file are skipped
+    def work(job):
+        counts = {"rows": 0, "invalid": 0}
+        existing = set(existing_ids)
+        seen = set()
+        repeated = 0
+        for batch in iter_batches(iter_excel_products(file_path, counts), chunk_size):
+            job.check_cancelled()
+            chunk = []
+            for product in batch:
+                if product["ID"] in existing or product["ID"] in seen:
+                    repeated += 1
+                else:
+                    seen.add(product["ID"])
+                    chunk.append(product)
+            if chunk:
+                job.commit(chunk)
+            job.progress(counts["rows"])
+        print(f"Excel import: {counts['rows']} filas, {counts['invalid']} con datos faltantes o Cantidad/Precio "
+              f"inválidos, {repeated} IDs duplicados.")
+        return {"rows": counts["rows"], "skipped": counts["invalid"] + repeated}
+    return work
+
+
+def json_import_job(file_path, chunk_size=5000):
+    def work(job):
+        rows = skipped = 0
+        with open(file_path, "r", encoding="utf-8") as f:
+            for batch in iter_batches(iter_products(f, jsonl=is_jsonl_path(file_path)), chunk_size):
+                job.check_cancelled()
+                valid = []
+                for product in batch:
+                    product = coerce_json_product(product)
+                    if product is None:
+                        skipped += 1
+                    else:
+                        valid.append(product)
+                job.commit(valid)
+                rows += len(batch)
+                job.progress(rows)
+        return {"rows": rows, "skipped": skipped}
+    return work
+
+
+def excel_export_job(file_path, store, summary=False, batch_size=5000):
+    # Rows are pulled from the store batch_size at a time and streamed to the workbook
+    def work(job):
+        total = len(store)
+        job.progress(0, total)
+
+        def batches():
+            for batch in store.row_batches(batch_size):
+                job.check_cancelled()
+                yield batch
+        return replace_file(file_path, lambda tmp_path: write_excel_rows(
+            tmp_path, batches(), summary=summary, on_batch=lambda rows: job.progress(rows, total)))
+    return work
+
+
+def json_export_job(file_path, products, total=None, chunk_size=5000):
+    # products may be any iterable (Inventory.iter_products builds them one at a time);
+    # total is only for progress
+    def work(job):
+        counter = {"rows": 0}
+
+        def reported(items):
+            # Progress and cancellation points between products
+            for count, product in enumerate(items, 1):
+                yield product
+                counter["rows"] = count
+                if count % chunk_size == 0:
+                    job.check_cancelled()
+                    job.progress(count, total)
+
+        def write(tmp_path):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                write_products(f, reported(products), jsonl=is_jsonl_path(file_path))
+        replace_file(file_path, write)
+        job.progress(counter["rows"], counter["rows"])
+        return {"rows": counter["rows"]}
+    return work
+
+
+def columnar_import_job(file_path, clauses=(), chunk_size=5000):
+    # Parquet/Arrow: only the product columns and the rows matching clauses are read
+    def work(job):
+        counts = {}
+        for chunk in iter_batches(iter_columnar_products(file_path, counts, clauses), chunk_size):
+            job.check_cancelled()
+            job.commit(chunk)
+            job.progress(counts["rows"], counts["total"])
+        job.progress(counts["rows"], counts["total"])
+        return {"rows": counts["rows"], "skipped": counts["invalid"], "filtered": counts["filtered"]}
+    return work
+
+
+def columnar_export_job(file_path, store):
+    def work(job):
+        total = len(store)
+        job.progress(0, total)
+
+        def batches():
+            for batch in store.row_batches(BATCH_ROWS):
+                job.check_cancelled()
+                yield batch
+        return replace_file(file_path, lambda tmp_path: write_columnar_rows(
+            tmp_path, batches(), _is_parquet(file_path), on_batch=lambda rows: job.progress(rows, total)))
+    return work
+
+
+# --- Row filters ("Cantidad > 0 and Precio <= 10") ---
+def parse_where(text):
+    """Clauses [(column, op, value)] from a filter such as "Cantidad > 0 y Precio < 5".
+
+    Clauses are joined with "and"/"y" and must all hold. Cantidad and Precio
+    compare with numbers, ID and Nombre with text (quotes optional).
+    ValueError if the filter can't be read.
+    """
+    clauses = []
+    for part in re.split(r"\s+(?:and|y)\s+", text.strip(), flags=re.IGNORECASE):
+        match = _CLAUSE.match(part)
+        if not match:
+            raise ValueError(f"Filtro no válido: {part!r} (usa p. ej. Cantidad > 0 y Precio <= 10)")
+        column, op, value = match.groups()
+        op = "==" if op == "=" else op
+        if value[:1] in "\"'" and value[-1:] == value[:1] and len(value) > 1:
+            value = value[1:-1]
+        if column == "Cantidad":
+            value = _to_int(value) if _to_int(value) == _to_float(value) else _to_float(value)
+        elif column == "Precio":
+            value = _to_float(value)
+        if value is None:
+            raise ValueError(f"Filtro no válido: {part!r} ({column} se compara con un número)")
+        clauses.append((column, op, value))
+    return clauses
+
+
+def where_predicate(clauses):
+    # The same filter for products already in memory (JSON and Excel files)
+    checks = [(column, _OPERATORS[op], value) for column, op, value in clauses]
+
+    def matches(product):
+        try:
+            return all(compare(product[column], value) for column, compare, value in checks)
+        except TypeError:
+            return False
+    return matches
+
+
+# --- Streaming product files (inventory_cli): one product at a time, no pandas ---
+def _file_type(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PRODUCT_FILE_TYPES:
+        raise InventoryFormatError(f"Formato no soportado: {path} (usa {', '.join(PRODUCT_FILE_TYPES)})")
+    return extension
+
+
+def excel_row_to_product(row):
+    # row: (ID, Nombre, Cantidad, Precio) cells; None if a cell is empty or Cantidad/Precio
+    # aren't numbers
+    if any(cell is None or cell == "" for cell in row):
+        return None
+    product_id, name, quantity, price = row
+    quantity = _to_int(quantity)
+    price = _to_float(price)
+    if quantity is None or price is None or price != price or price in (float("inf"), float("-inf")):
+        return None
+    return {"ID": excel_id_text(product_id), "Nombre": str(name), "Cantidad": quantity, "Precio": price}
+
+
+def excel_id_text(value):
+    # Excel stores every number as a float: ID 12 reads back as 12.0 and is kept as "12"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def iter_excel_products(path, counts):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)   # Streams the sheet XML
+    try:
+        for sheet in workbook.worksheets:
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else "" for cell in next(rows, ())]
+            if not all(column in header for column in REQUIRED_COLUMNS):
+                if sheet is workbook.worksheets[0]:
+                    raise InventoryFormatError(f"El archivo Excel debe contener las columnas: {', '.join(REQUIRED_COLUMNS)}")
+                continue   # Other sheets (summaries) are not products
+            columns = [header.index(column) for column in REQUIRED_COLUMNS]
+            for row in rows:
+                counts["rows"] += 1
+                product = excel_row_to_product([row[i] if i < len(row) else None for i in columns])
+                if product is None:
+                    counts["invalid"] += 1
+                else:
+                    yield product
+    finally:
+        workbook.close()
+
+
+def _is_parquet(path):
+    return os.path.splitext(path)[1].lower() in PARQUET_EXTENSIONS
+
+
+def iter_columnar_products(path, counts, clauses=()):
+    # Products of a Parquet/Arrow file; counts gets "total" (rows in the file), "rows"
+    # (rows scanned, as for the other formats: every row once the file is read),
+    # "filtered" (rows the pushed-down filter left out) and "invalid"
+    for field in ("rows", "invalid", "total", "filtered"):
+        counts.setdefault(field, 0)
+    read = 0
+    for batch, total in iter_columnar_batches(path, REQUIRED_COLUMNS, clauses):
+        counts["total"] = total
+        counts["rows"] += batch.num_rows
+        read += batch.num_rows
+        for product in batch.to_pylist():
+            if coerce_json_product(product) is None:
+                counts["invalid"] += 1
+            else:
+                yield product
+    if not read:
+        counts["total"] = open_columnar(path).count_rows()
+    counts["filtered"] += counts["total"] - read
+    counts["rows"] += counts["total"] - read
+
+
+def iter_product_file(path, counts=None, where=()):
+    """Valid products of a .json, .jsonl, .xlsx, .parquet or .arrow file, read as a stream.
+
+    counts, if given, gets "rows" (records read) and "invalid" (records
+    skipped because they aren't valid products) added to it. where is a
+    parse_where() filter; Parquet/Arrow files apply it while reading, and
+    "filtered" counts the rows it left out.
+    """
+    if counts is None:
+        counts = {}
+    counts.setdefault("rows", 0)
+    counts.setdefault("invalid", 0)
+    file_type = _file_type(path)
+    if file_type in COLUMNAR_FILE_TYPES:
+        yield from iter_columnar_products(path, counts, where)
+        return
+    if file_type == ".xlsx":
+        products = iter_excel_products(path, counts)
+    else:
+        products = _iter_json_file(path, counts)
+    if not where:
+        yield from products
+        return
+    matches = where_predicate(where)
+    counts.setdefault("filtered", 0)
+    for product in products:
+        if matches(product):
+            yield product
+        else:
+            counts["filtered"] += 1
+
+
+def _iter_json_file(path, counts):
+    with open(path, "r", encoding="utf-8") as f:
+        for product in iter_products(f, jsonl=is_jsonl_path(path)):
+            counts["rows"] += 1
+            product = coerce_json_product(product)
+            if product is None:
+                counts["invalid"] += 1
+            else:
+                yield product
+
+
+def _write_sheets(workbook, title, header, rows, sheet_rows):
+    # Appends rows to "title", "title (2)", ... with at most sheet_rows rows under each header
+    sheets = 0
+    sheet = None
+    in_sheet = sheet_rows
+    for row in rows:
+        if in_sheet >= sheet_rows:
+            sheets += 1
+            sheet = workbook.add_sheet(title if sheets == 1 else f"{title} ({sheets})")
+            sheet.append(header)
+            in_sheet = 0
+        sheet.append(row)
+        in_sheet += 1
+    if sheet is None:
+        workbook.add_sheet(title).append(header)
+        sheets = 1
+    return sheets
+
+
+def write_excel_rows(path, batches, summary=False, sheet_rows=EXCEL_MAX_ROWS - 1, on_batch=None):
+    """Streams batches of (ID, Nombre, Cantidad, Precio) rows into an .xlsx file.
+
+    Rows are compressed into the file as they arrive (see xlsx_stream), so
+    memory stays flat. Products fill "Inventario", "Inventario (2)", ... with
+    up to sheet_rows rows each (Excel's limit by default). With summary,
+    sheets of totals per Nombre follow. on_batch(rows written) is called per
+    batch. Returns {"rows", "sheets", "summary_rows"}.
+    """
+    totals = NameTotals() if summary else None
+    written = {"rows": 0}
+
+    def rows():
+        for batch in batches:
+            for row in batch:
+                yield row
+                if totals is not None:
+                    totals.add(row[1], row[2], row[3])
+            written["rows"] += len(batch)
+            if on_batch is not None:
+                on_batch(written["rows"])
+
+    with StreamingWorkbook(path) as workbook:
+        sheets = _write_sheets(workbook, PRODUCT_SHEET, REQUIRED_COLUMNS, rows(), sheet_rows)
+        if totals is not None:
+            _write_sheets(workbook, SUMMARY_SHEET, SUMMARY_COLUMNS, totals.rows(), sheet_rows)
+    return {"rows": written["rows"], "sheets": sheets, "summary_rows": len(totals) if totals is not None else 0}
+
+
+def write_excel_products(path, products, summary=False, sheet_rows=EXCEL_MAX_ROWS - 1):
+    return write_excel_rows(path, iter_batches(_product_rows(products)), summary=summary, sheet_rows=sheet_rows)
+
+
+def replace_file(path, write):
+    # write(tmp_path) writes the file next to path, which is replaced only if that worked
+    tmp_path = path + ".tmp"
+    try:
+        result = write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return result
+
+
+def _product_rows(products):
+    return (tuple(product.get(column) for column in REQUIRED_COLUMNS) for product in products)
+
+
+def write_product_file(path, products, summary=False):
+    # Any of PRODUCT_FILE_TYPES by extension, through a temp file; returns the number of
+    # products. summary adds the per-Nombre sheets to .xlsx files.
+    file_type = _file_type(path)
+    if file_type == ".xlsx":
+        return replace_file(path, lambda tmp_path: write_excel_products(tmp_path, products, summary))["rows"]
+    if file_type in COLUMNAR_FILE_TYPES:
+        return replace_file(path, lambda tmp_path: write_columnar_rows(
+            tmp_path, iter_batches(_product_rows(products), BATCH_ROWS), _is_parquet(path)))["rows"]
+    counter = {"rows": 0}
+
+    def counted(items):
+        for product in items:
+            counter["rows"] += 1
+            yield product
+
+    def write(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write_products(f, counted(products), jsonl=path.lower().endswith(".jsonl"))
+    replace_file(path, write)
+    return counter["rows"]
@@ -0,0 +1,239 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+from json_stream import InventoryFormatError, is_jsonl_path, read_products_file, write_products_file
+
+
+class InventoryJournal:
+    """Append-only write-ahead journal on top of the inventory_data.json snapshot.
+
+    Files next to the snapshot:
+      <snapshot>.journal     mutations since the snapshot, one compact JSON record per line
+      <snapshot>.compacting  journal frozen by a running compaction
+      <snapshot>.next        snapshot being written by a running compaction
+
+    A compaction commits by unlinking <snapshot>.compacting, so a crash at any
+    point leaves either the old snapshot plus both journals, or a complete
+    <snapshot>.next that load() rolls forward. Records carry a sequence number
+    so a record present in both journals is only replayed once. The snapshot
+    itself stays a plain JSON list (or JSON Lines for a .jsonl path), same as
+    the non-journaled mode, and is streamed in both directions.
+    """
+
+    def __init__(self, snapshot_path, fsync=True):
+        self.snapshot_path = snapshot_path
+        self.journal_path = snapshot_path + ".journal"
+        self.compacting_path = snapshot_path + ".compacting"
+        self.next_path = snapshot_path + ".next"
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self._pending = []
+        self._seq = 0
+        self._records_since_snapshot = 0
+        # Counters for write-amplification measurements
+        self.journal_bytes_written = 0
+        self.snapshot_bytes_written = 0
+        self._compactor = None
+        self._stop = threading.Event()
+
+    # --- Startup ---
+    def load_into(self, store):
+        # Rebuilds store from snapshot + journal(s). Returns number of replayed records.
+        self._recover_compaction()
+        store.clear()
+        if os.path.exists(self.snapshot_path):
+            try:
+                store.extend(read_products_file(self.snapshot_path))
+            except InventoryFormatError:
+                print(f"Inventory data in {self.snapshot_path} is not a list. Starting from an empty snapshot.")
+                store.clear()
+
+        replayed = 0
+        self._seq = 0
+        for path in (self.compacting_path, self.journal_path):
+            replayed += self._replay(path, store)
+        self._records_since_snapshot = replayed
+        return replayed
+
+    def _recover_compaction(self):
+        if os.path.exists(self.compacting_path + ".tmp"):
+            os.remove(self.compacting_path + ".tmp")
+        if os.path.exists(self.compacting_path):
+            # Compaction did not commit: the old snapshot is still authoritative
+            if os.path.exists(self.next_path):
+                os.remove(self.next_path)
+        elif os.path.exists(self.next_path):
+            # Compaction committed but crashed before the final rename: roll forward
+            os.replace(self.next_path, self.snapshot_path)
+
+    def _replay(self, path, store):
+        if not os.path.exists(path):
+            return 0
+        count = 0
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write at the tail from a crash: everything after it is discarded
+                    print(f"Truncating torn journal record in {path} at byte {good_offset}")
+                    break
+                if not line.endswith(b"\n"):
+                    print(f"Truncating incomplete journal record in {path} at byte {good_offset}")
+                    break
+                good_offset += len(line)
+                seq = record.get("s", 0)
+                if seq and seq <= self._seq:
+                    continue  # Already replayed from the frozen journal
+                self._seq = max(self._seq, seq)
+                self._apply(record, store)
+                count += 1
+        if good_offset != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return count
+
+    @staticmethod
+    def _apply(record, store):
+        op = record.get("op")
+        if op == "add":
+            store.add(record["p"])
+        elif op == "del":
+            # Records are identified by content; identical copies are interchangeable
+            product = record["p"]
+            if "ID" in product:
+                keys = store.keys_for_id(product["ID"])
+            else:
+                keys = store.keys_for_name(product.get("Nombre", ""))
+            for key in keys:
+                if store.get(key) == product:
+                    store.remove(key)
+                    break
+        elif op == "clear":
+            store.clear()
+        else:
+            print(f"Skipping unknown journal record: {record}")
+
+    # --- Recording mutations ---
+    def attach(self, store):
+        store.add_listener(self.record)
+
+    def detach(self, store):
+        store.remove_listener(self.record)
+
+    def record(self, op, key, product):
+        # Store listener: buffers one compact record per mutation until commit()
+        with self._lock:
+            self._seq += 1
+            if op == "add":
+                rec = {"s": self._seq, "op": "add", "p": product}
+            elif op == "remove":
+                rec = {"s": self._seq, "op": "del", "p": product}
+            else:
+                rec = {"s": self._seq, "op": "clear"}
+            self._pending.append(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def commit(self):
+        # Appends buffered records to the journal with a single write (+ fsync)
+        with self._lock:
+            if not self._pending:
+                return 0
+            data = "".join(self._pending).encode("utf-8")
+            count = len(self._pending)
+            self._pending = []
+            if self._file is None:
+                self._file = open(self.journal_path, "ab")
+            self._file.write(data)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.journal_bytes_written += len(data)
+            self._records_since_snapshot += count
+            return len(data)
+
+    # --- Compaction ---
+    def compact(self, store):
+        # Writes a fresh snapshot of store and drops the journal it supersedes
+        with store.lock:
+            self.commit()
+            products = store.to_list()
+            with self._lock:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._freeze_journal()
+                self._records_since_snapshot = 0
+
+        self.snapshot_bytes_written += write_products_file(
+            self.next_path, products, jsonl=is_jsonl_path(self.snapshot_path), fsync=True)
+        self._fsync_dir()
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)  # commit point
+        os.replace(self.next_path, self.snapshot_path)
+        self._fsync_dir()
+
+    def _freeze_journal(self):
+        # Moves the live journal behind any journal left by an uncommitted compaction
+        if not os.path.exists(self.journal_path):
+            return
+        if not os.path.exists(self.compacting_path):
+            os.replace(self.journal_path, self.compacting_path)
+            return
+        tmp_path = self.compacting_path + ".tmp"
+        with open(tmp_path, "wb") as dst:
+            for path in (self.compacting_path, self.journal_path):
+                with open(path, "rb") as src:
+                    shutil.copyfileobj(src, dst)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.compacting_path)
+        # A crash before this unlink only leaves records that replay skips by sequence number
+        os.remove(self.journal_path)
+
+    def _fsync_dir(self):
+        if not hasattr(os, "O_DIRECTORY"):
+            return  # Not available on Windows
+        fd = os.open(os.path.dirname(os.path.abspath(self.snapshot_path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def needs_compaction(self, max_records):
+        return self._records_since_snapshot >= max_records
+
+    def start_compactor(self, store, interval=30.0, max_records=1000):
+        # Background thread that compacts once the journal holds max_records records
+        def compactor_loop():
+            while not self._stop.wait(interval):
+                if self.needs_compaction(max_records):
+                    try:
+                        started = time.perf_counter()
+                        self.compact(store)
+                        print(f"Journal compacted in {time.perf_counter() - started:.2f}s")
+                    except Exception as e:
+                        print(f"Error compacting journal {self.journal_path}: {e}")
+
+        self._stop.clear()
+        self._compactor = threading.Thread(target=compactor_loop, daemon=True)
+        self._compactor.start()
+
+    def close(self, store=None):
+        # Stops the compactor and flushes; compacts too when a store is given
+        self._stop.set()
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+        if store is not None and self._records_since_snapshot + len(self._pending) > 0:
+            self.compact(store)
+        else:
+            self.commit()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,238 @@
+import asyncio
+import json
+import socket
+import threading
+
+from background_server import BackgroundServer
+from inventory_sync import SyncError, SyncIndex, check_message, respond
+from wire_protocol import (DEFAULT_PORT, KIND_INVENTORY, KIND_LEGACY, KIND_REPLY, KIND_REQUEST, KIND_SYNC,
+                           ProtocolError, encode_message, read_frame, read_message, recv_message, send_message)
+
+LARGE_MESSAGE = 1 << 20  # Decode bigger payloads in a worker thread
+
+
+def apply_push(store, products):
+    # Adds pushed products whose ID isn't in the store yet; returns the reply for the client
+    added = duplicates = invalid = 0
+    with store.lock:
+        for product in products:
+            if not (isinstance(product, dict) and "ID" in product and "Nombre" in product):
+                invalid += 1
+            elif store.add_if_new(product) is None:
+                duplicates += 1
+            else:
+                added += 1
+    return {"added": added, "duplicates": duplicates, "invalid": invalid}
+
+
+class _LoopChannel:
+    # Sync channel used from a worker thread while the event loop does the I/O
+    def __init__(self, loop, reader, writer):
+        self.loop = loop
+        self.reader = reader
+        self.writer = writer
+        self.bytes_sent = 0
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def send(self, obj):
+        header, payload = encode_message(KIND_SYNC, obj)
+        self._run(_write(self.writer, header, payload))
+        self.bytes_sent += len(header) + len(payload)
+
+    def recv(self, op):
+        message = self._run(read_message(self.reader))
+        if message is None:
+            raise ProtocolError("El otro equipo cerró la conexión durante la sincronización")
+        kind, obj = message
+        check_message(kind, obj, op)
+        return obj
+
+
+async def _write(writer, header, payload):
+    writer.write(header)
+    writer.write(payload)
+    await writer.drain()  # Backpressure: wait while the client isn't reading
+
+
+class InventoryServer(BackgroundServer):
+    """Long-running inventory service on its own asyncio event loop.
+
+    Each connection may send any number of messages:
+      KIND_INVENTORY / legacy JSON  push; new IDs are added, reply {"added", "duplicates", "invalid"}
+      KIND_REQUEST {"op": "get"}    reply with the full product list (KIND_INVENTORY)
+      KIND_REQUEST {"op": "stats"}  reply {"count", "clients"}
+      KIND_SYNC hello               delta sync (inventory_sync); the connection ends with it
+    Store work (applying pushes, encoding big replies, syncs) runs in worker
+    threads under the store lock so the loop keeps serving other clients.
+    on_change() is called from those threads after the store was modified.
+    With track_changes, take_changes() returns the store keys pushes and
+    syncs added and removed since the last call.
+    """
+
+    NAME = "Servidor de inventario"
+
+    def __init__(self, store, host="0.0.0.0", port=DEFAULT_PORT, on_change=None, sync_index=None, track_changes=False):
+        super().__init__(host, port)
+        self.store = store
+        self.on_change = on_change
+        self.sync_index = sync_index
+        self.track_changes = track_changes
+        self._applying = threading.local()   # Set in the worker threads applying pushes and syncs
+        self._changes_lock = threading.Lock()
+        self._added = []
+        self._removed = []
+        self.clients = 0
+        self.requests = 0
+        # Encoded full inventory, reused by "get" requests until the store changes
+        self._version = 0
+        self._snapshot = None
+
+    def start(self):
+        self.store.add_listener(self._on_store_change)
+        try:
+            return super().start()
+        except Exception:
+            self.store.remove_listener(self._on_store_change)
+            raise
+
+    def stop(self, timeout=5):
+        super().stop(timeout)
+        self.store.remove_listener(self._on_store_change)
+        self._snapshot = None
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        self.clients += 1
+        try:
+            while True:
+                message = await self._read(reader)
+                if message is None:
+                    break
+                self.requests += 1
+                kind, obj = message
+                if kind == KIND_SYNC:
+                    await self._sync(reader, writer, obj, peer)
+                    break
+                if kind in (KIND_INVENTORY, KIND_LEGACY):
+                    if not isinstance(obj, list):
+                        raise ProtocolError("Se esperaba una lista de productos")
+                    reply = await self._loop.run_in_executor(None, self._apply, apply_push, self.store, obj)
+                    if reply["added"]:
+                        self._changed()
+                    if kind == KIND_LEGACY:
+                        break  # Old clients close right after sending
+                    await self._reply(writer, KIND_REPLY, reply)
+                elif kind == KIND_REQUEST and isinstance(obj, dict) and obj.get("op") == "get":
+                    await self._send_inventory(writer)
+                elif kind == KIND_REQUEST and isinstance(obj, dict) and obj.get("op") == "stats":
+                    await self._reply(writer, KIND_REPLY, {"count": len(self.store), "clients": self.clients})
+                else:
+                    raise ProtocolError(f"Mensaje no soportado (tipo {kind})")
+        except (ConnectionError, ProtocolError, SyncError, ValueError) as e:
+            print(f"Cliente {peer}: {e}")
+        finally:
+            self.clients -= 1
+
+    async def _reply(self, writer, kind, obj):
+        header, payload = encode_message(kind, obj)
+        await _write(writer, header, payload)
+
+    def _apply(self, fn, *args):
+        # Runs store work for a client, marking the changes it makes as coming from the network
+        self._applying.active = True
+        try:
+            return fn(*args)
+        finally:
+            self._applying.active = False
+
+    def _on_store_change(self, op, key, product):
+        self._version += 1
+        if self.track_changes and getattr(self._applying, "active", False):
+            with self._changes_lock:
+                if op == "add":
+                    self._added.append(key)
+                elif op == "remove":
+                    self._removed.append(key)
+
+    def take_changes(self):
+        # {"added", "removed"} store keys since the last call, or None
+        with self._changes_lock:
+            if not (self._added or self._removed):
+                return None
+            removed = set(self._removed)
+            changes = {"added": [key for key in self._added if key not in removed], "removed": list(removed)}
+            self._added, self._removed = [], []
+        return changes
+
+    def _encode_inventory(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot[0] == self._version:
+            return snapshot[1:]
+        with self.store.lock:
+            version = self._version
+            products = self.store.to_list()
+        header, payload = encode_message(KIND_INVENTORY, products)
+        self._snapshot = (version, header, payload)
+        return header, payload
+
+    async def _send_inventory(self, writer):
+        # Copying and compressing a big store takes a while: do it off the loop
+        header, payload = await self._loop.run_in_executor(None, self._encode_inventory)
+        await _write(writer, header, payload)
+
+    async def _read(self, reader):
+        frame = await read_frame(reader)
+        if frame is None:
+            return None
+        kind, raw = frame
+        if len(raw) > LARGE_MESSAGE:
+            return kind, await self._loop.run_in_executor(None, json.loads, raw)
+        return kind, json.loads(raw)
+
+    async def _sync(self, reader, writer, hello, peer):
+        if self.sync_index is None:
+            self.sync_index = SyncIndex(self.store)
+        channel = _LoopChannel(self._loop, reader, writer)
+        stats = await self._loop.run_in_executor(None, self._apply, respond, channel, self.sync_index, hello)
+        print(f"Sincronización con {peer}: {stats}")
+        if stats["added"] or stats["removed"]:
+            self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+
+class InventoryClient:
+    """Blocking client keeping one connection to an InventoryServer."""
+
+    def __init__(self, host, port=DEFAULT_PORT, timeout=30):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _request(self, kind, obj):
+        send_message(self.sock, kind, obj)
+        message = recv_message(self.sock)
+        if message is None:
+            raise ProtocolError("El servidor cerró la conexión")
+        return message[1]
+
+    def get(self):
+        return self._request(KIND_REQUEST, {"op": "get"})
+
+    def stats(self):
+        return self._request(KIND_REQUEST, {"op": "stats"})
+
+    def push(self, products):
+        return self._request(KIND_INVENTORY, products)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
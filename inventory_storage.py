@@ -0,0 +1,294 @@
+import json
+import os
+import sqlite3
+import threading
+
+from inventory_journal import InventoryJournal
+from json_stream import InventoryFormatError, is_jsonl_path, read_products_file, write_products_file
+from search_index import normalize
+
+STORAGE_MODES = ("journal", "json", "sqlite")
+
+
+def open_storage(mode, inventory_file, shared=False):
+    """Returns the storage backend for INVENTORY_STORAGE=mode.
+
+    Every backend loads into an InventoryStore with load_into(store), records
+    its mutations after attach(store), writes them out on commit() and
+    flushes on close(store). shared is for a journal several instances use
+    at once (see shared_journal.SharedJournal).
+    """
+    if mode == "journal":
+        if shared:
+            from shared_journal import SharedJournal
+            return SharedJournal(inventory_file)
+        return InventoryJournal(inventory_file)
+    if mode == "json":
+        return JsonStorage(inventory_file)
+    if mode == "sqlite":
+        return SqliteStorage(os.path.splitext(inventory_file)[0] + ".db", migrate_from=inventory_file)
+    raise ValueError(f"Modo de almacenamiento desconocido: {mode} (usa {', '.join(STORAGE_MODES)})")
+
+
+class JsonStorage:
+    """The whole inventory in one JSON (or JSON Lines) file, rewritten on commit.
+
+    commit() only rewrites the file when the store changed since the last one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._store = None
+        self._dirty = False
+
+    def load_into(self, store):
+        self._store = store
+        store.clear()
+        if not os.path.exists(self.path):
+            print(f"{self.path} not found. Starting with empty inventory.")
+            return 0
+        try:
+            # Products are parsed one at a time instead of json.load-ing the whole file
+            store.extend(read_products_file(self.path))
+        except InventoryFormatError:
+            print(f"Inventory data in {self.path} is not a list. Initializing empty inventory.")
+            store.clear()
+            self._dirty = True
+            self.commit()  # Overwrite the corrupted file
+        return 0
+
+    def attach(self, store):
+        self._store = store
+        store.add_listener(self.record)
+
+    def detach(self, store):
+        store.remove_listener(self.record)
+
+    def record(self, op, key, product):
+        self._dirty = True
+
+    def commit(self):
+        if not self._dirty or self._store is None:
+            return 0
+        self._dirty = False
+        try:
+            # Write to a temp file and rename so a crash can't truncate the inventory
+            tmp_path = self.path + ".tmp"
+            written = write_products_file(tmp_path, self._store.to_list(), jsonl=is_jsonl_path(self.path))
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            self._dirty = True
+            raise
+        return written
+
+    def close(self, store=None):
+        self.commit()
+
+
+# --- SQLite ---
+# Products are rows of `products`, keyed by rowid. The four known fields have a
+# column each (declared without a type so SQLite keeps ints, floats and text as
+# given); anything else, and values SQLite can't hold, go in `extra` as JSON.
+# `products_fts` is an FTS5 trigram index over the normalized ID and Nombre (see
+# search_index.normalize), so searches have the same substring, case- and
+# accent-insensitive semantics as SearchIndex. It keeps the normalized texts
+# too, which queries shorter than a trigram scan without calling into Python.
+COLUMNS = ("ID", "Nombre", "Cantidad", "Precio")
+MISSING = "__missing__"   # In `extra`: known fields the product doesn't have
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    rowid INTEGER PRIMARY KEY,
+    ID, Nombre, Cantidad, Precio,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS products_id ON products(ID);
+CREATE INDEX IF NOT EXISTS products_nombre ON products(Nombre);
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(id_text, name_text, tokenize='trigram');
+"""
+
+
+def _plain(value):
+    if value is None or type(value) in (str, float):
+        return True
+    return type(value) is int and -2 ** 63 <= value < 2 ** 63
+
+
+def product_to_row(key, product):
+    values = []
+    extra = {}
+    for column in COLUMNS:
+        value = product.get(column)
+        if not _plain(value):
+            extra[column] = value
+            value = None
+        values.append(value)
+    missing = [column for column in COLUMNS if column not in product]
+    if missing:
+        extra[MISSING] = missing
+    for name, value in product.items():
+        if name not in COLUMNS:
+            extra[name] = value
+    return (key, *values, json.dumps(extra, ensure_ascii=False) if extra else None)
+
+
+def row_to_product(row):
+    product = dict(zip(COLUMNS, row[1:5]))
+    if row[5] is not None:
+        extra = json.loads(row[5])
+        for column in extra.pop(MISSING, ()):
+            del product[column]
+        product.update(extra)
+    return product
+
+
+def _fts_row(key, product):
+    return (key, normalize(product.get("ID", "")), normalize(product.get("Nombre", "")))
+
+
+class SqliteStorage:
+    """Inventory in a SQLite database (WAL mode) next to inventory_data.json.
+
+    Store keys are the rows' rowids, so a row is deleted without looking it
+    up. Mutations are buffered by the store listener and written
+    in one transaction per commit(), which makes an imported chunk a single
+    batch insert. search() and filter() answer from the FTS5 index and replace
+    SearchIndex. On first use the JSON inventory (snapshot plus journal) is
+    copied into the new database; the JSON files are left as they were.
+    """
+
+    MIN_QUERY = 3   # Shorter queries can't use the trigram index and scan the table
+    FILTER_BATCH = 500   # Keys per query in filter(), under SQLite's limit on parameters
+
+    def __init__(self, path, migrate_from=None):
+        self.path = path
+        self.migrate_from = migrate_from
+        self._lock = threading.Lock()
+        self._pending = []
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commits can be lost
+        self.db.executescript(SCHEMA)
+
+    # --- Startup ---
+    def load_into(self, store):
+        if self.db.execute("PRAGMA user_version").fetchone()[0] == 0:
+            return self._migrate_json(store)
+        with store.lock:
+            store.clear()
+            with self._lock:
+                count, low, high = self.db.execute("SELECT count(*), min(rowid), max(rowid) FROM products").fetchone()
+                # Store keys index the store's columns, so rowids with large gaps (many
+                # deleted rows) are renumbered instead of being used as keys
+                renumber = count > 0 and (low < store.next_key or high - low >= 2 * count + 1024)
+                rows = self.db.execute("SELECT rowid, ID, Nombre, Cantidad, Precio, extra FROM products ORDER BY rowid")
+                for row in rows:
+                    store.add(row_to_product(row), key=None if renumber else row[0])
+                if renumber:
+                    print(f"Renumerando {count} productos en {self.path}.")
+                    self._write([("clear", None, None)] + [("add", key, product) for key, product in store.items()])
+        return 0
+
+    def _migrate_json(self, store):
+        # New database. user_version is set in the same transaction as the copy, so an
+        # interrupted migration starts over on the next run.
+        store.clear()
+        source = self.migrate_from
+        if source is not None and any(os.path.exists(source + suffix) for suffix in ("", ".journal", ".compacting", ".next")):
+            journal = InventoryJournal(source)
+            journal.load_into(store)
+            journal.close()
+            print(f"Inventario migrado de {source} a {self.path}: {len(store)} productos.")
+        with self._lock:
+            self._write([("add", key, product) for key, product in store.items()], user_version=1)
+        return len(store)
+
+    # --- Recording mutations ---
+    def attach(self, store):
+        store.add_listener(self.record)
+
+    def detach(self, store):
+        store.remove_listener(self.record)
+
+    def record(self, op, key, product):
+        with self._lock:
+            self._pending.append((op, key, product))
+
+    def commit(self):
+        # Writes buffered mutations in one transaction; returns how many
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                self._write(pending)
+            return len(pending)
+
+    def _write(self, ops, user_version=None):
+        # Consecutive operations of the same kind go to SQLite as one executemany
+        db = self.db
+        db.execute("BEGIN")
+        try:
+            start = 0
+            while start < len(ops):
+                op = ops[start][0]
+                end = start + 1
+                while end < len(ops) and ops[end][0] == op:
+                    end += 1
+                batch = ops[start:end]
+                if op == "add":
+                    db.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?)",
+                                   (product_to_row(key, product) for _, key, product in batch))
+                    db.executemany("INSERT INTO products_fts(rowid, id_text, name_text) VALUES (?, ?, ?)",
+                                   (_fts_row(key, product) for _, key, product in batch))
+                elif op == "remove":
+                    db.executemany("DELETE FROM products WHERE rowid = ?", ((key,) for _, key, _ in batch))
+                    db.executemany("DELETE FROM products_fts WHERE rowid = ?", ((key,) for _, key, _ in batch))
+                else:
+                    db.execute("DELETE FROM products")
+                    db.execute("DELETE FROM products_fts")
+                start = end
+            if user_version is not None:
+                db.execute(f"PRAGMA user_version = {int(user_version)}")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    # --- Queries ---
+    def search(self, query):
+        # Matching store keys in store order, like SearchIndex.search
+        query = normalize(query.strip())
+        self.commit()
+        with self._lock:
+            if not query:
+                rows = self.db.execute("SELECT rowid FROM products ORDER BY rowid")
+            elif len(query) >= self.MIN_QUERY:
+                phrase = '"' + query.replace('"', '""') + '"'
+                rows = self.db.execute("SELECT rowid FROM products_fts WHERE products_fts MATCH ? ORDER BY rowid",
+                                       (phrase,))
+            else:
+                rows = self.db.execute("SELECT rowid FROM products_fts WHERE instr(id_text, ?) OR instr(name_text, ?) "
+                                       "ORDER BY rowid", (query, query))
+            return [row[0] for row in rows]
+
+    def filter(self, query, keys):
+        # The keys among keys that search(query) would return, in the given order, like SearchIndex.filter
+        query = normalize(query.strip())
+        keys = list(keys)
+        if not query:
+            return keys
+        self.commit()
+        matches = set()
+        with self._lock:
+            for start in range(0, len(keys), self.FILTER_BATCH):
+                batch = keys[start:start + self.FILTER_BATCH]
+                marks = ",".join("?" * len(batch))
+                rows = self.db.execute(f"SELECT rowid FROM products_fts WHERE rowid IN ({marks}) "
+                                       "AND (instr(id_text, ?) OR instr(name_text, ?))", (*batch, query, query))
+                matches.update(row[0] for row in rows)
+        return [key for key in keys if key in matches]
+
+    def close(self, store=None):
+        self.commit()
+        with self._lock:
+            self.db.execute("PRAGMA optimize")
+            self.db.close()
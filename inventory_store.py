@@ -0,0 +1,352 @@
+import threading
+from array import array
+
+_DELETED = object()   # ID column entry of a removed record
+_INT64 = (-2 ** 63, 2 ** 63)
+
+
+class InventoryStore:
+    """In-memory product store with hash indexes over ID and Nombre.
+
+    Every record gets an internal integer key (used as the Treeview iid), so
+    records without an ID or with a repeated ID (old files may contain them)
+    are still kept and can be deleted individually. Keys are never reused.
+
+    Records are kept in columns, one slot per key: the ID objects (shared
+    with the ID index), Nombre packed as UTF-8 in one bytearray, Cantidad in
+    an array('q') and Precio in an array('d'). A product that doesn't fit
+    exactly (missing or extra fields, other types) is kept as its dict
+    instead. get() and items() build product dicts on demand; row() gives the
+    display tuple without building one.
+    """
+
+    def __init__(self, products=None):
+        self._lock = threading.RLock()
+        self._base = 0            # key of slot 0
+        self._ids = []            # slot -> ID, or _DELETED
+        self._names = bytearray()
+        self._name_starts = array("q")
+        self._quantities = array("q")
+        self._prices = array("d")
+        self._irregular = {}      # slot -> product dict stored as-is
+        self._count = 0
+        self._by_id = {}          # ID -> key, or list of keys for repeated IDs
+        self._by_name = None      # lowercased Nombre -> key or list; built on first use
+        self._listeners = []
+        if products:
+            self.extend(products)
+
+    # --- Index helpers ---
+    @staticmethod
+    def _index_add(index, value, key):
+        keys = index.get(value)
+        if keys is None:
+            index[value] = key
+        elif type(keys) is list:
+            keys.append(key)
+        else:
+            index[value] = [keys, key]
+
+    @staticmethod
+    def _index_remove(index, value, key):
+        keys = index.get(value)
+        if keys is None:
+            return
+        if type(keys) is not list:
+            if keys == key:
+                del index[value]
+            return
+        try:
+            keys.remove(key)
+        except ValueError:
+            return
+        if len(keys) == 1:
+            index[value] = keys[0]
+
+    @staticmethod
+    def _index_keys(index, value):
+        keys = index.get(value)
+        if keys is None:
+            return []
+        return list(keys) if type(keys) is list else [keys]
+
+    @staticmethod
+    def _name_key(name):
+        return str(name).strip().lower()
+
+    def _name_index(self):
+        if self._by_name is None:
+            self._by_name = {}
+            for key, product in self.items():
+                self._index_add(self._by_name, self._name_key(product.get("Nombre", "")), key)
+        return self._by_name
+
+    # --- Columns ---
+    @staticmethod
+    def _is_regular(product):
+        if len(product) != 4 or type(product.get("ID")) is not str or type(product.get("Nombre")) is not str:
+            return False
+        quantity = product.get("Cantidad")
+        return (type(quantity) is int and _INT64[0] <= quantity < _INT64[1]
+                and type(product.get("Precio")) is float)
+
+    def _slot(self, key):
+        slot = key - self._base
+        if 0 <= slot < len(self._ids) and self._ids[slot] is not _DELETED:
+            return slot
+        return None
+
+    def _append_slot(self, product_id, name, quantity, price):
+        self._ids.append(product_id)
+        self._name_starts.append(len(self._names))
+        self._names += name
+        self._quantities.append(quantity)
+        self._prices.append(price)
+
+    def _name(self, slot):
+        start = self._name_starts[slot]
+        end = self._name_starts[slot + 1] if slot + 1 < len(self._name_starts) else len(self._names)
+        return self._names[start:end].decode("utf-8")
+
+    def _product(self, slot):
+        product = self._irregular.get(slot)
+        if product is not None:
+            return dict(product)
+        return {"ID": self._ids[slot], "Nombre": self._name(slot),
+                "Cantidad": self._quantities[slot], "Precio": self._prices[slot]}
+
+    # --- Change listeners ---
+    # Listeners are called as fn(op, key, product) with op in "add", "remove",
+    # "clear", while the store lock is held, so they observe mutations in order.
+    @property
+    def lock(self):
+        return self._lock
+
+    def add_listener(self, fn):
+        with self._lock:
+            self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        with self._lock:
+            if fn in self._listeners:
+                self._listeners.remove(fn)
+
+    def _notify(self, op, key, product):
+        for fn in self._listeners:
+            fn(op, key, product)
+
+    # --- Mutations ---
+    @property
+    def next_key(self):
+        return self._base + len(self._ids)
+
+    def add(self, product, key=None):
+        # Appends the product as-is; callers decide whether duplicates are allowed.
+        # key is only given when loading records that already have one (SQLite
+        # rowids); it can't be lower than next_key.
+        with self._lock:
+            if key is None:
+                key = self.next_key
+            elif key < self.next_key:
+                raise ValueError(f"La clave {key} ya fue usada")
+            while self.next_key < key:
+                self._append_slot(_DELETED, b"", 0, 0.0)   # Unused keys
+            if self._is_regular(product):
+                self._append_slot(product["ID"], product["Nombre"].encode("utf-8"),
+                                  product["Cantidad"], product["Precio"])
+            else:
+                self._irregular[key - self._base] = dict(product)
+                self._append_slot(product.get("ID"), b"", 0, 0.0)
+            self._count += 1
+            if "ID" in product:
+                self._index_add(self._by_id, product["ID"], key)
+            if self._by_name is not None:
+                self._index_add(self._by_name, self._name_key(product.get("Nombre", "")), key)
+            self._notify("add", key, product)
+            return key
+
+    def add_if_new(self, product):
+        # Returns the new key, or None if a product with the same ID already exists
+        with self._lock:
+            if product.get("ID") in self._by_id:
+                return None
+            return self.add(product)
+
+    def extend(self, products):
+        with self._lock:
+            return [self.add(product) for product in products]
+
+    def remove(self, key):
+        with self._lock:
+            slot = self._slot(key)
+            if slot is None:
+                return None
+            product = self._product(slot)
+            self._irregular.pop(slot, None)
+            self._ids[slot] = _DELETED
+            self._count -= 1
+            if "ID" in product:
+                self._index_remove(self._by_id, product["ID"], key)
+            if self._by_name is not None:
+                self._index_remove(self._by_name, self._name_key(product.get("Nombre", "")), key)
+            self._notify("remove", key, product)
+            return product
+
+    def remove_many(self, keys):
+        # Returns the number of records actually removed
+        with self._lock:
+            return sum(1 for key in keys if self.remove(key) is not None)
+
+    def clear(self):
+        with self._lock:
+            # New keys continue after the old ones, so a key never names two products
+            self._base = self.next_key
+            self._ids = []
+            self._names = bytearray()
+            self._name_starts = array("q")
+            self._quantities = array("q")
+            self._prices = array("d")
+            self._irregular.clear()
+            self._count = 0
+            self._by_id.clear()
+            self._by_name = None
+            self._notify("clear", None, None)
+
+    def replace_all(self, products):
+        with self._lock:
+            self.clear()
+            self.extend(products)
+
+    # --- Queries ---
+    def has_id(self, product_id):
+        return product_id in self._by_id
+
+    def ids(self):
+        with self._lock:
+            return list(self._by_id)
+
+    def get(self, key):
+        with self._lock:
+            slot = self._slot(key)
+            return None if slot is None else self._product(slot)
+
+    def row(self, key):
+        # (ID, Nombre, Cantidad, Precio) for display, or None if the key was removed
+        with self._lock:
+            slot = self._slot(key)
+            if slot is None:
+                return None
+            product = self._irregular.get(slot)
+            if product is not None:
+                return (product.get("ID", ""), product.get("Nombre", ""),
+                        product.get("Cantidad", 0), product.get("Precio", 0.0))
+            return self._ids[slot], self._name(slot), self._quantities[slot], self._prices[slot]
+
+    def has_key(self, key):
+        with self._lock:
+            return self._slot(key) is not None
+
+    def value(self, key, field):
+        # One field of one product without building its dict; None if missing or removed
+        with self._lock:
+            slot = self._slot(key)
+            if slot is None:
+                return None
+            product = self._irregular.get(slot)
+            if product is not None:
+                return product.get(field)
+            if field == "ID":
+                return self._ids[slot]
+            if field == "Nombre":
+                return self._name(slot)
+            if field == "Cantidad":
+                return self._quantities[slot]
+            if field == "Precio":
+                return self._prices[slot]
+            return None
+
+    def keys_for_id(self, product_id):
+        return self._index_keys(self._by_id, product_id)
+
+    def find_by_id(self, product_id):
+        with self._lock:
+            return [self.get(key) for key in self.keys_for_id(product_id)]
+
+    def keys_for_name(self, name):
+        with self._lock:
+            return self._index_keys(self._name_index(), self._name_key(name))
+
+    def find_by_name(self, name):
+        with self._lock:
+            return [self.get(key) for key in self.keys_for_name(name)]
+
+    def items(self):
+        # Snapshot of (key, product) pairs, safe to iterate while other threads mutate
+        with self._lock:
+            base = self._base
+            return [(base + slot, self._product(slot)) for slot, product_id in enumerate(self._ids)
+                    if product_id is not _DELETED]
+
+    def columns(self, fields):
+        # Snapshot of some fields for every product without building dicts: returns
+        # (keys, [values of each field, aligned with keys]); missing fields are None
+        with self._lock:
+            base = self._base
+            live = range(len(self._ids))
+            if self._count != len(self._ids):
+                live = [slot for slot, product_id in enumerate(self._ids) if product_id is not _DELETED]
+            columns = []
+            for field in fields:
+                if field == "ID":
+                    values = list(self._ids)
+                elif field == "Nombre":
+                    values = [self._name(slot) for slot in range(len(self._ids))]
+                elif field == "Cantidad":
+                    values = self._quantities.tolist()
+                elif field == "Precio":
+                    values = self._prices.tolist()
+                else:
+                    values = [None] * len(self._ids)
+                for slot, product in self._irregular.items():
+                    values[slot] = product.get(field)
+                columns.append(values if type(live) is range else [values[slot] for slot in live])
+            return [base + slot for slot in live], columns
+
+    def row_batches(self, batch_size=5000):
+        # Yields lists of (ID, Nombre, Cantidad, Precio) tuples in store order, batch_size keys at a time. Each batch
+        # is read under the lock; products added after the call starts are not included
+        with self._lock:
+            start, end = self._base, self._base + len(self._ids)
+        for first in range(start, end, batch_size):
+            with self._lock:
+                batch = []
+                for key in range(first, min(first + batch_size, end)):
+                    slot = self._slot(key)
+                    if slot is None:
+                        continue
+                    product = self._irregular.get(slot)
+                    if product is not None:   # Missing fields stay None, unlike row()
+                        batch.append((product.get("ID"), product.get("Nombre"),
+                                      product.get("Cantidad"), product.get("Precio")))
+                    else:
+                        batch.append((self._ids[slot], self._name(slot), self._quantities[slot], self._prices[slot]))
+            if batch:
+                yield batch
+
+    def keys(self):
+        with self._lock:
+            base = self._base
+            return [base + slot for slot, product_id in enumerate(self._ids) if product_id is not _DELETED]
+
+    def to_list(self):
+        with self._lock:
+            return [self._product(slot) for slot, product_id in enumerate(self._ids) if product_id is not _DELETED]
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def __iter__(self):
+        return iter(self.to_list())
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import socket
+
+from wire_protocol import KIND_SYNC, recv_message, send_message
+
+# Conversation (every message is a KIND_SYNC frame holding a JSON object):
+#   initiator hello(count)          -> responder hello(count); both pick the tree depth
+#   initiator nodes(level, hashes)  -> responder diff(bitmap), once per level from the root
+#   initiator items([sync_id, digest] in the differing leaves)
+#                                   -> responder resolve(its digests, products, want)
+#   initiator products(wanted)      ;  both sides then keep only the winning records
+FANOUT_BITS = 2          # 4 children per tree node
+ITEMS_PER_LEAF = 2       # Target items per leaf when choosing the depth
+MAX_DEPTH = 16
+MASK = (1 << 64) - 1
+
+
+class SyncError(Exception):
+    pass
+
+
+def product_digest(product):
+    canonical = json.dumps(product, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class SyncIndex:
+    """Per-product content hashes for delta sync, cached by store key.
+
+    Each product becomes an item (sync_id, digest): sync_id is its ID, or
+    "#<digest>" for products without one. An item sits at a 64-bit position
+    derived from sync_id, and tree nodes over position ranges hold the sum
+    (mod 2^64) of their items' hashes, so two peers can find the ranges that
+    differ by comparing a few node hashes per level.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._cache = {}   # store key -> (position, value, sync_id, digest)
+
+    def items(self):
+        # (position, value, sync_id, digest, key) for every product; products are never
+        # edited in place, so hashes only need computing once per store key
+        cache = self._cache
+        result = []
+        for key, product in self.store.items():
+            item = cache.get(key)
+            if item is None:
+                digest = product_digest(product)
+                sync_id = str(product["ID"]) if "ID" in product else "#" + digest
+                item = (_hash64(sync_id), _hash64(sync_id + "\0" + digest), sync_id, digest)
+                cache[key] = item
+            result.append(item + (key,))
+        if len(cache) > len(result):
+            live = {item[4] for item in result}
+            self._cache = {k: v for k, v in cache.items() if k in live}
+        return result
+
+
+def tree_depth(count):
+    depth = 1
+    while depth < MAX_DEPTH and (1 << (FANOUT_BITS * depth)) * ITEMS_PER_LEAF < count:
+        depth += 1
+    return depth
+
+
+def tree_levels(items, depth):
+    # levels[l][node] = sum (mod 2^64) of the values of the items under node, for occupied nodes
+    shift = 64 - FANOUT_BITS * depth
+    leaves = {}
+    for position, value, *_ in items:
+        leaf = position >> shift
+        leaves[leaf] = (leaves.get(leaf, 0) + value) & MASK
+    levels = [leaves]
+    for _ in range(depth):
+        parents = {}
+        for node, value in levels[-1].items():
+            parent = node >> FANOUT_BITS
+            parents[parent] = (parents.get(parent, 0) + value) & MASK
+        levels.append(parents)
+    levels.reverse()
+    return levels
+
+
+def _children(nodes):
+    fanout = 1 << FANOUT_BITS
+    return [node * fanout + i for node in nodes for i in range(fanout)]
+
+
+def _leaf_items(items, depth, leaves):
+    shift = 64 - FANOUT_BITS * depth
+    return [item for item in items if (item[0] >> shift) in leaves]
+
+
+def resolve(local_digests, remote_digests):
+    # Deterministic conflict rule shared by both peers: the highest digest wins
+    return max(set(local_digests) | set(remote_digests))
+
+
+def _apply_winners(store, local_by_id, remote_digests, received):
+    # Leaves exactly one copy of the winning record for every sync_id that differed
+    added = removed = 0
+    with store.lock:
+        for sync_id, remote in remote_digests.items():
+            local = local_by_id[sync_id]
+            winner = resolve([d for d, _ in local], remote)
+            keep = None
+            for digest, key in local:
+                if digest == winner and keep is None:
+                    keep = key
+                elif store.remove(key) is not None:
+                    removed += 1
+            if keep is None:
+                product = received.get((sync_id, winner))
+                if product is None:
+                    raise SyncError(f"Falta el producto ganador para {sync_id}")
+                store.add(product)
+                added += 1
+    return added, removed
+
+
+class SocketChannel:
+    """Sync messages over a blocking socket, counting the bytes this side sends.
+
+    initiate()/respond() only need an object with send(obj), recv(op) and
+    bytes_sent, so servers can run a sync over other transports.
+    """
+    def __init__(self, sock):
+        self.sock = sock
+        self.bytes_sent = 0
+        try:
+            # Many small request/reply rounds: don't let Nagle hold back each frame's payload
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except OSError:
+            pass
+
+    def send(self, obj):
+        self.bytes_sent += send_message(self.sock, KIND_SYNC, obj)
+
+    def recv(self, op):
+        message = recv_message(self.sock)
+        if message is None:
+            raise SyncError("El otro equipo cerró la conexión durante la sincronización")
+        kind, obj = message
+        check_message(kind, obj, op)
+        return obj
+
+
+def check_message(kind, obj, op):
+    if kind != KIND_SYNC or not isinstance(obj, dict) or obj.get("op") != op:
+        raise SyncError(f"Mensaje de sincronización inesperado (se esperaba '{op}')")
+
+
+class _Records(list):
+    # (digest, key) pairs of the local records for one sync_id
+    def __init__(self, sync_id):
+        super().__init__()
+        self.sync_id = sync_id
+
+
+def _group_by_id(items, sync_ids):
+    # Local records for the given sync_ids, including empty entries for missing ones
+    by_id = {sync_id: _Records(sync_id) for sync_id in sync_ids}
+    for _, _, sync_id, digest, key in items:
+        if sync_id in by_id:
+            by_id[sync_id].append((digest, key))
+    return by_id
+
+
+def _pack_diff(flags):
+    return format(sum(1 << i for i, differs in enumerate(flags) if differs), "x")
+
+
+def _unpack_diff(nodes, bitmap):
+    bits = int(bitmap, 16)
+    return [node for i, node in enumerate(nodes) if bits >> i & 1]
+
+
+def _received_products(products):
+    # Indexes incoming products by (sync_id, digest), recomputing digests locally
+    received = {}
+    for product in products:
+        if not isinstance(product, dict):
+            raise SyncError("Producto inválido recibido durante la sincronización")
+        digest = product_digest(product)
+        sync_id = str(product["ID"]) if "ID" in product else "#" + digest
+        received[(sync_id, digest)] = product
+    return received
+
+
+def _stats(channel, changed=0, added=0, removed=0):
+    return {"changed": changed, "added": added, "removed": removed, "sent": channel.bytes_sent}
+
+
+def sync_initiator(sock, index):
+    """Runs the initiating side of a sync over a connected socket.
+
+    Returns {"changed", "added", "removed", "sent"}: sync_ids that differed,
+    local records added and removed, and bytes this side put on the wire.
+    """
+    return initiate(SocketChannel(sock), index)
+
+
+def sync_responder(sock, index, hello):
+    """Runs the responding side; hello is the initiator's first message, already read."""
+    return respond(SocketChannel(sock), index, hello)
+
+
+def initiate(channel, index):
+    items = index.items()
+    channel.send({"op": "hello", "count": len(items)})
+    remote_count = channel.recv("hello")["count"]
+    depth = tree_depth(max(len(items), remote_count))
+    levels = tree_levels(items, depth)
+
+    # Walk down the tree, only expanding nodes whose hashes differ. Both sides derive
+    # the same node lists, so only hashes and a bitmap of mismatches go over the wire.
+    nodes = [0]
+    for level in range(depth + 1):
+        hashes = levels[level]
+        channel.send({"op": "nodes", "level": level, "hashes": [hashes.get(n, 0) for n in nodes]})
+        nodes = _unpack_diff(nodes, channel.recv("diff")["bitmap"])
+        if not nodes:
+            return _stats(channel)
+        if level < depth:
+            nodes = _children(nodes)
+
+    local = _leaf_items(items, depth, set(nodes))
+    channel.send({"op": "items", "items": [[sync_id, digest] for _, _, sync_id, digest, _ in local]})
+    reply = channel.recv("resolve")
+    remote_digests = reply["digests"]
+    received = _received_products(reply["products"])
+
+    local_by_id = _group_by_id(local, remote_digests)
+    wanted = set(map(tuple, reply["want"]))
+    outgoing = {}  # one copy per wanted record even if it is duplicated locally
+    for entries in local_by_id.values():
+        for digest, key in entries:
+            if (entries.sync_id, digest) in wanted:
+                outgoing.setdefault((entries.sync_id, digest), index.store.get(key))
+    channel.send({"op": "products", "products": list(outgoing.values())})
+    added, removed = _apply_winners(index.store, local_by_id, remote_digests, received)
+    return _stats(channel, len(remote_digests), added, removed)
+
+
+def respond(channel, index, hello):
+    items = index.items()
+    channel.send({"op": "hello", "count": len(items)})
+    depth = tree_depth(max(len(items), hello["count"]))
+    levels = tree_levels(items, depth)
+
+    nodes = [0]
+    for level in range(depth + 1):
+        request = channel.recv("nodes")
+        if request["level"] != level or len(request["hashes"]) != len(nodes):
+            raise SyncError("Los dos equipos no coinciden en el árbol de sincronización")
+        hashes = levels[level]
+        flags = [hashes.get(n, 0) != h for n, h in zip(nodes, request["hashes"])]
+        channel.send({"op": "diff", "bitmap": _pack_diff(flags)})
+        nodes = [n for n, differs in zip(nodes, flags) if differs]
+        if not nodes:
+            return _stats(channel)
+        if level < depth:
+            nodes = _children(nodes)
+
+    remote_digests = {}
+    for sync_id, digest in channel.recv("items")["items"]:
+        remote_digests.setdefault(sync_id, []).append(digest)
+    local = _leaf_items(items, depth, set(nodes))
+    mine = {}
+    for _, _, sync_id, digest, _ in local:
+        mine.setdefault(sync_id, []).append(digest)
+
+    # Only sync_ids whose records differ between the peers take part from here on
+    differing = {}
+    for sync_id in set(mine) | set(remote_digests):
+        if sorted(mine.get(sync_id, [])) != sorted(remote_digests.get(sync_id, [])):
+            differing[sync_id] = mine.get(sync_id, [])
+    local_by_id = _group_by_id(local, differing)
+
+    products = {}
+    want = []
+    for sync_id, digests in differing.items():
+        winner = resolve(digests, remote_digests.get(sync_id, []))
+        if winner not in digests:
+            want.append([sync_id, winner])
+        elif winner not in remote_digests.get(sync_id, []):
+            key = next(k for d, k in local_by_id[sync_id] if d == winner)
+            products[winner] = index.store.get(key)
+    channel.send({"op": "resolve", "digests": differing, "products": list(products.values()), "want": want})
+
+    received = _received_products(channel.recv("products")["products"])
+    remote_differing = {sync_id: remote_digests.get(sync_id, []) for sync_id in differing}
+    added, removed = _apply_winners(index.store, local_by_id, remote_differing, received)
+    return _stats(channel, len(differing), added, removed)
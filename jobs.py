@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    """Handle passed to a job's work function and returned to the caller.
+
+    work(job) runs in a worker thread and reports back with job.progress(),
+    hands results to the UI thread with job.commit() (which waits while the
+    UI thread is behind), and should call job.check_cancelled() between
+    chunks.
+    """
+
+    def __init__(self, name, runner):
+        self.name = name
+        self._runner = runner
+        self._cancel = threading.Event()
+        self.done = 0
+        self.total = None
+        self.status = "running"   # running, done, cancelled, error
+        self.result = None
+        self.error = None
+        self.started = time.perf_counter()
+        self.finished = None
+
+    # --- Worker side ---
+    def progress(self, done, total=None):
+        self._runner._post(self, "progress", (done, total))
+
+    def commit(self, payload):
+        self._runner._post(self, "chunk", payload)
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    # --- UI side ---
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def running(self):
+        return self.status == "running"
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class JobRunner:
+    """Runs jobs in worker threads and delivers their events on the UI thread.
+
+    Events are queued by the workers and dispatched by poll(), which the app
+    reschedules with root.after while any job is running. Headless code can
+    call poll()/wait() directly instead. The queue is bounded, so a worker
+    that gets ahead of the UI blocks in job.commit() instead of piling up
+    parsed chunks, and each poll() hands at most CHUNKS_PER_POLL chunks to
+    on_chunk so the UI gets to redraw and handle input in between.
+    """
+
+    POLL_MS = 50
+    BUSY_POLL_MS = 1       # Next poll when chunks were left waiting
+    MAX_QUEUED = 16        # Events waiting for the UI thread before workers block
+    CHUNKS_PER_POLL = 2
+
+    def __init__(self, root=None):
+        self.root = root
+        self._events = queue.Queue(maxsize=self.MAX_QUEUED)
+        self._callbacks = {}
+        self._polling = False
+
+    def start(self, name, work, on_progress=None, on_chunk=None, on_done=None, on_error=None, on_cancel=None):
+        job = Job(name, self)
+        self._callbacks[job] = (on_progress, on_chunk, on_done, on_error, on_cancel)
+
+        def worker():
+            try:
+                result = work(job)
+                if job.cancelled:
+                    raise JobCancelled()
+                self._post(job, "done", result)
+            except JobCancelled:
+                self._post(job, "cancelled", None)
+            except Exception as e:
+                self._post(job, "error", e)
+
+        threading.Thread(target=worker, name=f"job-{name}", daemon=True).start()
+        self._schedule_poll()
+        return job
+
+    def _post(self, job, kind, payload):
+        self._events.put((job, kind, payload))
+
+    def _schedule_poll(self, delay=None):
+        if self.root is not None and not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS if delay is None else delay, self._poll_loop)
+
+    def _poll_loop(self):
+        self._polling = False
+        more = self.poll()
+        if self._callbacks:
+            self._schedule_poll(self.BUSY_POLL_MS if more else None)
+
+    def poll(self):
+        # Dispatches queued events; must run on the UI thread. Returns True if it
+        # stopped after CHUNKS_PER_POLL chunks with events still queued
+        chunks = 0
+        while True:
+            if chunks >= self.CHUNKS_PER_POLL:
+                return not self._events.empty()
+            try:
+                job, kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                return False
+            on_progress, on_chunk, on_done, on_error, on_cancel = self._callbacks.get(job, (None,) * 5)
+            if kind == "progress":
+                job.done, job.total = payload[0], payload[1] if payload[1] is not None else job.total
+                if on_progress:
+                    on_progress(job)
+            elif kind == "chunk":
+                if on_chunk and not job.cancelled:
+                    on_chunk(job, payload)
+                    chunks += 1
+            else:
+                job.finished = time.perf_counter()
+                if kind == "done":
+                    job.status, job.result = "done", payload
+                    callback = on_done and (lambda: on_done(job, payload))
+                elif kind == "cancelled":
+                    job.status = "cancelled"
+                    callback = on_cancel and (lambda: on_cancel(job))
+                else:
+                    job.status, job.error = "error", payload
+                    callback = on_error and (lambda: on_error(job, payload))
+                self._callbacks.pop(job, None)
+                if callback:
+                    callback()
+
+    def wait(self, job, timeout=None):
+        # Headless helper: polls until the job has finished
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while job.running:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise TimeoutError(f"Job {job.name} still running after {timeout}s")
+            if not self.poll():
+                time.sleep(0.005)
+        return job
+
+    @property
+    def busy(self):
+        return bool(self._callbacks)
@@ -0,0 +1,174 @@
+import json
+import os
+
+JSONL_EXTENSIONS = (".jsonl", ".ndjson")
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class InventoryFormatError(ValueError):
+    """The file is valid JSON but not a list of products."""
+
+
+def is_jsonl_path(path):
+    return os.path.splitext(path)[1].lower() in JSONL_EXTENSIONS
+
+
+# --- Reading ---
+class _ChunkReader:
+    # Text buffer over a file that only keeps the unparsed tail in memory
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size=None):
+        if self.pos > self.chunk_size:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.f.read(size or self.chunk_size)
+        if data:
+            self.buf += data
+        else:
+            self.eof = True
+        return bool(data)
+
+    def next_char(self):
+        # Skips whitespace and returns the next character, or "" at end of file
+        while True:
+            buf, pos = self.buf, self.pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self.pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self.fill():
+                return ""
+
+    def decode_value(self):
+        self.next_char()  # raw_decode doesn't skip leading whitespace
+        read_size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A value ending exactly at the buffer end may be cut (e.g. a number)
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(read_size)
+            read_size *= 2  # Values bigger than a chunk: avoid re-parsing too often
+
+    def error(self, message):
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+
+def iter_json_array(f, chunk_size=1 << 16):
+    """Yields the items of a top-level JSON array one at a time."""
+    reader = _ChunkReader(f, chunk_size)
+    if reader.next_char() != "[":
+        raise InventoryFormatError("El archivo JSON debe contener una lista de productos.")
+    reader.pos += 1
+    if reader.next_char() == "]":
+        reader.pos += 1
+    else:
+        while True:
+            yield reader.decode_value()
+            char = reader.next_char()
+            reader.pos += 1
+            if char == "]":
+                break
+            if char != ",":
+                raise reader.error("Expecting ',' delimiter")
+    if reader.next_char():
+        raise reader.error("Extra data")
+
+
+def iter_jsonl(f):
+    """Yields one product per non-empty line of a JSON Lines file."""
+    for line_number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"{e.msg} (línea {line_number})", e.doc, e.pos) from None
+
+
+def iter_products(f, jsonl=False):
+    return iter_jsonl(f) if jsonl else iter_json_array(f)
+
+
+def iter_batches(items, batch_size=5000):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_products_file(path):
+    # Streams products from a .json array or a .jsonl file
+    with open(path, "r", encoding="utf-8") as f:
+        yield from iter_products(f, jsonl=is_jsonl_path(path))
+
+
+# --- Writing ---
+def iter_json_array_text(products, indent=4):
+    # Same text as json.dump(products, f, ensure_ascii=False, indent=indent), one product at a time
+    pad = " " * indent
+    empty = True
+    for product in products:
+        text = json.dumps(product, ensure_ascii=False, indent=indent).replace("\n", "\n" + pad)
+        yield ("[\n" if empty else ",\n") + pad + text
+        empty = False
+    yield "[]" if empty else "\n]"
+
+
+def iter_jsonl_text(products):
+    for product in products:
+        yield json.dumps(product, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def write_products(f, products, jsonl=False):
+    # Returns the number of characters written
+    written = 0
+    chunks = iter_jsonl_text(products) if jsonl else iter_json_array_text(products)
+    for chunk in chunks:
+        f.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def write_products_file(path, products, jsonl=None, fsync=False):
+    # jsonl=None picks the format from the file extension
+    if jsonl is None:
+        jsonl = is_jsonl_path(path)
+    with open(path, "w", encoding="utf-8") as f:
+        write_products(f, products, jsonl=jsonl)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+        return f.tell()
+
+
+def coerce_json_product(product):
+    # Returns the product with ID/Cantidad/Precio coerced, or None if it isn't a valid product
+    if not (isinstance(product, dict) and "ID" in product and "Nombre" in product and "Cantidad" in product and "Precio" in product):
+        return None
+    try:
+        product["ID"] = str(product["ID"])
+        product["Cantidad"] = int(product["Cantidad"])
+        product["Precio"] = float(product["Precio"])
+    except (ValueError, TypeError, OverflowError):
+        return None
+    return product
@@ -0,0 +1,165 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from inventory_io import iter_product_file
+
+# Many supplier files at once: every file is parsed and validated in a worker process
+# (openpyxl and the JSON decoder are pure Python, so threads wouldn't run them in
+# parallel) and the parent merges the results in file name order, so which file wins
+# an ID never depends on which worker finished first. Workers are spawned, not
+# forked, so the app's threads and Tk state are never copied into them.
+
+WAIT_SECONDS = 0.1   # How often the parent checks for cancellation while it waits
+
+
+def read_file_columns(path, where=()):
+    """Worker body: the valid products of one file as four column lists.
+
+    Returns (ids, names, quantities, prices, extras, counts); columns pickle
+    much smaller and faster than one dict per product. The few products with
+    more fields (JSON) go whole in extras, by row.
+    """
+    counts = {"rows": 0, "invalid": 0, "filtered": 0}
+    ids, names, quantities, prices = [], [], [], []
+    extras = {}
+    for product in iter_product_file(path, counts, where):
+        if len(product) > 4:
+            extras[len(ids)] = product
+        ids.append(product["ID"])
+        names.append(product["Nombre"])
+        quantities.append(product["Cantidad"])
+        prices.append(product["Precio"])
+    return ids, names, quantities, prices, extras, counts
+
+
+def merge_order(paths):
+    # Name order, whatever order the files were picked in
+    return sorted(dict.fromkeys(paths), key=lambda path: (os.path.basename(path).lower(), path))
+
+
+def default_workers(files):
+    return max(1, min(files, os.cpu_count() or 1))
+
+
+def read_files(paths, workers=None, where=(), check_cancelled=None):
+    """Yields (path, columns, error) for paths in order as each is ready.
+
+    Files are read by up to workers processes (one file per process at a
+    time); with one worker they are read here, without a pool. A file that
+    can't be read gives columns None and its error instead of stopping the
+    others. check_cancelled() is called while waiting and may raise.
+    """
+    workers = workers or default_workers(len(paths))
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            if check_cancelled is not None:
+                check_cancelled()
+            try:
+                yield path, read_file_columns(path, where), None
+            except Exception as e:
+                yield path, None, e
+        return
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                                   mp_context=multiprocessing.get_context("spawn"))
+    try:
+        futures = [executor.submit(read_file_columns, path, where) for path in paths]
+        for path, future in zip(paths, futures):
+            while True:
+                if check_cancelled is not None:
+                    check_cancelled()
+                try:
+                    columns = future.result(timeout=WAIT_SECONDS)
+                except FutureTimeout:
+                    continue
+                except Exception as e:
+                    yield path, None, e
+                else:
+                    yield path, columns, None
+                break
+    except BaseException:
+        # Cancelled or the caller stopped early: files not started are dropped and the
+        # ones being read finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+
+
+def merge_files(paths, existing_ids=(), workers=None, where=(), check_cancelled=None, on_file=None):
+    """Reads paths in parallel and merges them into one deduplicated list.
+
+    Files are merged in name order (merge_order): an ID already in
+    existing_ids is skipped, and an ID in several files is taken from the
+    first file in that order (the first row within a file). Returns
+    (products, reports) with one report per file: "file", "rows",
+    "invalid", "filtered", "repeated" (earlier in the same file),
+    "conflicts" (taken by an earlier file), "existing", "imported" and
+    "error" (None, or why the file couldn't be read). on_file(report) is
+    called as each file is merged.
+    """
+    paths = merge_order(paths)
+    existing = set(existing_ids)
+    owner = {}   # ID -> index of the file it was taken from
+    products = []
+    reports = []
+    for index, (path, columns, error) in enumerate(read_files(paths, workers, where, check_cancelled)):
+        report = {"file": path, "rows": 0, "invalid": 0, "filtered": 0, "repeated": 0, "conflicts": 0,
+                  "existing": 0, "imported": 0, "error": None}
+        if error is not None:
+            report["error"] = str(error) or type(error).__name__
+        else:
+            ids, names, quantities, prices, extras, counts = columns
+            report.update(counts)
+            for row, (product_id, name, quantity, price) in enumerate(zip(ids, names, quantities, prices)):
+                if product_id in existing:
+                    report["existing"] += 1
+                    continue
+                taken = owner.get(product_id)
+                if taken is None:
+                    owner[product_id] = index
+                    products.append(extras.get(row) or {"ID": product_id, "Nombre": name, "Cantidad": quantity, "Precio": price})
+                    report["imported"] += 1
+                elif taken == index:
+                    report["repeated"] += 1
+                else:
+                    report["conflicts"] += 1
+        reports.append(report)
+        if on_file is not None:
+            on_file(report)
+    return products, reports
+
+
+def describe_report(report):
+    # One line per file for the import summary
+    name = os.path.basename(report["file"])
+    if report["error"] is not None:
+        return f"{name}: no se pudo leer ({report['error']})"
+    skipped = [(report["invalid"], "inválidos"), (report["repeated"], "repetidos en el archivo"),
+               (report["conflicts"], "ya en un archivo anterior"), (report["existing"], "ya en el inventario"),
+               (report["filtered"], "no cumplen el filtro")]
+    details = ", ".join(f"{count} {label}" for count, label in skipped if count)
+    return f"{name}: {report['imported']} de {report['rows']} filas importadas" + (f" ({details})" if details else "")
+
+
+# --- Background job body (see jobs.JobRunner) ---
+def parallel_import_job(paths, existing_ids, workers=None, where=(), chunk_size=5000):
+    # Every file is read and merged before the first chunk is committed: what goes in
+    # doesn't depend on worker timing, and a file that fails halfway adds nothing
+    # (it is reported and the other files are still imported)
+    def work(job):
+        read = {"rows": 0}
+
+        def file_done(report):
+            print(describe_report(report))
+            read["rows"] += report["rows"]
+            job.progress(read["rows"])
+
+        products, reports = merge_files(paths, existing_ids, workers, where, job.check_cancelled, file_done)
+        for start in range(0, len(products), chunk_size):
+            job.check_cancelled()
+            job.commit(products[start:start + chunk_size])
+        job.progress(read["rows"], read["rows"])
+        skipped = sum(r["invalid"] + r["repeated"] + r["conflicts"] + r["existing"] for r in reports)
+        return {"rows": read["rows"], "skipped": skipped, "filtered": sum(r["filtered"] for r in reports),
+                "files": reports}
+    return work
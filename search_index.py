@@ -0,0 +1,135 @@
+import threading
+import unicodedata
+from array import array
+
+
+def normalize(text):
+    # Lowercase and strip accents so "Jabón" matches "jabon"
+    text = str(text)
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in text if not unicodedata.combining(c)).casefold()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndex:
+    """Trigram index over the normalized ID and Nombre of every product in a store.
+
+    Kept up to date through the store listener. search() returns matching keys
+    in store order with the same substring semantics as the old linear search.
+    Queries of three or more characters only verify the keys under their rarest
+    trigram; a query that extends the previous one narrows the previous result
+    instead.
+    """
+
+    MIN_QUERY = 3
+
+    def __init__(self, store):
+        self._lock = threading.RLock()
+        self._texts = {}      # key -> (normalized ID, normalized Nombre)
+        self._postings = {}   # trigram -> array of keys, ascending
+        self._entries = 0     # postings entries, including removed keys
+        self._dead = 0        # postings entries whose key was removed
+        self._version = 0
+        self._last = None     # (version, query, keys) of the previous search
+        with store.lock:
+            for key, product in store.items():
+                self._add(key, product)
+            store.add_listener(self._on_change)
+
+    # --- Maintenance ---
+    def _on_change(self, op, key, product):
+        with self._lock:
+            if op == "add":
+                self._add(key, product)
+            elif op == "remove":
+                self._remove(key)
+            else:
+                self._texts.clear()
+                self._postings.clear()
+                self._entries = self._dead = 0
+            self._version += 1
+
+    def _add(self, key, product):
+        fields = (normalize(product.get("ID", "")), normalize(product.get("Nombre", "")))
+        self._texts[key] = fields
+        grams = trigrams(fields[0]) | trigrams(fields[1])
+        postings = self._postings
+        for gram in grams:
+            keys = postings.get(gram)
+            if keys is None:
+                postings[gram] = array("q", (key,))
+            else:
+                keys.append(key)
+        self._entries += len(grams)
+
+    def _remove(self, key):
+        # Postings are cleaned lazily: removed keys are skipped at query time
+        fields = self._texts.pop(key, None)
+        if fields is not None:
+            self._dead += len(trigrams(fields[0]) | trigrams(fields[1]))
+
+    def _compact(self):
+        texts = self._texts
+        for gram, keys in list(self._postings.items()):
+            live = array("q", (k for k in keys if k in texts))
+            if live:
+                self._postings[gram] = live
+            else:
+                del self._postings[gram]
+        self._entries -= self._dead
+        self._dead = 0
+
+    # --- Queries ---
+    def search(self, query):
+        query = normalize(query.strip())
+        with self._lock:
+            if self._dead > self._entries // 2:
+                self._compact()
+            if not query:
+                keys = list(self._texts)
+            else:
+                keys = self._match(query, self._candidates(query))
+            self._last = (self._version, query, keys)
+            return keys
+
+    def filter(self, query, keys):
+        # The keys among keys that search(query) would return, in the given order
+        query = normalize(query.strip())
+        if not query:
+            return list(keys)
+        with self._lock:
+            return self._match(query, keys)
+
+    def _candidates(self, query):
+        best = None
+        if len(query) >= self.MIN_QUERY:
+            sizes = []
+            for gram in trigrams(query):
+                keys = self._postings.get(gram)
+                if keys is None:
+                    return ()
+                sizes.append(keys)
+            best = min(sizes, key=len)
+        last = self._last
+        if last is not None and last[0] == self._version and last[1] in query:
+            # Typing more characters can only narrow the previous result
+            if best is None or len(last[2]) < len(best):
+                best = last[2]
+        return self._texts if best is None else best
+
+    def _match(self, query, candidates):
+        texts = self._texts
+        matches = []
+        for key in candidates:
+            fields = texts.get(key)
+            if fields is not None and (query in fields[0] or query in fields[1]):
+                matches.append(key)
+        return matches
+
+    def __len__(self):
+        return len(self._texts)
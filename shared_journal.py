@@ -0,0 +1,344 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from inventory_journal import InventoryJournal
+from json_stream import is_jsonl_path, write_products_file
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """Advisory lock on a file next to the inventory (flock, or msvcrt on Windows).
+
+    Only instances that take it are held back. Shared holds let readers in
+    together; on Windows every hold is exclusive. Threads of one process
+    take turns too.
+    """
+
+    RETRY_SECONDS = 0.05   # msvcrt can't block indefinitely, so it polls
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def held(self, exclusive=True):
+        with self._thread_lock:
+            with open(self.path, "a+b") as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                else:
+                    f.seek(0)
+                    while True:
+                        try:
+                            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                            break
+                        except OSError:
+                            time.sleep(self.RETRY_SECONDS)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                    else:
+                        f.seek(0)
+                        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _file_id(path):
+    # Identity and state of a file for change detection; None if it doesn't exist
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _content_key(product):
+    return json.dumps(product, sort_keys=True, ensure_ascii=False)
+
+
+class SharedJournal(InventoryJournal):
+    """InventoryJournal for an inventory several instances use at the same time.
+
+    Writes take an advisory lock (<snapshot>.lock). commit() first applies
+    what other instances appended since this one last read, rebasing the
+    unsaved local changes on top, then appends them: whoever saves an ID
+    first keeps it, and a local product that lost is dropped and reported.
+    refresh() applies other instances' changes without writing, and poll()
+    tells from two stat() calls whether there can be any. The journal is
+    read from where this instance stopped, so only the new records are
+    parsed; when another instance compacted it, the snapshot is reread and
+    diffed against the store. take_changes() returns the store keys other
+    instances' changes added and removed since the last call.
+    """
+
+    COMPACT_RECORDS = 5000   # Compacted on commit past this many records, not on close
+
+    def __init__(self, snapshot_path, fsync=True):
+        super().__init__(snapshot_path, fsync)
+        self.lock = FileLock(snapshot_path + ".lock")
+        self._store = None
+        self._ops = []   # Unsaved local mutations: [op, key, product]
+        self._applying = False
+        self._offset = 0   # Bytes of the journal already applied
+        self._journal_id = None
+        self._snapshot_id = None
+        self._seen = None
+        self._added = []
+        self._removed = []
+        self._dropped = []
+
+    # --- Startup ---
+    def load_into(self, store):
+        with self.lock.held():   # Recovery may rename or truncate files
+            replayed = super().load_into(store)
+            self._mark_read()
+        return replayed
+
+    def _mark_read(self):
+        # Everything on disk is applied: remember where the journal ends
+        journal = _file_id(self.journal_path)
+        self._journal_id = journal[:2] if journal else None
+        self._offset = journal[2] if journal else 0
+        self._snapshot_id = _file_id(self.snapshot_path)
+        self._seen = (journal, self._snapshot_id)
+
+    # --- Recording mutations ---
+    def attach(self, store):
+        self._store = store
+        store.add_listener(self.record)
+
+    def record(self, op, key, product):
+        if self._applying:
+            return   # Another instance's change, already on disk
+        with self._lock:
+            self._ops.append([op, key, product])
+
+    # --- Changes from other instances ---
+    def poll(self):
+        # True if the files changed since they were last read (or written) here
+        return (_file_id(self.journal_path), _file_id(self.snapshot_path)) != self._seen
+
+    def refresh(self):
+        if not self.poll():
+            return False
+        with self.lock.held(exclusive=False):
+            with self._store.lock:
+                self._catch_up()
+        return True
+
+    def take_changes(self):
+        # {"added", "removed", "dropped"} since the last call, or None; dropped are
+        # unsaved local products that lost their ID to another instance
+        with self._store.lock:
+            if not (self._added or self._removed or self._dropped):
+                return None
+            removed = set(self._removed)
+            changes = {"added": [key for key in self._added if key not in removed], "removed": list(removed),
+                       "dropped": self._dropped}
+            self._added, self._removed, self._dropped = [], [], []
+            return changes
+
+    def _catch_up(self):
+        # File lock and store lock held
+        journal = _file_id(self.journal_path)
+        snapshot = _file_id(self.snapshot_path)
+        self._applying = True
+        try:
+            if snapshot != self._snapshot_id or (journal is not None and self._journal_id not in (None, journal[:2])) \
+                    or (journal is None and self._offset) or (journal is not None and journal[2] < self._offset):
+                self._reload()   # Compacted (or rewritten) by another instance
+            elif journal is not None and journal[2] > self._offset:
+                self._read_tail(journal)
+        finally:
+            self._applying = False
+        self._seen = (_file_id(self.journal_path), _file_id(self.snapshot_path))
+
+    def _read_tail(self, journal):
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read(journal[2] - self._offset)
+        self._journal_id = journal[:2]
+        local = self._local_adds()
+        local_keys = self._local_keys()
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break   # Torn by a writer that crashed; the next commit truncates it
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"Stopping at a damaged journal record in {self.journal_path} at byte {self._offset}")
+                break
+            self._offset += len(line)
+            self._seq = max(self._seq, record.get("s", 0))
+            self._records_since_snapshot += 1
+            self._apply_remote(record, local, local_keys)
+
+    def _local_keys(self):
+        # Keys of products added here and not saved yet (removed since or not): they
+        # aren't in the files, so other instances' records never refer to them
+        return {entry[1] for entry in self._ops if entry[0] == "add"}
+
+    def _local_adds(self):
+        # Unsaved local adds still in the store, by ID
+        store = self._store
+        return {entry[2].get("ID"): entry for entry in self._ops
+                if entry[0] == "add" and store.get(entry[1]) is not None}
+
+    def _drop_local(self, entry):
+        # A local product lost its ID to another instance: it leaves the store unsaved
+        key = entry[1]
+        self._dropped.append(self._store.remove(key))
+        self._removed.append(key)
+        self._ops = [op for op in self._ops if op[1] != key]
+
+    def _apply_remote(self, record, local, local_keys):
+        # local: unsaved local adds still in the store, by ID; local_keys: _local_keys()
+        store = self._store
+        op = record.get("op")
+        if op == "add":
+            product = record["p"]
+            entry = local.pop(product.get("ID"), None)
+            if entry is not None:
+                local_keys.discard(entry[1])
+                self._drop_local(entry)
+            self._added.append(store.add(product))
+        elif op == "del":
+            product = record["p"]
+            candidates = store.keys_for_id(product["ID"]) if "ID" in product else store.keys_for_name(product.get("Nombre", ""))
+            for key in candidates:
+                if key not in local_keys and store.get(key) == product:
+                    store.remove(key)
+                    self._removed.append(key)
+                    return
+            # Not here any more: deleted locally too, so that delete needn't be saved
+            for entry in self._ops:
+                if entry[0] == "remove" and entry[1] not in local_keys and entry[2] == product:
+                    self._ops.remove(entry)
+                    return
+        elif op == "clear":
+            for key in store.keys():
+                if key not in local_keys:
+                    store.remove(key)
+                    self._removed.append(key)
+            self._ops = [entry for entry in self._ops if entry[1] in local_keys]
+
+    def _reload(self):
+        # Reads snapshot + journal into a scratch store and applies the difference
+        from inventory_store import InventoryStore
+        reader = InventoryJournal(self.snapshot_path)
+        fresh = InventoryStore()
+        self._records_since_snapshot = reader.load_into(fresh)
+        self._seq = max(self._seq, reader._seq)
+        store = self._store
+        local = self._local_adds()
+        local_keys = self._local_keys()
+
+        wanted = Counter(_content_key(product) for product in fresh.to_list())
+        for key in store.keys():
+            if key in local_keys:
+                continue
+            content = _content_key(store.get(key))
+            if wanted[content]:
+                wanted[content] -= 1
+            else:
+                store.remove(key)
+                self._removed.append(key)
+        # Products deleted here but not saved yet stay deleted
+        kept_ops = []
+        for entry in self._ops:
+            if entry[0] == "remove" and entry[1] not in local_keys:
+                content = _content_key(entry[2])
+                if not wanted[content]:
+                    continue   # Gone from the file too
+                wanted[content] -= 1
+            kept_ops.append(entry)
+        self._ops = kept_ops
+        for product in fresh.to_list():
+            content = _content_key(product)
+            if wanted[content]:
+                wanted[content] -= 1
+                entry = local.pop(product.get("ID"), None)
+                if entry is not None:
+                    self._drop_local(entry)
+                self._added.append(store.add(product))
+        self._mark_read()
+
+    # --- Writing ---
+    def commit(self):
+        # Catches up, then appends the local changes in one write. Returns bytes written
+        store = self._store
+        if store is None:
+            return 0
+        with self.lock.held():
+            with store.lock:
+                self._catch_up()
+                with self._lock:
+                    ops, self._ops = self._ops, []
+                    lines = []
+                    for op, key, product in ops:
+                        self._seq += 1
+                        if op == "add":
+                            rec = {"s": self._seq, "op": "add", "p": product}
+                        elif op == "remove":
+                            rec = {"s": self._seq, "op": "del", "p": product}
+                        else:
+                            rec = {"s": self._seq, "op": "clear"}
+                        lines.append(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+                data = "".join(lines).encode("utf-8")
+                if data:
+                    self._append(data)
+                    self._records_since_snapshot += len(lines)
+                compact = self._records_since_snapshot >= self.COMPACT_RECORDS
+                products = store.to_list() if compact else None
+            if compact:
+                # Local changes made from here on are recorded and saved after the snapshot
+                self._compact(products)
+        return len(data)
+
+    def _append(self, data):
+        # The journal is opened per write: a handle kept open would outlive another
+        # instance's compaction and write into a deleted file
+        with open(self.journal_path, "ab") as f:
+            if f.tell() > self._offset:
+                f.truncate(self._offset)   # Torn tail left by a crashed writer
+            f.write(data)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self.journal_bytes_written += len(data)
+        self._offset += len(data)
+        journal = _file_id(self.journal_path)
+        self._journal_id = journal[:2]
+        self._seen = (journal, _file_id(self.snapshot_path))
+
+    def _compact(self, products):
+        # File lock held; products is the store as the files have it. Same commit
+        # sequence as InventoryJournal.compact, so recovery after a crash is the same
+        self._freeze_journal()
+        self.snapshot_bytes_written += write_products_file(
+            self.next_path, products, jsonl=is_jsonl_path(self.snapshot_path), fsync=True)
+        self._fsync_dir()
+        if os.path.exists(self.compacting_path):
+            os.remove(self.compacting_path)  # commit point
+        os.replace(self.next_path, self.snapshot_path)
+        self._fsync_dir()
+        self._records_since_snapshot = 0
+        self._mark_read()
+
+    def start_compactor(self, store, interval=30.0, max_records=1000):
+        pass   # Compaction needs the lock and a caught-up store: commit() does it
+
+    def close(self, store=None):
+        # Saves without compacting: a snapshot rewrite would make every other
+        # instance reread the whole inventory
+        self.commit()
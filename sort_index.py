@@ -0,0 +1,296 @@
+import bisect
+import functools
+import itertools
+import math
+from array import array
+
+BLOCK = 1000   # Keys per block; blocks split at twice this
+
+
+def sort_value(value):
+    # Total order for mixed columns: numbers, then text (case-insensitive), then the rest
+    if type(value) in (int, float, bool):
+        return (0, value) if value == value else (2, "nan")
+    if type(value) is str:
+        return (1, value.casefold())
+    return (2, repr(value))
+
+
+def _sortable(values):
+    # Values that order like their sort_value(); a column of one kind needs no tuples
+    kinds = set(map(type, values))
+    if kinds <= {str}:
+        return [value.casefold() for value in values]
+    if kinds <= {int, float} and all(value == value for value in values):
+        return values
+    return [sort_value(value) for value in values]
+
+
+def sort_keys(store, keys, spec):
+    # keys in the order of spec, a list of (field, descending); ties keep their order.
+    # One-off sort for row subsets such as search results.
+    keys = list(keys)
+    for field, descending in reversed(spec):
+        keys.sort(key=lambda key: sort_value(store.value(key, field)), reverse=descending)
+    return keys
+
+
+def merge_keys(store, keys, new_keys, spec):
+    # keys, already in the order of spec, with new_keys put where sort_keys would put
+    # them after keys: only the new keys are sorted and binary searched
+    order = functools.cmp_to_key(lambda a, b: _compare(store, spec, a, b))
+    merged = []
+    start = 0
+    for key in sort_keys(store, new_keys, spec):
+        i = bisect.bisect_right(keys, order(key), lo=start, key=order)
+        merged.extend(keys[start:i])
+        merged.append(key)
+        start = i
+    merged.extend(keys[start:])
+    return merged
+
+
+def _compare(store, spec, a, b):
+    for field, descending in spec:
+        x, y = sort_value(store.value(a, field)), sort_value(store.value(b, field))
+        if x != y:
+            return (x > y) - (x < y) if not descending else (x < y) - (x > y)
+    return 0
+
+
+class SortIndex:
+    """Every key of a store ordered by one field, ties in store order.
+
+    Keys are kept in blocks of array('q') (8 bytes per product), compared
+    through the store's values, so an insert or delete only shifts one small
+    block. Mutations are queued by the store listener and applied by sync()
+    before the next read; a large batch (an import) is applied by sorting
+    everything again instead. An index that isn't read (its column no longer
+    leads the sort) stops queueing once the queue is past that size and is
+    sorted again on its next read. close() detaches it from the store.
+    """
+
+    def __init__(self, store, field):
+        self.store = store
+        self.field = field
+        self.version = 0
+        self._pending_add = []
+        self._pending_remove = {}   # key -> sort value of a removed product
+        self._dirty = False         # Changes were dropped: rebuild on the next sync()
+        with store.lock:
+            self._rebuild()
+            store.add_listener(self._on_change)
+
+    def close(self):
+        with self.store.lock:
+            self.store.remove_listener(self._on_change)
+            self._pending_add = []
+            self._pending_remove = {}
+            self._set_blocks([])
+
+    # --- Maintenance ---
+    def _on_change(self, op, key, product):
+        if op == "clear":
+            self._pending_add = []
+            self._pending_remove = {}
+            self._dirty = False
+            self._set_blocks([])
+            self.version += 1
+            return
+        if self._dirty:
+            return
+        if op == "add":
+            self._pending_add.append(key)
+        elif op == "remove":
+            self._pending_remove[key] = sort_value(product.get(self.field))
+        if len(self._pending_add) + len(self._pending_remove) > self._rebuild_size():
+            # sync() would sort everything again anyway: stop holding the changes
+            self._pending_add = []
+            self._pending_remove = {}
+            self._dirty = True
+
+    def _rebuild_size(self):
+        # Queued changes past which sorting everything again is cheaper than applying them
+        return len(self.store) // 4 + 1000
+
+    def _rebuild(self):
+        keys, (values,) = self.store.columns((self.field,))
+        order = sorted(range(len(keys)), key=_sortable(values).__getitem__)
+        self._set_blocks([keys[i] for i in order])
+        self._pending_add = []
+        self._pending_remove = {}
+        self._dirty = False
+
+    def _set_blocks(self, keys):
+        self._blocks = [array("q", keys[i:i + BLOCK]) for i in range(0, len(keys), BLOCK)]
+        self._maxes = [self._item(block[-1]) for block in self._blocks]
+        self._offsets = None
+
+    def sync(self):
+        with self.store.lock:
+            if not self._pending_add and not self._pending_remove and not self._dirty:
+                return
+            if self._dirty or len(self._pending_add) + len(self._pending_remove) > self._rebuild_size():
+                self._rebuild()
+            else:
+                for key, value in self._pending_remove.items():
+                    self._remove((value, key))
+                self._pending_remove = {}
+                adds, self._pending_add = self._pending_add, []
+                for key in adds:
+                    if self.store.has_key(key):
+                        self._insert(key)
+            self.version += 1
+
+    def _item(self, key):
+        value = self._pending_remove.get(key)
+        if value is None:
+            value = sort_value(self.store.value(key, self.field))
+        return value, key
+
+    def _locate(self, item):
+        # (block, position) where item is, or would be inserted
+        b = bisect.bisect_left(self._maxes, item)
+        if b == len(self._blocks):
+            return (b - 1, len(self._blocks[-1])) if b else (0, 0)
+        block = self._blocks[b]
+        lo, hi = 0, len(block)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._item(block[mid]) < item:
+                lo = mid + 1
+            else:
+                hi = mid
+        return b, lo
+
+    def _insert(self, key):
+        item = self._item(key)
+        if not self._blocks:
+            self._blocks, self._maxes = [array("q", (key,))], [item]
+            self._offsets = None
+            return
+        b, i = self._locate(item)
+        block = self._blocks[b]
+        block.insert(i, key)
+        if i == len(block) - 1:
+            self._maxes[b] = item
+        if len(block) > 2 * BLOCK:
+            self._blocks[b:b + 1] = [block[:BLOCK], block[BLOCK:]]
+            self._maxes.insert(b, self._item(block[BLOCK - 1]))
+        self._offsets = None
+
+    def _remove(self, item):
+        if not self._blocks:
+            return
+        b, i = self._locate(item)
+        block = self._blocks[b]
+        if i >= len(block) or block[i] != item[1]:
+            return   # Added and removed before the index saw it
+        del block[i]
+        if not block:
+            del self._blocks[b]
+            del self._maxes[b]
+        elif i == len(block):
+            self._maxes[b] = self._item(block[-1])
+        self._offsets = None
+
+    # --- Positions ---
+    def _prefix(self):
+        if self._offsets is None:
+            self._offsets = list(itertools.accumulate(len(block) for block in self._blocks))
+        return self._offsets
+
+    def __len__(self):
+        offsets = self._prefix()
+        return offsets[-1] if offsets else 0
+
+    def key_at(self, position):
+        offsets = self._prefix()
+        b = bisect.bisect_right(offsets, position)
+        return self._blocks[b][position - (offsets[b - 1] if b else 0)]
+
+    def keys(self, start, stop):
+        # Keys at positions [start, stop), copied block by block
+        offsets = self._prefix()
+        b = bisect.bisect_right(offsets, start)
+        keys = []
+        while start < stop:
+            block_start = offsets[b - 1] if b else 0
+            keys.extend(self._blocks[b][start - block_start:stop - block_start])
+            start = offsets[b]
+            b += 1
+        return keys
+
+    def position(self, item):
+        # Number of keys ordered before item
+        if not self._blocks:
+            return 0
+        b, i = self._locate(item)
+        offsets = self._prefix()
+        return (offsets[b - 1] if b else 0) + i
+
+    def group(self, position):
+        # [start, stop) positions of the keys whose value equals the one at position
+        value = self._item(self.key_at(position))[0]
+        return self.position((value, -math.inf)), self.position((value, math.inf))
+
+
+class SortedView:
+    """All keys of a store in the order of spec, [(field, descending), ...].
+
+    A read-only sequence for VirtualTreeview that follows the store: positions
+    come from the SortIndex of the first field, so nothing is sorted when the
+    order is toggled. Descending keeps ties in store order, and the other
+    fields order a run of equal first-field values only when a window reaches
+    it.
+    """
+
+    def __init__(self, store, indexes, spec):
+        self.store = store
+        self.index = indexes[spec[0][0]]
+        self.descending = spec[0][1]
+        self.rest = spec[1:]
+        self._groups = {}      # view position of a run's first key -> keys of that run, in spec order
+        self._version = None
+
+    def _sync(self):
+        self.index.sync()
+        if self._version != self.index.version:
+            self._version = self.index.version
+            self._groups = {}
+            self._last = 0, ()
+
+    def __len__(self):
+        with self.store.lock:
+            self._sync()
+            return len(self.index)
+
+    def __getitem__(self, item):
+        with self.store.lock:
+            self._sync()
+            total = len(self.index)
+            if isinstance(item, slice):
+                return [self._key(i, total) for i in range(*item.indices(total))]
+            if item < 0:
+                item += total
+            if not 0 <= item < total:
+                raise IndexError(item)
+            return self._key(item, total)
+
+    def _key(self, i, total):
+        index = self.index
+        if not self.descending and not self.rest:
+            return index.key_at(i)
+        first, keys = self._last
+        if not first <= i < first + len(keys):
+            # Find the run of equal values holding view position i
+            start, stop = index.group(total - 1 - i if self.descending else i)
+            first = total - stop if self.descending else start
+            keys = self._groups.get(first)
+            if keys is None:
+                keys = index.keys(start, stop)
+                if self.rest:
+                    keys = sort_keys(self.store, keys, self.rest)
+                self._groups[first] = keys
+            self._last = first, keys
+        return keys[i - first]
@@ -0,0 +1,6 @@
+# The modules live at the repo root; plain `pytest` from anywhere finds them too.
+# Run from the repo root: python -m pytest -q
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
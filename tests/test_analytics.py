@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from inventory_analytics import InventoryAnalytics, compute_full
+from inventory_store import InventoryStore
+
+ODD = [
+    {"ID": "sin-precio", "Nombre": "sin precio", "Cantidad": 3},
+    {"Nombre": "sin ID", "Cantidad": 2, "Precio": 1.5},
+    {"ID": "texto", "Nombre": "texto", "Cantidad": "7", "Precio": "2.5"},
+    {"ID": "nan", "Nombre": "nan", "Cantidad": 1, "Precio": float("nan")},
+    {"ID": "inf", "Nombre": "inf", "Cantidad": float("inf"), "Precio": 2.0},
+    {"ID": "enorme", "Nombre": "enorme", "Cantidad": 10 ** 30, "Precio": 0.1},
+    {"ID": "bool", "Nombre": "bool", "Cantidad": True, "Precio": 1.0},
+    {"ID": "negativo", "Nombre": "negativo", "Cantidad": -4, "Precio": 0.3},
+]
+
+
+def random_product(rng, i):
+    if rng.random() < 0.05:
+        return dict(rng.choice(ODD))
+    # Few distinct prices and quantities, so equal values (ties) are common
+    return {"ID": f"P{rng.randrange(10 * (i + 1))}", "Nombre": f"producto {i}",
+            "Cantidad": rng.randrange(0, 20), "Precio": rng.choice([0.1, 0.2, 0.3, 1.25, 9.99, 10.0])}
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_incremental_matches_full_recompute(seed):
+    # Adds, odd products, duplicate pushes, deletes of the most valuable products,
+    # import chunks and clears; the snapshot is compared after every step
+    rng = random.Random(seed)
+    store = InventoryStore()
+    if rng.random() < 0.5:
+        store.extend(random_product(rng, i) for i in range(rng.randrange(50)))
+    analytics = InventoryAnalytics(store, low_stock=rng.choice([0, 3, 5]), top_n=rng.choice([1, 3, 10]))
+    for step in range(150):
+        op = rng.random()
+        keys = store.keys()
+        if op < 0.45:
+            store.add(random_product(rng, step))
+        elif op < 0.55:
+            store.add_if_new(random_product(rng, step))   # Network push: duplicates are skipped
+        elif op < 0.7 and keys:
+            store.remove(rng.choice(keys))
+        elif op < 0.8 and keys:
+            # Delete the most valuable products, which empties the top list
+            top = analytics.snapshot()["top"]
+            store.remove_many(key for _, key in top[:rng.randrange(1, len(top) + 1)])
+        elif op < 0.9:
+            with store.lock:   # Import chunk
+                for i in range(rng.randrange(30)):
+                    store.add_if_new(random_product(rng, step * 100 + i))
+        elif op < 0.92:
+            store.clear()
+        else:
+            store.remove_many(rng.sample(keys, min(len(keys), rng.randrange(10))))
+        assert analytics.snapshot() == compute_full(store, analytics.low_stock, analytics.top_n), step
@@ -0,0 +1,94 @@
+import pytest
+
+from chat_history import ChatHistory, ChatHistoryView
+
+
+def message(i):
+    return f"user{i % 50}: mensaje número {i} ñandú 🌸\nsegunda línea"
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "chat_history.log")
+
+
+def test_pages_read_back_what_was_appended(path):
+    history = ChatHistory(path)
+    for i in range(5000):
+        assert history.append(message(i)) == i
+    for at in (0, 2500, 4800):
+        assert history.read(at, at + 200) == [message(i) for i in range(at, at + 200)]
+    assert history.read(4990, 6000) == [message(i) for i in range(4990, 5000)]
+    assert history.read(-5, 0) == [] and history.read(10, 10) == []
+    history.close()
+
+    reopened = ChatHistory(path)
+    assert len(reopened) == 5000 and reopened.read(4999, 5000) == [message(4999)]
+    reopened.close()
+
+
+def test_unindexed_lines_are_indexed_and_torn_line_dropped(path):
+    history = ChatHistory(path)
+    for i in range(10):
+        history.append(message(i))
+    history.close()
+    # Crash after writing the log line but before its index entry, plus a torn line
+    with open(path, "ab") as f:
+        f.write(b'{"t": 0, "text": "sin indice"}\n{"t": 0, "text": "cort')
+    history = ChatHistory(path)
+    assert len(history) == 11 and history.read(10, 11) == ["sin indice"]
+    history.append("después")
+    assert history.read(9, 12) == [message(9), "sin indice", "después"]
+    history.close()
+
+
+def test_index_longer_than_the_log_is_truncated(path):
+    history = ChatHistory(path)
+    for i in range(10):
+        history.append(message(i))
+    history.close()
+    with open(path + ".idx", "ab") as f:
+        f.write(b"\xff" * 8 * 3 + b"\x01\x02")
+    history = ChatHistory(path)
+    assert len(history) == 10 and history.read(0, 10) == [message(i) for i in range(10)]
+    history.append("después")
+    assert history.read(10, 11) == ["después"]
+    history.close()
+
+
+@pytest.fixture
+def tk_root():
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        pytest.skip(f"sin pantalla ({e})")
+    yield root
+    root.destroy()
+
+
+def widget_lines(text):
+    return int(text.index("end-1c").split(".")[0]) - 1
+
+
+def test_view_keeps_a_bounded_window(path, tk_root):
+    import tkinter as tk
+    text = tk.Text(tk_root, height=20, width=60)
+    text.pack(side=tk.LEFT)
+    scrollbar = tk.Scrollbar(tk_root, command=text.yview)
+    scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+    history = ChatHistory(path)
+    view = ChatHistoryView(text, scrollbar, history, max_lines=300, page=50)
+    for i in range(2000):
+        view.append(message(i))
+    tk_root.update()
+    assert widget_lines(text) == view.last - view.first == 300
+    assert text.get("1.0", "1.end") == history.read(view.first, view.first + 1)[0].replace("\n", " ")
+
+    # Scrolling to the top pages older messages in; the widget stays bounded
+    for _ in range(10):
+        text.yview_moveto(0)
+        tk_root.update()
+    assert view.first < 2000 - 300 and widget_lines(text) <= 300
+    assert text.get("1.0", "1.end") == history.read(view.first, view.first + 1)[0].replace("\n", " ")
+    history.close()
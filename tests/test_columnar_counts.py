@@ -0,0 +1,29 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from arrow_io import write_columnar_rows
+from inventory_io import iter_product_file, parse_where
+from json_stream import write_products_file
+
+
+def products(n):
+    return [{"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 10, "Precio": float(i % 7)} for i in range(n)]
+
+
+@pytest.mark.parametrize("extension", [".parquet", ".arrow"])
+def test_rows_and_filtered_mean_the_same_as_for_json(tmp_path, extension):
+    items = products(3000)
+    json_path = str(tmp_path / "productos.jsonl")
+    write_products_file(json_path, items)
+    path = str(tmp_path / ("productos" + extension))
+    rows = [(p["ID"], p["Nombre"], p["Cantidad"], p["Precio"]) for p in items]
+    write_columnar_rows(path, [rows[i:i + 1000] for i in range(0, len(rows), 1000)], extension == ".parquet")
+
+    where = parse_where("Cantidad > 2 y Precio <= 4")
+    json_counts, columnar_counts = {}, {}
+    expected = list(iter_product_file(json_path, json_counts, where))
+    assert list(iter_product_file(path, columnar_counts, where)) == expected
+    for field in ("rows", "invalid", "filtered"):
+        assert columnar_counts[field] == json_counts[field], field
+    assert columnar_counts["rows"] == 3000 and columnar_counts["filtered"] == 3000 - len(expected)
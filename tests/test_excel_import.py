@@ -0,0 +1,46 @@
+from openpyxl import Workbook
+
+from inventory_io import excel_import_job, excel_row_to_product, iter_product_file
+from jobs import JobRunner
+
+
+def write_workbook(path, rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["ID", "Nombre", "Cantidad", "Precio"])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def run_import(path, existing_ids=()):
+    runner = JobRunner()
+    chunks = []
+    job = runner.wait(runner.start("import", excel_import_job(path, existing_ids), on_chunk=lambda job, chunk: chunks.extend(chunk)),
+                      timeout=30)
+    assert job.status == "done", job.error
+    return chunks, job.result
+
+
+def test_app_and_cli_read_the_same_ids(tmp_path):
+    path = str(tmp_path / "proveedor.xlsx")
+    write_workbook(path, [[12.0, "tornillo", 5, 1.5], [7, "tuerca", 2.0, 3], ["A-1", "cable", 1, 2.25],
+                          [12, "repetido", 1, 1.0], [3.5, "decimal", 1, 1.0], ["", "sin ID", 1, 1.0],
+                          [8, "sin precio", 1, "caro"]])
+    products, result = run_import(path)
+    assert [p["ID"] for p in products] == ["12", "7", "A-1", "3.5"]
+    assert products == [p for p in iter_product_file(path) if p["ID"] != "12" or p["Nombre"] == "tornillo"]
+    assert result == {"rows": 7, "skipped": 3}
+
+
+def test_ids_already_in_the_inventory_are_skipped(tmp_path):
+    path = str(tmp_path / "proveedor.xlsx")
+    write_workbook(path, [[float(i), f"producto {i}", i, 1.0] for i in range(20)])
+    products, result = run_import(path, existing_ids=[str(i) for i in range(0, 20, 2)])
+    assert [p["ID"] for p in products] == [str(i) for i in range(1, 20, 2)]
+    assert result["skipped"] == 10
+
+
+def test_prices_too_big_for_a_float_are_invalid():
+    assert excel_row_to_product(["1", "enorme", 1, 10 ** 400]) is None
+    assert excel_row_to_product(["2", "normal", 2, 2.5]) == {"ID": "2", "Nombre": "normal", "Cantidad": 2, "Precio": 2.5}
@@ -0,0 +1,119 @@
+import os
+import threading
+
+from inventory_io import json_export_job, json_import_job
+from inventory_store import InventoryStore
+from jobs import JobRunner
+
+
+def make_products(n):
+    return [{"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n)]
+
+
+def test_chunks_are_committed_in_order():
+    runner = JobRunner()
+    received = []
+
+    def work(job):
+        for start in range(0, 100, 10):
+            job.check_cancelled()
+            job.commit(list(range(start, start + 10)))
+            job.progress(start + 10, 100)
+        return "hecho"
+
+    job = runner.wait(runner.start("chunks", work, on_chunk=lambda job, chunk: received.append(chunk)), timeout=10)
+    assert job.status == "done" and job.result == "hecho"
+    assert [n for chunk in received for n in chunk] == list(range(100))
+    assert (job.done, job.total) == (100, 100)
+
+
+def test_error_is_delivered_to_on_error():
+    runner = JobRunner()
+    errors = []
+    job = runner.start("falla", lambda job: 1 / 0, on_error=lambda job, e: errors.append(e))
+    runner.wait(job, timeout=10)
+    assert job.status == "error" and isinstance(job.error, ZeroDivisionError)
+    assert errors == [job.error]
+
+
+def test_missing_file_fails_the_import(tmp_path):
+    runner = JobRunner()
+    job = runner.wait(runner.start("import", json_import_job(str(tmp_path / "no.json"))), timeout=10)
+    assert job.status == "error" and isinstance(job.error, FileNotFoundError)
+
+
+def test_cancel_stops_the_worker_and_drops_later_chunks():
+    runner = JobRunner()
+    started = threading.Event()
+    release = threading.Event()
+    received = []
+    cancelled = []
+
+    def work(job):
+        job.commit("antes")
+        started.set()
+        release.wait(10)
+        job.commit("después")   # Already cancelled: never reaches on_chunk
+        job.check_cancelled()
+        raise AssertionError("siguió tras cancelar")
+
+    job = runner.start("cancel", work, on_chunk=lambda job, chunk: received.append(chunk),
+                       on_cancel=cancelled.append)
+    started.wait(10)
+    runner.poll()
+    job.cancel()
+    release.set()
+    runner.wait(job, timeout=10)
+    assert job.status == "cancelled" and cancelled == [job]
+    assert received == ["antes"]
+
+
+def test_cancelled_export_leaves_no_file(tmp_path):
+    path = str(tmp_path / "export.json")
+    runner = JobRunner()
+    job = runner.start("export", json_export_job(path, make_products(50_000), chunk_size=100))
+    job.cancel()
+    runner.wait(job, timeout=30)
+    assert job.status == "cancelled"
+    assert os.listdir(tmp_path) == []
+
+
+def test_export_then_import_round_trip(tmp_path):
+    products = make_products(12_000)
+    store = InventoryStore(products)
+    path = str(tmp_path / "export.jsonl")
+    runner = JobRunner()
+    job = runner.wait(runner.start("export", json_export_job(path, iter(store), total=len(store))), timeout=30)
+    assert job.status == "done" and job.result == {"rows": len(products)}
+
+    imported = InventoryStore()
+    chunks = []
+
+    def commit(job, chunk):
+        chunks.append(len(chunk))
+        imported.extend(chunk)
+    job = runner.wait(runner.start("import", json_import_job(path, chunk_size=5000), on_chunk=commit), timeout=30)
+    assert job.status == "done" and chunks == [5000, 5000, 2000]
+    assert imported.to_list() == products
+
+
+def test_worker_waits_while_the_ui_thread_is_behind():
+    runner = JobRunner()
+    committed = []
+
+    def work(job):
+        for i in range(runner.MAX_QUEUED * 4):
+            job.commit(i)
+            committed.append(i)
+
+    job = runner.start("rápido", work, on_chunk=lambda job, chunk: None)
+    # Nobody polls: the worker must stop once the queue is full
+    for _ in range(100):
+        if runner._events.full():
+            break
+        threading.Event().wait(0.01)
+    assert runner._events.full() and len(committed) <= runner.MAX_QUEUED
+    # Each poll hands over a bounded number of chunks
+    assert runner.poll() is True
+    runner.wait(job, timeout=10)
+    assert job.status == "done" and len(committed) == runner.MAX_QUEUED * 4
@@ -0,0 +1,89 @@
+import os
+import random
+import subprocess
+import sys
+import time
+
+from inventory_journal import InventoryJournal
+from inventory_store import InventoryStore
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_product(i):
+    return {"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i % 50, "Precio": float(i % 97)}
+
+
+def load(path):
+    journal = InventoryJournal(path)
+    store = InventoryStore()
+    journal.load_into(store)
+    return journal, store
+
+
+def test_mutations_survive_reload_and_compaction(tmp_path):
+    path = str(tmp_path / "inventory_data.json")
+    journal, store = load(path)
+    journal.attach(store)
+    store.extend(make_product(i) for i in range(100))
+    for product_id in ("3", "50"):
+        store.remove(store.keys_for_id(product_id)[0])
+    journal.commit()
+    expected = store.to_list()
+    assert load(path)[1].to_list() == expected
+
+    journal.compact(store)
+    store.add(make_product(100))
+    journal.commit()
+    journal.close()
+    assert not os.path.exists(path + ".compacting") and not os.path.exists(path + ".next")
+    assert load(path)[1].to_list() == expected + [make_product(100)]
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    path = str(tmp_path / "inventory_data.json")
+    journal, store = load(path)
+    journal.attach(store)
+    store.extend(make_product(i) for i in range(10))
+    journal.commit()
+    journal.close()
+    with open(path + ".journal", "ab") as f:
+        f.write(b'{"s": 99, "op": "add", "p": {"ID": "cor')
+    assert [p["ID"] for p in load(path)[1].to_list()] == [str(i) for i in range(10)]
+
+
+def child(path, compact_every):
+    # Appends products with consecutive IDs until killed
+    journal, store = load(path)
+    journal.attach(store)
+    i = len(store)
+    while True:
+        store.add(make_product(i))
+        if i % 7 == 0 and len(store) > 1:
+            # Exercise delete records too: remove and re-add the same product
+            store.remove(store.keys_for_id(str(i))[0])
+            store.add(make_product(i))
+        journal.commit()
+        i += 1
+        if i % compact_every == 0:
+            journal.compact(store)
+
+
+def test_hard_kills_lose_nothing_committed(tmp_path):
+    path = str(tmp_path / "inventory_data.json")
+    rng = random.Random(0)
+    count = 0
+    for _ in range(6):
+        proc = subprocess.Popen([sys.executable, os.path.abspath(__file__), path, "40"], env=dict(os.environ, PYTHONPATH=REPO))
+        time.sleep(rng.uniform(0.3, 0.6))
+        proc.kill()
+        proc.wait()
+        ids = sorted(int(p["ID"]) for p in load(path)[1].to_list())
+        assert ids == list(range(len(ids))), "productos perdidos o repetidos tras el corte"
+        assert len(ids) >= count, "desaparecieron productos ya guardados"
+        count = len(ids)
+    assert count > 0
+
+
+if __name__ == "__main__":
+    child(sys.argv[1], int(sys.argv[2]))
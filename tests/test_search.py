@@ -0,0 +1,24 @@
+import pytest
+
+from inventory_core import Inventory
+
+NAMES = ["Jabón de manos", "jabon liquido", "Tornillo 3mm", "TUERCA", "Cable USB", "cable hdmi"]
+
+
+@pytest.fixture(params=["journal", "sqlite"])
+def inventory(request, tmp_path):
+    inventory = Inventory(str(tmp_path / "inventory_data.json"), storage_mode=request.param, shared=False)
+    inventory.load(compactor=False)
+    inventory.build_indexes()
+    yield inventory
+    inventory.close()
+
+
+def test_filter_keeps_the_keys_search_would_return(inventory):
+    keys, _ = inventory.add_new([{"ID": f"P{i}", "Nombre": name, "Cantidad": i, "Precio": 1.0}
+                                 for i, name in enumerate(NAMES * 200)])
+    inventory.save()
+    later = keys[::-1]
+    for query in ["jabon", "JAB", "ca", "p1", "usb", "", "  tuerca ", "nada"]:
+        found = set(inventory.search_index.search(query))
+        assert inventory.search_index.filter(query, later) == [key for key in later if key in found], query
@@ -0,0 +1,127 @@
+import json
+import socket
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from inventory_core import send_inventory
+from inventory_server import InventoryClient, InventoryServer
+from inventory_store import InventoryStore
+from inventory_sync import SyncIndex, product_digest, resolve, sync_initiator
+from wire_protocol import HEADER, MAGIC, VERSION
+
+
+def make_products(n, prefix=""):
+    return [{"ID": f"{prefix}{i}", "Nombre": f"producto {i}", "Cantidad": i % 100, "Precio": float(i % 997)} for i in range(n)]
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "el servidor no aplicó el cambio a tiempo"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def server():
+    changes = []
+    server = InventoryServer(InventoryStore(make_products(200)), host="127.0.0.1", port=0,
+                             on_change=lambda: changes.append(1)).start()
+    server.changes = changes
+    yield server
+    server.stop()
+
+
+def test_requests_on_one_connection(server):
+    with InventoryClient("127.0.0.1", server.port) as client:
+        assert client.stats() == {"count": 200, "clients": 1}
+        reply = client.push(make_products(5, prefix="n") + [{"ID": "0", "Nombre": "repetido", "Cantidad": 1, "Precio": 1.0},
+                                                            {"Nombre": "sin ID"}])
+        assert reply == {"added": 5, "duplicates": 1, "invalid": 1}
+        products = client.get()
+        assert len(products) == 205 and products[-1]["ID"] == "n4"
+        assert client.get() == products   # Served from the cached encoding
+    assert server.changes
+
+
+def test_concurrent_pushes_are_applied_exactly_once(server):
+    errors = []
+
+    def worker(client_id):
+        try:
+            with InventoryClient("127.0.0.1", server.port) as client:
+                for n in range(20):
+                    batch = make_products(5, prefix=f"c{client_id}-{n}-") + [{"ID": "0", "Nombre": "repetido", "Cantidad": 1, "Precio": 1.0}]
+                    assert client.push(batch) == {"added": 5, "duplicates": 1, "invalid": 0}
+                    assert client.stats()["count"] > 0
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors, errors[:3]
+    ids = Counter(p["ID"] for p in server.store)
+    assert max(ids.values()) == 1 and len(server.store) == 200 + 12 * 20 * 5
+
+
+def test_legacy_push_and_delta_sync(server):
+    with socket.create_connection(("127.0.0.1", server.port)) as s:
+        s.sendall(json.dumps(make_products(10, prefix="legacy-")).encode("utf-8"))
+    wait_for(lambda: len(server.store) == 210)
+
+    peer = InventoryStore(make_products(200) + make_products(20, prefix="peer-"))
+    with socket.create_connection(("127.0.0.1", server.port)) as s:
+        stats = sync_initiator(s, SyncIndex(peer))
+    assert stats["changed"] == 30 and stats["added"] == 10   # Two-way: the peer got the legacy products
+    wait_for(lambda: len(server.store) == 230)   # The server applies its side after replying
+    ids = {p["ID"] for p in server.store}
+    assert all(f"peer-{i}" in ids for i in range(20)) and all(f"legacy-{i}" in ids for i in range(10))
+
+
+@pytest.mark.parametrize("batch_size", [None, 40])
+def test_send_inventory(server, batch_size):
+    products = (p for p in make_products(100, prefix="s"))
+    result = send_inventory("127.0.0.1", products, server.port, batch_size=batch_size)
+    assert result["added"] == 100 and result["duplicates"] == 0
+    assert len(server.store) == 300
+
+
+def test_bad_frame_only_closes_that_connection(server):
+    with socket.create_connection(("127.0.0.1", server.port)) as s:
+        s.sendall(HEADER.pack(MAGIC, VERSION + 7, 1, 0, 0, 2, 2, 0) + b"[]")
+        s.settimeout(5)
+        assert s.recv(1) == b""
+    with InventoryClient("127.0.0.1", server.port) as client:
+        assert client.stats()["count"] == 200
+
+
+def test_take_changes_reports_only_network_changes():
+    store = InventoryStore(make_products(50))
+    server = InventoryServer(store, host="127.0.0.1", port=0, track_changes=True).start()
+    try:
+        store.add({"ID": "local", "Nombre": "añadido aquí", "Cantidad": 1, "Precio": 1.0})
+        assert server.take_changes() is None
+        with InventoryClient("127.0.0.1", server.port) as client:
+            client.push(make_products(3, prefix="n"))
+        changes = server.take_changes()
+        assert [store.get(key)["ID"] for key in changes["added"]] == ["n0", "n1", "n2"] and changes["removed"] == []
+        assert server.take_changes() is None
+
+        # A sync the peer's version wins reports the old key removed and the new one added
+        local = store.get(store.keys_for_id("7")[0])
+        winner = next(dict(local, Cantidad=n) for n in range(1000, 2000)
+                      if resolve([product_digest(local)], [product_digest(dict(local, Cantidad=n))]) != product_digest(local))
+        old_key = store.keys_for_id("7")[0]
+        peer = InventoryStore([winner if p["ID"] == "7" else p for p in store.to_list()])
+        with socket.create_connection(("127.0.0.1", server.port)) as s:
+            sync_initiator(s, SyncIndex(peer))
+        wait_for(lambda: store.get(old_key) is None and store.has_id("7"))
+        changes = server.take_changes()
+        assert changes["removed"] == [old_key] and [store.get(key) for key in changes["added"]] == [winner]
+    finally:
+        server.stop()
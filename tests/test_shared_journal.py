@@ -0,0 +1,158 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+import pytest
+
+from inventory_core import Inventory
+from json_stream import write_products_file
+from shared_journal import SharedJournal
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = 300         # Products in the starting snapshot; product i belongs to writer i % writers
+CONTENDED = 60     # IDs every writer tries to add
+
+
+def base_product(i):
+    return {"ID": f"base-{i}", "Nombre": f"base {i}", "Cantidad": i, "Precio": 1.0}
+
+
+def open_shared(path, compact_records):
+    SharedJournal.COMPACT_RECORDS = compact_records
+    inventory = Inventory(path, "journal", shared=True)
+    inventory.load(compactor=False)
+    return inventory
+
+
+def child(index, writers, path, ops, seed, compact_records):
+    # One writer: owns the base products i % writers == index, adds, edits and deletes
+    # them, races the others for the contended IDs and prints what it expects to survive
+    rng = random.Random(seed)
+    inventory = open_shared(path, compact_records)
+    store = inventory.store
+    mine = {f"base-{i}": base_product(i) for i in range(index, BASE, writers)}   # Expected final versions
+    claimed = {}
+    serial = 0
+
+    def settle(changes):
+        if changes:
+            for product in changes["dropped"]:
+                claimed.pop(product["ID"], None)
+
+    for op in range(ops):
+        action = rng.random()
+        with store.lock:
+            if action < 0.35 or not mine:
+                serial += 1
+                product = {"ID": f"w{index}-{serial}", "Nombre": f"de {index}", "Cantidad": serial, "Precio": 2.5}
+                store.add(product)
+                mine[product["ID"]] = product
+            elif action < 0.55:
+                # Edit: delete + add with a new quantity
+                product_id = rng.choice(sorted(mine))
+                key = store.keys_for_id(product_id)[0]
+                product = dict(store.remove(key), Cantidad=op)
+                store.add(product)
+                mine[product_id] = product
+            elif action < 0.7:
+                product_id = rng.choice(sorted(mine))
+                store.remove(store.keys_for_id(product_id)[0])
+                del mine[product_id]
+            else:
+                product = {"ID": f"c-{rng.randrange(CONTENDED)}", "Nombre": f"ganó {index}", "Cantidad": op, "Precio": 3.0}
+                if not store.has_id(product["ID"]):
+                    store.add(product)
+                    claimed[product["ID"]] = product
+        if rng.random() < 0.3:
+            inventory.save()
+            settle(inventory.refresh())
+        elif rng.random() < 0.2:
+            settle(inventory.refresh())
+        if rng.random() < 0.05:
+            time.sleep(rng.random() * 0.01)
+    inventory.save()
+    settle(inventory.refresh())
+
+    # Wait for every writer, then catch up once more: all stores must now agree
+    open(f"{path}.done{index}", "w").close()
+    while sum(os.path.exists(f"{path}.done{i}") for i in range(writers)) < writers:
+        time.sleep(0.02)
+    inventory.save()
+    settle(inventory.refresh())
+    print(json.dumps({"mine": mine, "claimed": claimed, "store": store.to_list()}))
+    inventory.close()
+
+
+def canonical(products):
+    return sorted(json.dumps(p, sort_keys=True) for p in products)
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_writers_lose_no_updates_and_converge(tmp_path, seed):
+    # Compacting every 50 records keeps the other writers rereading the snapshot
+    writers, ops, compact_records = 3, 200, 50
+    path = str(tmp_path / "inventory_data.json")
+    write_products_file(path, [base_product(i) for i in range(BASE)])
+    children = [subprocess.Popen([sys.executable, os.path.abspath(__file__), str(i), str(writers), path, str(ops),
+                                  str(seed * 1000 + i), str(compact_records)],
+                                 stdout=subprocess.PIPE, text=True, env=dict(os.environ, PYTHONPATH=REPO))
+                for i in range(writers)]
+    results = []
+    for process in children:
+        out, _ = process.communicate()
+        assert process.returncode == 0, f"writer failed ({process.returncode})"
+        results.append(json.loads(out.strip().splitlines()[-1]))
+
+    inventory = Inventory(path, "journal", shared=False)
+    inventory.load(compactor=False)
+    final = inventory.store.to_list()
+    inventory.close()
+    by_id = {product["ID"]: product for product in final}
+    assert len(by_id) == len(final), "IDs repetidos en el inventario compartido"
+
+    # Every writer's last version of its own products, and each contended ID won by one writer
+    expected = {}
+    for result in results:
+        expected.update(result["mine"])
+    claimed = [product_id for result in results for product_id in result["claimed"]]
+    assert len(claimed) == len(set(claimed)), "un ID disputado lo ganaron dos escritores"
+    for result in results:
+        expected.update(result["claimed"])
+    assert by_id == expected
+    for index, result in enumerate(results):
+        assert canonical(result["store"]) == canonical(final), f"escritor {index} no convergió"
+
+
+def test_refresh_applies_another_instances_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(SharedJournal, "COMPACT_RECORDS", SharedJournal.COMPACT_RECORDS)
+    path = str(tmp_path / "inventory_data.json")
+    write_products_file(path, [base_product(i) for i in range(2000)])
+    reader = open_shared(path, 10 ** 9)
+    writer = open_shared(path, 10 ** 9)
+    assert reader.refresh() is None
+
+    added = [{"ID": f"nuevo-{i}", "Nombre": "nuevo", "Cantidad": i, "Precio": 2.0} for i in range(50)]
+    writer.store.extend(added)
+    writer.save()
+    changes = reader.refresh()
+    assert sorted(reader.store.get(key)["ID"] for key in changes["added"]) == sorted(p["ID"] for p in added)
+    assert not changes["removed"] and canonical(reader.store.to_list()) == canonical(writer.store.to_list())
+
+    # Compaction elsewhere: the snapshot is reread and diffed
+    with writer.store.lock:
+        writer.store.remove(writer.store.keys_for_id("base-0")[0])
+    writer.storage._records_since_snapshot = writer.storage.COMPACT_RECORDS = 0
+    writer.save()
+    changes = reader.refresh()
+    assert len(changes["removed"]) == 1 and not changes["added"]
+    assert not reader.store.has_id("base-0") and canonical(reader.store.to_list()) == canonical(writer.store.to_list())
+    writer.close()
+    reader.close()
+
+
+if __name__ == "__main__":
+    index, writers, path, ops, seed, compact_records = sys.argv[1:]
+    child(int(index), int(writers), path, int(ops), int(seed), int(compact_records))
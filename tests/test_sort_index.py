@@ -0,0 +1,62 @@
+import random
+
+from inventory_store import InventoryStore
+from sort_index import SortIndex, SortedView, merge_keys, sort_keys
+
+
+def products(n, start=0):
+    return [{"ID": str(i), "Nombre": f"producto {i}", "Cantidad": (i * 7) % 13, "Precio": 1.0} for i in range(start, start + n)]
+
+
+def test_view_follows_the_store():
+    store = InventoryStore(products(50))
+    indexes = {"Cantidad": SortIndex(store, "Cantidad")}
+    store.extend(products(20, start=50))
+    store.remove(store.keys_for_id("3")[0])
+    view = SortedView(store, indexes, [("Cantidad", True)])
+    assert [store.value(key, "Cantidad") for key in view] == sorted((p["Cantidad"] for p in products(70) if p["ID"] != "3"),
+                                                                    reverse=True)
+
+
+def test_closed_index_stops_queueing_changes():
+    store = InventoryStore(products(50))
+    index = SortIndex(store, "Nombre")
+    store.add(products(1, start=50)[0])
+    store.remove(store.keys_for_id("0")[0])
+    assert index._pending_add and index._pending_remove
+    index.close()
+    assert not index._pending_add and not index._pending_remove and len(index) == 0
+    store.extend(products(1000, start=100))
+    store.remove(store.keys_for_id("1")[0])
+    assert not index._pending_add and not index._pending_remove
+    assert index._on_change not in store._listeners
+
+
+def test_merged_keys_land_where_sort_keys_puts_them():
+    rng = random.Random(0)
+    store = InventoryStore({"ID": str(i), "Nombre": rng.choice(["a", "B", "c", 3, None]), "Cantidad": rng.randrange(5),
+                            "Precio": rng.choice([1.0, 2.5, float("nan")])} for i in range(400))
+    for spec in ([("Cantidad", False)], [("Nombre", True)], [("Cantidad", True), ("Precio", False)],
+                 [("Precio", False), ("Nombre", True), ("ID", False)]):
+        keys = store.keys()
+        shown = [key for key in keys if rng.random() < 0.5]
+        new = [key for key in keys if key not in set(shown) and rng.random() < 0.3]
+        assert merge_keys(store, sort_keys(store, shown, spec), new, spec) == sort_keys(store, shown + new, spec), spec
+
+
+def test_unread_index_keeps_a_bounded_queue_and_catches_up_on_read():
+    store = InventoryStore(products(100))
+    indexes = {"Cantidad": SortIndex(store, "Cantidad")}
+    index = indexes["Cantidad"]
+    for product in products(5000, start=100):
+        store.add(product)
+        assert len(index._pending_add) + len(index._pending_remove) <= index._rebuild_size() + 1
+    store.remove_many(store.keys()[::3])
+    assert index._dirty and not index._pending_add and not index._pending_remove
+    view = SortedView(store, indexes, [("Cantidad", False)])
+    assert list(view) == sort_keys(store, store.keys(), [("Cantidad", False)])
+    assert not index._dirty
+
+    # Back to queueing once it's up to date
+    store.add(products(1, start=9000)[0])
+    assert len(index._pending_add) == 1 and list(view) == sort_keys(store, store.keys(), [("Cantidad", False)])
@@ -0,0 +1,98 @@
+import random
+import socket
+import threading
+from collections import Counter
+
+import pytest
+
+from inventory_store import InventoryStore
+from inventory_sync import SyncIndex, product_digest, sync_initiator, sync_responder
+from wire_protocol import recv_message
+
+WORDS = ["tornillo", "tuerca", "cable", "martillo", "llave", "cinta", "pintura", "brocha", "clavo", "sierra"]
+
+
+def make_products(n, seed=0):
+    rng = random.Random(seed)
+    return [{"ID": str(rng.randrange(10 ** 9)) + f"-{i}",
+             "Nombre": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(1000)}",
+             "Cantidad": rng.randrange(500), "Precio": round(rng.uniform(0.5, 900), 2)} for i in range(n)]
+
+
+def diverge(products, fraction, seed=1):
+    # Returns (peer A's, peer B's) product lists: a share edited, added on each side, duplicated
+    rng = random.Random(seed)
+    n = len(products)
+    count = max(1, int(n * fraction))
+    b = [dict(p) for p in products]
+    for i in rng.sample(range(n), count):
+        b[i]["Cantidad"] += 1
+    b.extend({"ID": f"b{i}", "Nombre": "nuevo B", "Cantidad": 1, "Precio": 1.0} for i in range(count // 4))
+    a_extra = [{"ID": f"a{i}", "Nombre": "nuevo A", "Cantidad": 2, "Precio": 2.0} for i in range(count // 4)]
+    b.extend(dict(b[i]) for i in rng.sample(range(n), max(1, count // 10)))  # repeated IDs
+    return products + a_extra, b
+
+
+def loopback_sync(index_a, index_b):
+    # Runs one sync over a loopback socket; returns (stats of A, stats of B)
+    server = socket.create_server(("127.0.0.1", 0))
+    result = {}
+
+    def responder():
+        conn, _ = server.accept()
+        with conn:
+            _, hello = recv_message(conn)
+            result["b"] = sync_responder(conn, index_b, hello)
+
+    thread = threading.Thread(target=responder)
+    thread.start()
+    with server, socket.create_connection(server.getsockname()) as client:
+        result["a"] = sync_initiator(client, index_a)
+        thread.join()
+    return result["a"], result["b"]
+
+
+def content(store):
+    return Counter(product_digest(p) for p in store)
+
+
+def sync_stores(products_a, products_b):
+    store_a, store_b = InventoryStore(products_a), InventoryStore(products_b)
+    index_a, index_b = SyncIndex(store_a), SyncIndex(store_b)
+    stats = loopback_sync(index_a, index_b)
+    return store_a, store_b, index_a, index_b, stats
+
+
+@pytest.mark.parametrize("fraction", [0.001, 0.05, 0.5])
+def test_peers_converge_with_one_record_per_id(fraction):
+    products_a, products_b = diverge(make_products(5000), fraction)
+    store_a, store_b, index_a, index_b, (stats_a, stats_b) = sync_stores(products_a, products_b)
+    assert content(store_a) == content(store_b)
+    assert max(Counter(p["ID"] for p in store_a).values()) == 1
+    assert stats_a["changed"] > 0
+
+    # Nothing left to send the second time
+    again_a, again_b = loopback_sync(index_a, index_b)
+    assert again_a["changed"] == 0 and again_a["sent"] + again_b["sent"] < 1000
+    assert content(store_a) == content(store_b)
+
+
+def test_identical_peers_exchange_only_the_root():
+    products = make_products(3000)
+    store_a, store_b, _, _, (stats_a, stats_b) = sync_stores(products, [dict(p) for p in products])
+    assert stats_a["changed"] == 0 and stats_a["sent"] + stats_b["sent"] < 1000
+    assert store_a.to_list() == products and store_b.to_list() == products
+
+
+def test_empty_peer_receives_everything():
+    products = make_products(2000)
+    store_a, store_b, _, _, _ = sync_stores([], products)
+    assert content(store_a) == content(store_b) == Counter(content(InventoryStore(products)))
+
+
+def test_small_change_sends_a_small_share():
+    base = make_products(20_000)
+    products_a, products_b = diverge(base, 0.001)
+    _, _, _, _, (stats_a, stats_b) = sync_stores(products_a, products_b)
+    full = sum(len(str(p)) for p in base)
+    assert stats_a["sent"] + stats_b["sent"] < full / 20
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import socket
+import tracemalloc
+import zlib
+
+import pytest
+
+from wire_protocol import (CODEC_LZMA, CODEC_NONE, CODEC_ZLIB, HEADER, KIND_INVENTORY, KIND_LEGACY, MAGIC, MAX_PAYLOAD,
+                           VERSION, ProtocolError, encode_message, read_frame, recv_frame, recv_message, send_frame)
+
+
+def receive(data, max_payload=MAX_PAYLOAD):
+    # recv_frame on a socket that gets data and is then closed; returns (result or error, peak bytes allocated)
+    left, right = socket.socketpair()
+    with left, right:
+        left.sendall(data)
+        left.close()
+        tracemalloc.start()
+        try:
+            result = recv_frame(right, max_payload)
+        except ProtocolError as e:
+            result = e
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result, peak
+
+
+@pytest.mark.parametrize("codec", [CODEC_NONE, CODEC_ZLIB, CODEC_LZMA])
+def test_round_trip(codec):
+    products = [{"ID": str(i), "Nombre": f"producto {i}", "Cantidad": i, "Precio": 1.5} for i in range(2000)]
+    left, right = socket.socketpair()
+    with left, right:
+        send_frame(left, *encode_message(KIND_INVENTORY, products, codec))
+        assert recv_message(right) == (KIND_INVENTORY, products)
+
+
+def test_announced_length_is_not_allocated_up_front():
+    header = HEADER.pack(MAGIC, VERSION, KIND_INVENTORY, CODEC_NONE, 0, MAX_PAYLOAD, MAX_PAYLOAD, 0)
+    result, peak = receive(header + b"x" * 1000)
+    assert isinstance(result, ProtocolError)
+    assert peak < 16 << 20, peak
+
+
+def test_announced_raw_length_is_not_allocated_up_front():
+    payload = zlib.compress(b"[]")
+    header = HEADER.pack(MAGIC, VERSION, KIND_INVENTORY, CODEC_ZLIB, 0, len(payload), MAX_PAYLOAD, zlib.crc32(payload))
+    result, peak = receive(header + payload)
+    assert isinstance(result, ProtocolError)
+    assert peak < 16 << 20, peak
+
+
+def test_payload_bigger_than_announced_is_refused():
+    payload = zlib.compress(b"[" + b"1," * 100_000 + b"1]")
+    header = HEADER.pack(MAGIC, VERSION, KIND_INVENTORY, CODEC_ZLIB, 0, len(payload), 10, zlib.crc32(payload))
+    result, _ = receive(header + payload)
+    assert isinstance(result, ProtocolError)
+
+
+def read_async(data, max_payload):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        try:
+            return await read_frame(reader, max_payload)
+        except ProtocolError as e:
+            return e
+    return asyncio.run(read())
+
+
+@pytest.mark.parametrize("read", [lambda data, limit: receive(data, limit)[0], read_async])
+def test_legacy_messages_are_capped_like_framed_ones(read):
+    legacy = json.dumps([{"ID": str(i), "Nombre": "viejo"} for i in range(2000)]).encode()
+    assert read(legacy, len(legacy)) == (KIND_LEGACY, legacy)
+    assert isinstance(read(legacy, len(legacy) - 1), ProtocolError)
@@ -0,0 +1,236 @@
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserError(ValueError):
+    pass
+
+
+# Passwords are stored as "scrypt$n$r$p$salt$hash" (hex). scrypt needs 128*r*n bytes
+# of memory per check (16 MB here), which is what makes guessing on GPUs expensive.
+# Hashes from older versions (plain sha256 hex) are still accepted and replaced by
+# an scrypt hash on the next successful login.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=32)
+    return f"scrypt${n}${r}${p}${salt.hex()}${digest.hex()}"
+
+
+def _legacy_hash(password):
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def is_legacy_hash(stored):
+    return not stored.startswith("scrypt$")
+
+
+def verify_password(password, stored):
+    if is_legacy_hash(stored):
+        return hmac.compare_digest(_legacy_hash(password), stored)
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        computed = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p),
+                                  dklen=len(digest) // 2)
+    except ValueError:
+        return False   # Damaged hash
+    return hmac.compare_digest(computed.hex(), digest)
+
+
+class VerifiedCache:
+    """Recently verified (username, password) pairs, so a repeat check skips scrypt.
+
+    Only an HMAC of the password under a key that lives in this process is
+    kept, tied to the stored hash it was checked against: changing the
+    password invalidates the entry. Entries expire after ttl seconds and
+    at most size are kept. A miss, or a different password, goes through
+    the full check.
+    """
+
+    def __init__(self, size=64, ttl=15 * 60):
+        self.size = size
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()   # username -> (stored hash, HMAC, time verified)
+        self._lock = threading.Lock()
+
+    def _mac(self, password):
+        return hmac.new(self._key, password.encode(), hashlib.sha256).digest()
+
+    def check(self, username, password, stored):
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None or entry[0] != stored or time.monotonic() - entry[2] > self.ttl:
+                return False
+            self._entries.move_to_end(username)
+        return hmac.compare_digest(entry[1], self._mac(password))
+
+    def add(self, username, password, stored):
+        mac = self._mac(password)
+        with self._lock:
+            self._entries[username] = (stored, mac, time.monotonic())
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def forget(self, username):
+        with self._lock:
+            self._entries.pop(username, None)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL,
+    profile_image TEXT NOT NULL DEFAULT ''
+) WITHOUT ROWID;
+"""
+
+
+class UserStore:
+    """Accounts in a SQLite database (users.db next to users.json), one row per user.
+
+    Shared by the app's login screens and inventory_cli. Users are looked up
+    by the primary key when needed instead of being loaded at start, and
+    each change writes only its row. On first use the accounts in users.json
+    (including the old format that maps a username straight to the hash)
+    are copied in; the JSON file is left as it was. An "admin"/"admin"
+    account is created whenever there is none.
+    """
+
+    def __init__(self, path="users.json", cache=None):
+        self.path = path
+        self.db_path = os.path.splitext(path)[0] + ".db"
+        self.cache = cache if cache is not None else VerifiedCache()
+        self._dummy_hash = None
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self.load()
+
+    def _default(self):
+        return {"admin": {"password": hash_password("admin"), "profile_image": ""}}
+
+    def load(self):
+        with self._lock:
+            if self.db.execute("PRAGMA user_version").fetchone()[0] == 0:
+                self._migrate_json()
+            if self.db.execute("SELECT 1 FROM users WHERE username = 'admin'").fetchone() is None:
+                print("Admin user not found, creating default.")
+                self._write(self._default())
+
+    def _migrate_json(self):
+        # user_version is set in the same transaction as the copy, so an interrupted
+        # migration starts over on the next run
+        users = {}
+        if not os.path.exists(self.path):
+            print(f"{self.path} not found. Creating default users.")
+        else:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    raw_users = json.load(f)
+                for username, data in raw_users.items():
+                    if isinstance(data, str): # Handle old format
+                        users[username] = {"password": data, "profile_image": ""}
+                    elif isinstance(data, dict) and "password" in data:
+                        users[username] = data
+                    else:
+                        print(f"Skipping invalid user data for {username}")
+                print(f"Usuarios migrados de {self.path} a {self.db_path}: {len(users)}.")
+            except json.JSONDecodeError:
+                print(f"Error decoding JSON from {self.path}. Initializing with default admin.")
+            except Exception as e:
+                print(f"An error occurred loading users: {e}. Initializing with default admin.")
+        self._write(users, user_version=1)
+
+    def _write(self, users, user_version=None):
+        # Inserts or replaces the given users in one transaction; self._lock held
+        db = self.db
+        db.execute("BEGIN")
+        try:
+            db.executemany("INSERT OR REPLACE INTO users VALUES (?, ?, ?)",
+                           ((name, data["password"], data.get("profile_image") or "") for name, data in users.items()))
+            if user_version is not None:
+                db.execute(f"PRAGMA user_version = {int(user_version)}")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def close(self):
+        with self._lock:
+            self.db.close()
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def __len__(self):
+        with self._lock:
+            return self.db.execute("SELECT count(*) FROM users").fetchone()[0]
+
+    def get(self, username):
+        # {"password", "profile_image"} or None
+        with self._lock:
+            row = self.db.execute("SELECT password, profile_image FROM users WHERE username = ?", (username,)).fetchone()
+        return None if row is None else {"password": row[0], "profile_image": row[1]}
+
+    def authenticate(self, username, password):
+        # The user's record, or None if the name or password is wrong
+        user = self.get(username)
+        if user is None:
+            # Same scrypt work as a wrong password, so timing doesn't tell which names exist
+            if self._dummy_hash is None:
+                self._dummy_hash = hash_password("")
+            verify_password(password, self._dummy_hash)
+            return None
+        stored = user["password"]
+        if self.cache.check(username, password, stored):
+            return user
+        if not verify_password(password, stored):
+            return None
+        if is_legacy_hash(stored):
+            # Upgraded on the first login after migrating; the old hash stops working
+            user["password"] = stored = hash_password(password)
+            with self._lock:
+                self.db.execute("UPDATE users SET password = ? WHERE username = ?", (stored, username))
+        self.cache.add(username, password, stored)
+        return user
+
+    def register(self, username, password, profile_image=""):
+        if not username or not password:
+            raise UserError("Usuario y contraseña son obligatorios")
+        stored = hash_password(password)   # Outside the lock: it takes a while
+        with self._lock:
+            try:
+                self.db.execute("INSERT INTO users VALUES (?, ?, ?)", (username, stored, profile_image or ""))
+            except sqlite3.IntegrityError:
+                raise UserError("El usuario ya existe") from None
+
+    def change_password(self, username, current_password, new_password):
+        if self.authenticate(username, current_password) is None:
+            raise UserError("La contraseña actual es incorrecta")
+        stored = hash_password(new_password)
+        with self._lock:
+            self.db.execute("UPDATE users SET password = ? WHERE username = ?", (stored, username))
+        self.cache.forget(username)
+
+    def delete(self, username):
+        if username == "admin":
+            raise UserError("¡No puedes borrar al usuario administrador!")
+        with self._lock:
+            deleted = self.db.execute("DELETE FROM users WHERE username = ?", (username,)).rowcount
+        if not deleted:
+            raise UserError(f"El usuario '{username}' no existe.")
+        self.cache.forget(username)
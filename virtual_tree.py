@@ -0,0 +1,199 @@
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """Shows a long list of rows in a Treeview that only holds the visible window.
+
+    The Treeview keeps a small pool of slot items (visible rows plus a buffer);
+    scrolling rewrites their values from row_values(key) instead of inserting
+    and deleting Tk items. Rows are identified by store keys and the selection
+    is tracked by key, so it survives scrolling. The scrollbar is driven by the
+    full row count.
+
+    The rows can also be a live sequence that follows the store by itself (a
+    sort_index.SortedView); then append, extend and remove_keys only redraw.
+    """
+
+    def __init__(self, tree, scrollbar, row_values, buffer_rows=5):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_values = row_values
+        self.buffer_rows = buffer_rows
+        self.rows = []          # keys in display order
+        self.live = False       # rows is a live sequence, not a list we maintain
+        self.first = 0          # index of the first visible row
+        self.selected = set()   # selected keys, including rows scrolled out of view
+        self.visible_rows = max(1, int(tree.cget("height") or 10))
+        self._slots = []        # slot iids, attached in order
+        self._attached = 0
+        self._slot_keys = {}    # slot iid -> key currently shown
+        self._pending_click = None
+
+        scrollbar.configure(command=self.yview)
+        tree.configure(yscrollcommand="")
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        tree.bind("<ButtonPress-1>", lambda e: self._set_click("replace"), add="+")
+        tree.bind("<Control-ButtonPress-1>", lambda e: self._set_click("extend"), add="+")
+        tree.bind("<Shift-ButtonPress-1>", lambda e: self._set_click("extend"), add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda e: self._scroll_break(-3))
+        tree.bind("<Button-5>", lambda e: self._scroll_break(3))
+        tree.bind("<Up>", lambda e: self._move_focus(-1))
+        tree.bind("<Down>", lambda e: self._move_focus(1))
+        tree.bind("<Prior>", lambda e: self._move_focus(-self.visible_rows))
+        tree.bind("<Next>", lambda e: self._move_focus(self.visible_rows))
+
+    # --- Backing rows ---
+    def set_rows(self, keys, live=False):
+        self.selected.clear()
+        self.reorder(keys, live)
+
+    def reorder(self, keys, live=False):
+        # New rows or a new order; the selection is kept and the view goes to the top
+        self.rows = keys if live else list(keys)
+        self.live = live
+        self.first = 0
+        self.refresh()
+
+    def replace(self, keys):
+        # The same rows with others merged in by the caller; unlike reorder() the view stays where it is
+        self.rows = list(keys)
+        self.live = False
+        self.refresh()
+
+    def append(self, key):
+        if not self.live:
+            self.rows.append(key)
+        self.refresh()
+
+    def extend(self, keys):
+        if not self.live:
+            self.rows.extend(keys)
+        self.refresh()
+
+    def remove_keys(self, keys):
+        keys = set(keys)
+        if not keys:
+            return
+        if not self.live:
+            self.rows = [key for key in self.rows if key not in keys]
+        self.selected -= keys
+        self.refresh()
+
+    def selected_keys(self):
+        return list(self.selected)
+
+    # --- Rendering ---
+    def refresh(self):
+        total = len(self.rows)
+        self.first = max(0, min(self.first, total - self.visible_rows))
+        window = self.rows[self.first:self.first + self.visible_rows + self.buffer_rows]
+        self._ensure_slots(len(window))
+        selected_slots = []
+        for iid, key in zip(self._slots, window):
+            self.tree.item(iid, values=self.row_values(key))
+            self._slot_keys[iid] = key
+            if key in self.selected:
+                selected_slots.append(iid)
+        self.tree.selection_set(selected_slots)
+        self.tree.yview_moveto(0)  # The slots themselves never scroll
+        self._update_scrollbar()
+
+    def _ensure_slots(self, count):
+        # Reattach detached slots first, then create new ones after them
+        for index in range(self._attached, min(count, len(self._slots))):
+            self.tree.move(self._slots[index], "", index)
+        while len(self._slots) < count:
+            iid = f"slot{len(self._slots)}"
+            self.tree.insert("", "end", iid=iid)
+            self._slots.append(iid)
+        for index in range(count, self._attached):
+            self.tree.detach(self._slots[index])
+            self._slot_keys.pop(self._slots[index], None)
+        self._attached = count
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible_rows:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.visible_rows) / total))
+
+    def _measure_visible_rows(self):
+        height = self.tree.winfo_height()
+        if height <= 1:
+            return None
+        bbox = self.tree.bbox(self._slots[0]) if self._attached else ""
+        if bbox:
+            top, row_height = bbox[1], bbox[3]
+        else:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+            top = row_height
+        return max(1, (height - top) // max(1, row_height))
+
+    # --- Scrolling ---
+    def yview(self, *args):
+        # Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"|"pages")
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args[0] == "scroll":
+            step = int(args[1])
+            if args[2] == "pages":
+                step *= self.visible_rows
+            self.first += step
+        self.refresh()
+
+    def scroll(self, rows):
+        self.first += rows
+        self.refresh()
+
+    def _scroll_break(self, rows):
+        self.scroll(rows)
+        return "break"
+
+    def _on_mousewheel(self, event):
+        if event.delta == 0:
+            return "break"
+        steps = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+        return self._scroll_break(steps * 3)
+
+    def _on_configure(self, event=None):
+        visible = self._measure_visible_rows()
+        if visible and visible != self.visible_rows:
+            self.visible_rows = visible
+            self.refresh()
+
+    # --- Selection ---
+    def _set_click(self, mode):
+        self._pending_click = mode
+
+    def _on_select(self, event=None):
+        click, self._pending_click = self._pending_click, None
+        shown = {self._slot_keys[iid] for iid in self._slots[:self._attached] if iid in self._slot_keys}
+        picked = {self._slot_keys[iid] for iid in self.tree.selection() if iid in self._slot_keys}
+        if click == "replace":
+            # A plain click also drops selected rows that are scrolled out of view
+            self.selected = picked
+        else:
+            self.selected = (self.selected - shown) | picked
+
+    def _move_focus(self, step):
+        if not self.rows:
+            return "break"
+        focus = self.tree.focus()
+        if focus in self._slots[:self._attached]:
+            index = self.first + self._slots.index(focus) + step
+        else:
+            index = self.first  # Nothing focused yet: start at the top of the view
+        index = max(0, min(len(self.rows) - 1, index))
+        if index < self.first:
+            self.first = index
+        elif index >= self.first + self.visible_rows:
+            self.first = index - self.visible_rows + 1
+        self.selected = {self.rows[index]}
+        self.refresh()
+        self.tree.focus(self._slots[index - self.first])
+        return "break"
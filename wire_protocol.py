@@ -0,0 +1,253 @@
+import json
+import lzma
+import struct
+import zlib
+from itertools import islice
+
+# Frame layout (network byte order):
+#   magic "SGIF" | version u8 | kind u8 | codec u8 | reserved u8 |
+#   payload length u64 | raw length u64 | crc32 of payload u32 | payload
+HEADER = struct.Struct("!4sBBBBQQI")
+MAGIC = b"SGIF"
+VERSION = 1
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODEC_NAMES = {"none": CODEC_NONE, "zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+
+KIND_LEGACY = 0       # Unframed JSON from an older version of the app, read until EOF
+KIND_INVENTORY = 1    # Full product list
+KIND_SYNC = 2         # Delta sync conversation (see inventory_sync)
+KIND_REQUEST = 3      # {"op": ...} request to an inventory server
+KIND_REPLY = 4        # JSON object answering a request or a push
+KIND_CHAT = 5         # Chat message {"user", "text"} (see chat_hub)
+
+DEFAULT_PORT = 12345   # Inventory server (inventory_server.InventoryServer)
+
+MAX_PAYLOAD = 4 << 30  # Refuse frames announcing more than 4 GiB
+CHUNK_SIZE = 1 << 20
+ENCODE_BATCH = 10_000
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def _compressor(codec):
+    if codec == CODEC_ZLIB:
+        return zlib.compressobj(6)
+    if codec == CODEC_LZMA:
+        return lzma.LZMACompressor(preset=1)
+    if codec == CODEC_NONE:
+        return None
+    raise ProtocolError(f"Códec desconocido: {codec}")
+
+
+def _decompress(codec, payload, raw_length):
+    # Output grows as it is produced and stops one byte past raw_length, so a header
+    # announcing a huge size doesn't allocate it up front
+    if codec == CODEC_NONE:
+        return payload
+    if codec == CODEC_ZLIB:
+        return zlib.decompressobj().decompress(payload, raw_length + 1)
+    if codec == CODEC_LZMA:
+        return lzma.LZMADecompressor().decompress(payload, raw_length + 1)
+    raise ProtocolError(f"Códec desconocido: {codec}")
+
+
+# --- Encoding ---
+def encode_chunks(kind, chunks, codec=CODEC_ZLIB):
+    # Compresses an iterable of byte chunks; returns (header, payload)
+    compressor = _compressor(codec)
+    parts = []
+    raw_length = 0
+    for chunk in chunks:
+        raw_length += len(chunk)
+        parts.append(compressor.compress(chunk) if compressor else chunk)
+    if compressor:
+        parts.append(compressor.flush())
+    payload = b"".join(parts)
+    header = HEADER.pack(MAGIC, VERSION, kind, codec, 0, len(payload), raw_length, zlib.crc32(payload))
+    return header, payload
+
+
+def iter_json_list_bytes(items):
+    # Compact JSON array text for a list or any iterable, encoded batch by batch
+    yield b"["
+    items = iter(items)
+    separator = b""
+    while True:
+        batch = list(islice(items, ENCODE_BATCH))
+        if not batch:
+            break
+        yield separator + json.dumps(batch, ensure_ascii=False, separators=(",", ":"))[1:-1].encode("utf-8")
+        separator = b","
+    yield b"]"
+
+
+def encode_message(kind, obj, codec=CODEC_ZLIB):
+    # (header, payload) for a JSON message; CPU bound, so servers run it off the event loop
+    if isinstance(obj, list):
+        chunks = iter_json_list_bytes(obj)
+    else:
+        chunks = [json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")]
+    return encode_chunks(kind, chunks, codec)
+
+
+def send_frame(sock, header, payload):
+    sock.sendall(header)
+    view = memoryview(payload)
+    for start in range(0, len(view), CHUNK_SIZE):
+        sock.sendall(view[start:start + CHUNK_SIZE])
+
+
+def send_message(sock, kind, obj, codec=CODEC_ZLIB):
+    header, payload = encode_message(kind, obj, codec)
+    send_frame(sock, header, payload)
+    return len(header) + len(payload)
+
+
+def send_products(sock, products, codec=CODEC_ZLIB):
+    # products may be any iterable: only the compressed payload is held
+    header, payload = encode_chunks(KIND_INVENTORY, iter_json_list_bytes(products), codec)
+    send_frame(sock, header, payload)
+    return len(header) + len(payload)
+
+
+# --- Decoding ---
+def recv_into_exact(sock, view):
+    received = 0
+    while received < len(view):
+        n = sock.recv_into(view[received:], min(len(view) - received, CHUNK_SIZE))
+        if n == 0:
+            raise ProtocolError("Conexión cerrada a mitad de un mensaje")
+        received += n
+
+
+def _recv_payload(sock, length):
+    # Grows with the data actually received instead of trusting the header's length
+    payload = bytearray()
+    buffer = bytearray(min(length, CHUNK_SIZE))
+    view = memoryview(buffer)
+    while len(payload) < length:
+        n = sock.recv_into(view, min(length - len(payload), CHUNK_SIZE))
+        if n == 0:
+            raise ProtocolError("Conexión cerrada a mitad de un mensaje")
+        payload += view[:n]
+    return payload
+
+
+def _recv_legacy(sock, first, max_payload):
+    # Old peers send raw JSON and close the socket; collect it without quadratic copies
+    data = bytearray(first)
+    buffer = bytearray(CHUNK_SIZE)
+    view = memoryview(buffer)
+    while True:
+        n = sock.recv_into(view)
+        if n == 0:
+            return bytes(data)
+        data += view[:n]
+        _check_legacy_size(data, max_payload)
+
+
+def _check_legacy_size(data, max_payload):
+    if len(data) > max_payload:
+        raise ProtocolError(f"Mensaje sin formato demasiado grande: más de {max_payload} bytes")
+
+
+def _parse_header(header, max_payload):
+    _, version, kind, codec, _, length, raw_length, checksum = HEADER.unpack(header)
+    if version != VERSION:
+        raise ProtocolError(f"Versión de protocolo no soportada: {version}")
+    if length > max_payload or raw_length > max_payload:
+        raise ProtocolError(f"Mensaje demasiado grande: {length} bytes")
+    return kind, codec, length, raw_length, checksum
+
+
+def _check_payload(payload, codec, raw_length, checksum):
+    if zlib.crc32(payload) != checksum:
+        raise ProtocolError("Checksum inválido: el mensaje llegó dañado")
+    raw = _decompress(codec, payload, raw_length)
+    if len(raw) != raw_length:
+        raise ProtocolError("Longitud descomprimida inesperada")
+    return raw
+
+
+def recv_frame(sock, max_payload=MAX_PAYLOAD):
+    """Returns (kind, raw bytes) for the next message, or None on a clean EOF."""
+    header = bytearray(HEADER.size)
+    view = memoryview(header)
+    received = 0
+    while received < len(MAGIC):
+        n = sock.recv_into(view[received:], len(MAGIC) - received)
+        if n == 0:
+            if received == 0:
+                return None
+            return KIND_LEGACY, bytes(header[:received])
+        received += n
+    if bytes(header[:len(MAGIC)]) != MAGIC:
+        return KIND_LEGACY, _recv_legacy(sock, header[:received], max_payload)
+    recv_into_exact(sock, view[received:])
+
+    kind, codec, length, raw_length, checksum = _parse_header(header, max_payload)
+    payload = _recv_payload(sock, length)
+    return kind, _check_payload(payload, codec, raw_length, checksum)
+
+
+def recv_message(sock, max_payload=MAX_PAYLOAD):
+    frame = recv_frame(sock, max_payload)
+    if frame is None:
+        return None
+    kind, raw = frame
+    return kind, json.loads(raw)
+
+
+def recv_products(sock, max_payload=MAX_PAYLOAD):
+    message = recv_message(sock, max_payload)
+    if message is None:
+        return None
+    kind, products = message
+    if kind not in (KIND_INVENTORY, KIND_LEGACY):
+        raise ProtocolError(f"Se esperaba un inventario y llegó un mensaje de tipo {kind}")
+    return products
+
+
+# --- asyncio streams (see inventory_server) ---
+async def read_frame(reader, max_payload=MAX_PAYLOAD, start=b""):
+    """Async version of recv_frame for an asyncio.StreamReader.
+
+    start holds the first bytes of the frame if the caller already read them.
+    """
+    import asyncio  # Only the servers need it; kept off the app's startup path
+    while len(start) < len(MAGIC):
+        more = await reader.read(len(MAGIC) - len(start))
+        if not more:
+            break
+        start += more
+    if not start:
+        return None
+    if start != MAGIC:
+        data = bytearray(start)
+        while True:
+            more = await reader.read(CHUNK_SIZE)
+            if not more:
+                return KIND_LEGACY, bytes(data)
+            data += more
+            _check_legacy_size(data, max_payload)
+    try:
+        header = start + await reader.readexactly(HEADER.size - len(MAGIC))
+        kind, codec, length, raw_length, checksum = _parse_header(header, max_payload)
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Conexión cerrada a mitad de un mensaje") from None
+    return kind, _check_payload(payload, codec, raw_length, checksum)
+
+
+async def read_message(reader, max_payload=MAX_PAYLOAD):
+    frame = await read_frame(reader, max_payload)
+    if frame is None:
+        return None
+    kind, raw = frame
+    return kind, json.loads(raw)
+
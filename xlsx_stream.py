@@ -0,0 +1,160 @@
+import math
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+# Minimal .xlsx writer: each sheet's XML is written straight into the zip as rows
+# arrive, so memory stays flat whatever the size. Strings are inline (no shared
+# string table to hold); only plain values are written: text, numbers and booleans.
+
+MAX_SHEET_ROWS = 1_048_576
+MAX_CELL_TEXT = 32_767
+FLUSH_ROWS = 1000   # Rows encoded and compressed together
+_BAD_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_BAD_TITLE = re.compile(r"[\[\]:*?/\\]")
+
+_CONTENT_TYPES = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                  '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                  '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                  '<Default Extension="xml" ContentType="application/xml"/>'
+                  '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                  '{sheets}</Types>')
+_SHEET_TYPE = ('<Override PartName="/xl/worksheets/sheet{n}.xml" '
+               'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>')
+_ROOT_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+              '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+              'Target="xl/workbook.xml"/></Relationships>')
+_WORKBOOK = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+             '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+             'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+             '<sheets>{sheets}</sheets></workbook>')
+_WORKBOOK_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                  '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                  '{sheets}</Relationships>')
+_SHEET_REL = ('<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+              'Target="worksheets/sheet{n}.xml"/>')
+_SHEET_START = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>')
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def column_letter(index):
+    # 0 -> A, 25 -> Z, 26 -> AA
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _text(value):
+    text = _BAD_XML.sub("", value[:MAX_CELL_TEXT])
+    space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ""
+    return f'<is><t{space}>{escape(text)}</t></is>'
+
+
+def cell_xml(ref, value):
+    # One <c> element; None gives no cell. Anything that isn't text, a finite number
+    # or a boolean is written as its text
+    if value is None:
+        return ""
+    kind = type(value)
+    if kind is bool:
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if kind is int or (kind is float and math.isfinite(value)):
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+    if kind is not str:
+        value = str(value)
+    return f'<c r="{ref}" t="inlineStr">{_text(value)}</c>'
+
+
+class StreamingSheet:
+    def __init__(self, stream, title):
+        self.stream = stream
+        self.title = title
+        self.rows = 0
+        self._letters = []
+        self._pending = []
+
+    def append(self, row):
+        if self.rows >= MAX_SHEET_ROWS:
+            raise ValueError(f"Una hoja de Excel admite como mucho {MAX_SHEET_ROWS} filas")
+        self.rows += 1
+        number = self.rows
+        letters = self._letters
+        while len(letters) < len(row):
+            letters.append(column_letter(len(letters)))
+        cells = "".join([cell_xml(f"{letters[i]}{number}", value) for i, value in enumerate(row)])
+        self._pending.append(f'<row r="{number}">{cells}</row>')
+        if len(self._pending) >= FLUSH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.stream.write("".join(self._pending).encode("utf-8"))
+            self._pending = []
+
+
+class StreamingWorkbook:
+    """Write-only .xlsx file: add_sheet(title), append rows, close().
+
+    Sheets are written one after another; adding a sheet finishes the
+    previous one. Rows are encoded and compressed as they are appended.
+    """
+
+    def __init__(self, path, compresslevel=1):
+        self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel)
+        self.titles = []
+        self.sheet = None
+        self._stream = None
+
+    def _finish_sheet(self):
+        if self._stream is not None:
+            self.sheet.flush()
+            self._stream.write(_SHEET_END.encode("utf-8"))
+            self._stream.close()
+            self._stream = None
+
+    def add_sheet(self, title):
+        self._finish_sheet()
+        title = _BAD_TITLE.sub("_", title)[:31]
+        if title.lower() in (existing.lower() for existing in self.titles):
+            raise ValueError(f"Ya hay una hoja llamada {title}")
+        self.titles.append(title)
+        number = len(self.titles)
+        self._stream = self.zip.open(f"xl/worksheets/sheet{number}.xml", "w", force_zip64=True)
+        self._stream.write(_SHEET_START.encode("utf-8"))
+        self.sheet = StreamingSheet(self._stream, title)
+        return self.sheet
+
+    def close(self):
+        if not self.titles:
+            self.add_sheet("Hoja1")
+        self._finish_sheet()
+        numbers = range(1, len(self.titles) + 1)
+        self.zip.writestr("[Content_Types].xml", _CONTENT_TYPES.format(
+            sheets="".join(_SHEET_TYPE.format(n=n) for n in numbers)))
+        self.zip.writestr("_rels/.rels", _ROOT_RELS)
+        self.zip.writestr("xl/workbook.xml", _WORKBOOK.format(sheets="".join(
+            f'<sheet name={quoteattr(title)} sheetId="{n}" r:id="rId{n}"/>' for n, title in zip(numbers, self.titles))))
+        self.zip.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS.format(
+            sheets="".join(_SHEET_REL.format(n=n) for n in numbers)))
+        self.zip.close()
+
+    def abort(self):
+        # Closes the file without finishing it; the caller removes it
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()